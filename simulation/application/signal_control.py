@@ -8,13 +8,13 @@ from enum import Enum
 from itertools import islice
 from typing import Tuple, List, Dict, Optional, Any
 
-import sumolib
 import traci
 import traci.constants as tc
 from pydantic import ValidationError
 
 from simulation.lib.common import logger
-from simulation.lib.net_tool import JunctionConns, entry_movement_sorted
+from simulation.lib.net_tool import JunctionConns
+from simulation.lib.net_cache import CompiledNet
 from simulation.lib.public_conn_data import PubMsgLabel, DataMsg
 from simulation.lib.public_data import (create_Phasic, create_SignalScheme, create_NodeReferenceID,
                                         create_DateTimeFilter, create_TimeCountingDown, create_PhaseState, create_Phase,
@@ -167,7 +167,7 @@ class SignalController:
         self.newly_program_id = None  # 如果未创建新的program, 应通过traci接口读取program ID
 
     @classmethod
-    def load_net(cls, net: sumolib.net.Net):
+    def load_net(cls, net: CompiledNet):
         """加载SignalController的路网"""
         cls._net = net
 
@@ -184,12 +184,9 @@ class SignalController:
         See Also: https://sumo.dlr.de/docs/Simulation/Traffic_Lights.html#defining_signal_groups
 
         """
-        node: sumolib.net.node.Node = self._net.getNode(self.ints_id)
-        connections: List[sumolib.net.Connection] = node.getConnections()
-        assert len(connections)
-        any_connection = connections[0]
-        self.tls_id = any_connection.getTLSID()
-        self.conn_info = entry_movement_sorted(connections, node)
+        junction = self._net.get_junction(self.ints_id)
+        self.tls_id = junction.tls_id
+        self.conn_info: JunctionConns = junction.conn_info  # 编译路网时由entry_movement_sorted生成，只读
 
         # 按照link index排序，此后可以按照edge变化来判断movement
         # connections = sorted(connections, key=lambda x: x.getTLLinkIndex())
@@ -275,7 +272,7 @@ class SignalController:
                                                   control_mode=0,
                                                   cycle=cycle_length,
                                                   base_signal_scheme_id=int(current_program_id),
-                                                  start_time=SimStatus.start_real_unix_timestamp(),
+                                                  start_time=SimStatus.start_unix_timestamp,
                                                   phases=phases)
         return signal_execution
 
@@ -361,8 +358,8 @@ class SignalController:
 
         node_id = create_NodeReferenceID(signalized_intersection_name_decimal(self.ints_id))
         intersection_status_object = {'status': 5}  # fix timing
-        moy = SimStatus.current_moy()
-        timestamp = SimStatus.current_timestamp_in_minute()
+        moy = SimStatus.moy
+        timestamp = SimStatus.timestamp_in_minute
         intersection_state = create_DF_IntersectionState(intersection_id=node_id,
                                                          status=intersection_status_object,
                                                          moy=moy,
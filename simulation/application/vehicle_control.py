@@ -10,11 +10,7 @@ import traci
 
 from simulation.lib.common import logger
 from simulation.lib.public_data import SimStatus
-
-
-def flow_str_convert(veh_id: int):
-    """对于Flow形式输入的交通流车辆id的转换"""
-    return ''.join(('flow', str(veh_id), '.0'))
+from simulation.lib.veh_registry import vehicle_ids
 
 
 class VehicleController:
@@ -35,7 +31,10 @@ class VehicleController:
         Args:
             MSG_SpeedGuide: 当前时刻传入的车速引导指令。指令内容详见https://code.zbmec.com/mec_core/mecdata/-/wikis/8-典型应用场景/1-车速引导
         """
-        veh_id_str = flow_str_convert(MSG_SpeedGuide['veh_id'])
+        veh_id_str = vehicle_ids.name(MSG_SpeedGuide['veh_id'])
+        if veh_id_str is None:
+            logger.warning(f'vehicle {MSG_SpeedGuide["veh_id"]} of speed guidance is not in the network')
+            return None
         if veh_id_str not in self.SpeedGuidanceStorage:
             self.SpeedGuidanceStorage[veh_id_str] = {}  # 创建车速引导指令
         for guide_info in MSG_SpeedGuide['guide_info']:  # 进入同一MSG下的不同guide_info
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 14:30
+# @File        : builders.py
+# @Description : 标准消息构造函数的开销测试
+
+import time
+from functools import wraps
+from inspect import signature
+from typing import Callable, Dict, Union
+
+from simulation.lib.common import set_type_assert, type_assert_enabled
+from simulation.lib.public_data import (create_SafetyMessage, create_ParticipantData, create_RoadsideSafetyMessage,
+                                        create_NodeReferenceID)
+
+PARTICIPANT_COUNT = 1000
+
+
+def bind_type_assert(func: Callable) -> Callable:
+    """原alltypeassert的实现，每次调用通过Signature.bind匹配参数后检查类型，作为对照"""
+    raw_func = getattr(func, '__wrapped__', func)
+    sig = signature(raw_func)
+    bound_types = {}
+    for para_name, para in sig.parameters.items():
+        annotation = para.annotation
+        if hasattr(annotation, '__origin__'):
+            bound_types[para_name] = annotation.__args__ if annotation.__origin__ == Union else annotation.__origin__
+        else:
+            bound_types[para_name] = annotation
+
+    @wraps(raw_func)
+    def wrapper(*args, **kwargs):
+        bound_values = sig.bind(*args, **kwargs)
+        for name, value in bound_values.arguments.items():
+            if not isinstance(value, bound_types[name]):
+                raise TypeError(f'Argument {name} must be {bound_types[name]}, while {type(value)} is given')
+        return raw_func(*args, **kwargs)
+    return wrapper
+
+
+def build_participants(sm_builder: Callable, ptc_builder: Callable, rsm_builder: Callable) -> None:
+    """按照JunctionVehContainer中的方式为PARTICIPANT_COUNT辆车构造BSM和RSM"""
+    node = create_NodeReferenceID(920)
+    for ptc_id in range(PARTICIPANT_COUNT):
+        sm_builder(ptcId=ptc_id, moy=1, secMark=1.5, lat=31.29, lon=121.18, x=10.5, y=20.5, node=node,
+                   lane_ref_id=1, speed=10., direction=90., width=1.8, length=5., acceleration=0.5,
+                   classification='passenger_Vehicle_TypeUnknown', edge_id='edge', lane_id='edge_0')
+    participants = [
+        ptc_builder(ptc_id=ptc_id, moy=1, secMark=1.5, lat=0.001, lon=0.001, x=10.5, y=20.5, speed=10.,
+                    heading=90., acceleration=0.5, width=1.8, length=5.,
+                    classification='passenger_Vehicle_TypeUnknown', node=node, edge_id='edge', lane_id='edge_0')
+        for ptc_id in range(PARTICIPANT_COUNT)
+    ]
+    rsm_builder(node_id=920, lat=31.29, lon=121.18, participants=participants)
+
+
+def measure(repeat: int = 20) -> Dict[str, float]:
+    """
+    测量每PARTICIPANT_COUNT辆车构造消息的用时
+
+    Returns: 各实现方式的平均用时 (ms)
+    """
+    bind_builders = (bind_type_assert(create_SafetyMessage), bind_type_assert(create_ParticipantData),
+                     bind_type_assert(create_RoadsideSafetyMessage))
+    builders = (create_SafetyMessage, create_ParticipantData, create_RoadsideSafetyMessage)
+    cases = (
+        ('bind_type_assert', True, lambda: build_participants(*bind_builders)),
+        ('type_assert', True, lambda: build_participants(*builders)),
+        ('no_type_assert', False, lambda: build_participants(*builders)),
+    )
+    res = {}
+    enabled = type_assert_enabled()
+    try:
+        for case_name, type_assert, case_func in cases:
+            set_type_assert(type_assert)
+            res[case_name] = _average_ms(case_func, repeat)
+    finally:
+        set_type_assert(enabled)  # 恢复调用前的设置(如typeAssert配置)
+    return res
+
+
+def _average_ms(func: Callable[[], None], repeat: int) -> float:
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == '__main__':
+    for name, cost in measure().items():
+        print(f'{name}: {cost:.2f} ms / {PARTICIPANT_COUNT} participants')
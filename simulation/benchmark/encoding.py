@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 16:10
+# @File        : encoding.py
+# @Description : json2fb与原生Flatbuffers构造的序列化开销对比
+
+import json
+import time
+from typing import Callable, Dict
+
+from simulation.benchmark.messaging import sample_spat
+from simulation.connection.fb_builder import get_native_builder
+from simulation.connection.mqtt import MSG_TYPE_INFO, fb_converter
+from simulation.lib.public_conn_data import DataMsg, DetailMsgType
+from simulation.lib.public_data import (create_SafetyMessage, create_ParticipantData, create_RoadsideSafetyMessage,
+                                        create_NodeReferenceID, create_TrafficFlowStat, create_TrafficFlow)
+
+
+def sample_messages(participant_count: int = 20) -> Dict[DetailMsgType, dict]:
+    """构造原生构造函数支持的各类型消息，字段与仿真中推送的消息一致"""
+    node = create_NodeReferenceID(920)
+    safety_message = create_SafetyMessage(
+        ptcId=1, moy=1, secMark=1.5, lat=31.29, lon=121.18, x=10.5, y=-20.5, node=node, lane_ref_id=1, speed=10.,
+        direction=90., acceleration=-0.5, width=1.8, length=5., classification='passenger_Vehicle_TypeUnknown',
+        edge_id='edge', lane_id='edge_0')
+    participants = [
+        create_ParticipantData(ptc_id=ptc_id, moy=1, secMark=1.5, lat=31.29, lon=121.18, x=10.5, y=-20.5,
+                               speed=10., heading=90., acceleration=0.5, width=1.8, length=5.,
+                               classification='passenger_Vehicle_TypeUnknown', node=node, edge_id='edge',
+                               lane_id='edge_0', general_id=[ptc_id % 256] * 8 if ptc_id % 2 else None)
+        for ptc_id in range(participant_count)
+    ]
+    stats = [create_TrafficFlowStat(f'edge_{lane}', 1, 'passenger_Vehicle_TypeUnknown', 12.5, 8.1, 20.4, 3)
+             for lane in range(12)]
+    return {
+        DataMsg.SafetyMessage: safety_message,
+        DataMsg.RoadsideSafetyMessage: create_RoadsideSafetyMessage(node_id=920, lat=31.29, lon=121.18,
+                                                                    participants=participants),
+        DataMsg.SignalPhaseAndTiming: sample_spat(),
+        DataMsg.TrafficFlow: create_TrafficFlow(node, 1700000000000, {'interval': 60},
+                                                'DE_TrafficFlowStatByInterval', stats),
+    }
+
+
+def json2fb_encode(msg_type: DetailMsgType, msg: dict) -> bytes:
+    """PubClient中'flatbuffers'的序列化方式"""
+    success, fb_msg = fb_converter.json2fb(MSG_TYPE_INFO[msg_type].fb_code,
+                                           json.dumps(msg, separators=(',', ':')).encode('utf-8'))
+    if success != 0:
+        raise ValueError(f'json2fb error code: {success}')
+    return fb_msg
+
+
+def measure(repeat: int = 1000) -> Dict[str, Dict[str, float]]:
+    """
+    测量各类型消息单条序列化的用时
+
+    Returns: 消息类型: {序列化方式: 平均用时 (us)}
+    """
+    res = {}
+    for msg_type, msg in sample_messages().items():
+        native_builder = get_native_builder(msg_type)
+        cases = {'flatbuffers': lambda: json2fb_encode(msg_type, msg)}
+        if native_builder is not None:
+            cases['flatbuffers_native'] = lambda: native_builder(msg)
+        res[msg_type.name] = {case_name: _average_us(case_func, repeat) for case_name, case_func in cases.items()}
+    return res
+
+
+def _average_us(func: Callable[[], bytes], repeat: int) -> float:
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == '__main__':
+    for msg_name, costs in measure().items():
+        print(f'{msg_name}: ' + ', '.join(f'{case_name} {cost:.1f} us' for case_name, cost in costs.items()))
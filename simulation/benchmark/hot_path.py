@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 18:45
+# @File        : hot_path.py
+# @Description : 基于traci替身的仿真单步热点路径压测
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List, Callable, Optional, Iterable
+
+import sumolib
+
+from simulation.lib.public_conn_data import PubMsgLabel
+from simulation.lib.public_data import SimStatus
+from simulation.lib.sim_data import SimInfoStorage
+from simulation.lib.traci_stand_in import TraciStandIn, SyntheticPopulation, static_trafficlight_results
+
+DEFAULT_NETWORK = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'network',
+                               'yutanglu1207.net.xml')
+DEFAULT_JUNCTION = 'point920'
+
+
+@dataclass
+class HotPathReport:
+    """单个车辆规模的压测结果"""
+    vehicles: int
+    steps: int
+    elapsed: float = 0.
+    published: int = 0  # 生成的消息数
+    alloc_peak_kb: float = 0.  # tracemalloc统计的单步内存峰值
+    alloc_blocks_per_step: float = 0.  # 单步新分配且未释放的内存块数
+    step_latency: List[float] = field(default_factory=list)
+
+    @property
+    def steps_per_sec(self) -> float:
+        return self.steps / self.elapsed if self.elapsed > 0 else 0.
+
+    def summary(self) -> dict:
+        ordered = sorted(self.step_latency)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else 0.
+        return {
+            'vehicles': self.vehicles,
+            'steps': self.steps,
+            'steps_per_sec': round(self.steps_per_sec, 1),
+            'latency_p95_ms': round(p95 * 1000, 3),
+            'published': self.published,
+            'alloc_peak_kb': round(self.alloc_peak_kb, 1),
+            'alloc_blocks_per_step': round(self.alloc_blocks_per_step, 1)
+        }
+
+
+class HotPathBench:
+    """
+    在traci替身上运行单个交叉口的仿真单步热点路径:
+    JunctionVehContainer.update_vehicle_info -> FlowStopLine.update_vehicle_cache -> 生成BSM/RSM/SPAT/TrafficFlow消息
+    -> 推送(可选)
+    """
+
+    def __init__(self, net: sumolib.net.Net, junction_id: str = DEFAULT_JUNCTION, step_length: float = 0.1,
+                 publish: Optional[Callable[[PubMsgLabel], None]] = None):
+        """
+
+        Args:
+            net: 路网，需使用withLatestPrograms读取
+            junction_id: 信控交叉口id
+            step_length: 仿真步长 (s)
+            publish: 消息推送方法，例如MQTTConnection.publish，未提供时只生成消息
+        """
+        self.net = net
+        self.junction_id = junction_id
+        self.step_length = step_length
+        self.publish = publish
+        self.storage = SimInfoStorage()
+        self.storage.initialize_signal_controller(net, junction_list=[junction_id])
+        self.storage.initialize_traffic_flow(net, junction_list=[junction_id])
+        self.storage.initialize_participant(net, junction_list=[junction_id])
+        self.storage.initialize_update_execute(trajectory_update=True, traffic_flow_update=True)
+        self.stand_in = TraciStandIn()
+
+    def _feed(self, population: SyntheticPopulation, sim_time: float):
+        """生成当前步的订阅结果，对应SUMO单步运行，不计入用时"""
+        tls_id = self.storage.signal_controllers[self.junction_id].tls_id
+        self.stand_in.set_step(sim_time,
+                               junction_context={self.junction_id: population.step(self.step_length)},
+                               trafficlight={tls_id: static_trafficlight_results(self.net, tls_id, sim_time)})
+
+    def _step(self, sim_time: float) -> int:
+        sc = self.storage.signal_controllers[self.junction_id]
+        SimStatus.time_rolling(sim_time)
+        self.storage.update_storage()
+
+        veh_container = self.storage.junction_veh_cons[self.junction_id]
+        creators = [veh_container.create_bsm_pub_msg, veh_container.create_rsm_pub_msg, sc.create_spat_pub_msg,
+                    self.storage.flow_cons[self.junction_id].create_traffic_flow_pub_msg]
+        published = 0
+        for creator in creators:
+            success, msg_label = creator()
+            if not success or msg_label is None:
+                continue
+            published += len(msg_label.raw_msg) if msg_label.multiple else 1
+            if self.publish is not None:
+                self.publish(msg_label)
+        return published
+
+    def run(self, vehicles: int, steps: int, alloc_steps: int = 20) -> HotPathReport:
+        """
+        运行压测
+        Args:
+            vehicles: 交叉口范围内的车辆数
+            steps: 计时的仿真步数
+            alloc_steps: 使用tracemalloc统计内存分配的仿真步数(统计内存时运行较慢，与计时分开进行)
+
+        Returns: 压测结果
+
+        """
+        report = HotPathReport(vehicles=vehicles, steps=steps)
+        population = SyntheticPopulation(self.net, self.junction_id, vehicles)
+        self.storage.reset()
+        SimStatus.reset()
+        sim_time = 0.
+        with self.stand_in:
+            for _ in range(steps):
+                sim_time = round(sim_time + self.step_length, 3)
+                self._feed(population, sim_time)
+                start = time.perf_counter()
+                report.published += self._step(sim_time)
+                report.step_latency.append(time.perf_counter() - start)
+            report.elapsed = sum(report.step_latency)
+
+            if alloc_steps > 0:
+                tracemalloc.start()
+                try:
+                    snapshot_before = tracemalloc.take_snapshot()
+                    for _ in range(alloc_steps):
+                        sim_time = round(sim_time + self.step_length, 3)
+                        self._feed(population, sim_time)
+                        self._step(sim_time)
+                    snapshot_after = tracemalloc.take_snapshot()
+                    report.alloc_peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+                finally:
+                    tracemalloc.stop()
+                new_blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, 'lineno'))
+                report.alloc_blocks_per_step = new_blocks / alloc_steps
+        SimStatus.reset()
+        return report
+
+
+def run_populations(bench: HotPathBench, populations: Iterable[int], steps: int) -> List[dict]:
+    return [bench.run(vehicles, steps).summary() for vehicles in populations]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='hot path benchmark on synthetic vehicle populations')
+    parser.add_argument('--net', default=DEFAULT_NETWORK)
+    parser.add_argument('--junction', default=DEFAULT_JUNCTION)
+    parser.add_argument('--populations', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--steps', type=int, default=50)
+    parser.add_argument('--publish', action='store_true', help='publish messages through a loopback MQTTConnection')
+    args = parser.parse_args()
+
+    publish_func = None
+    if args.publish:
+        from simulation.connection.mqtt import MQTTConnection
+        from simulation.connection.loopback import LoopbackBroker
+        connection = MQTTConnection()
+        connection.connect_loopback(LoopbackBroker())
+        publish_func = connection.publish
+
+    hot_path_bench = HotPathBench(sumolib.net.readNet(args.net, withLatestPrograms=True), args.junction,
+                                  publish=publish_func)
+    for res in run_populations(hot_path_bench, args.populations, args.steps):
+        print(json.dumps(res))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 10:40
+# @File        : messaging.py
+# @Description : 基于进程内回环通信的消息链路压测
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import List, Tuple, Callable, Optional, Iterable, Iterator
+
+from simulation.connection.loopback import LoopbackBroker, LoopbackClient
+from simulation.connection.mqtt import MQTTConnection, MSG_TYPE_INFO, MsgInfo, fb_converter
+from simulation.lib.public_conn_data import DataMsg, DetailMsgType, PubMsgLabel
+from simulation.lib.public_data import (create_NodeReferenceID, create_TimeCountingDown, create_PhaseState,
+                                        create_Phase, create_DF_IntersectionState, create_SignalPhaseAndTiming)
+
+Burst = List[Tuple[DetailMsgType, dict]]  # 单个仿真步内注入的一组下发消息
+
+
+def signal_scheme_burst(node_id: int = 920, count: int = 1) -> Burst:
+    """构造SignalScheme下发消息"""
+    msg = {'node_id': {'region': 1, 'id': node_id}, 'time_span': {}, 'control_mode': 0, 'cycle': 104,
+           'base_signal_scheme_id': 0, 'phases': [
+            {'id': 1, 'order': 1, 'movements': ['1', '2', '3'], 'green': 20, 'yellow': 6, 'allred': 0},
+            {'id': 2, 'order': 2, 'movements': ['5', '6', '7'], 'green': 20, 'yellow': 6, 'allred': 0},
+            {'id': 3, 'order': 3, 'movements': ['9', '10', '11'], 'green': 20, 'yellow': 6, 'allred': 0},
+            {'id': 4, 'order': 4, 'movements': ['13', '14', '15'], 'green': 20, 'yellow': 6, 'allred': 0}]}
+    return [(DataMsg.SignalScheme, msg) for _ in range(count)]
+
+
+def speed_guide_burst(count: int = 10, first_veh_id: int = 0) -> Burst:
+    """构造SpeedGuide下发消息，每条消息对应一辆车"""
+    return [(DataMsg.SpeedGuide, {'mec_id': 'MEC_0', 'veh_id': veh_id, 'time': 0,
+                                  'guide_info': [{'time': 0, 'speed': 100, 'guide': 100}]})
+            for veh_id in range(first_veh_id, first_veh_id + count)]
+
+
+def sample_spat(node_id: int = 920, movement_count: int = 12) -> dict:
+    """构造用于推送压测的SPAT消息"""
+    phases = []
+    for movement in range(1, movement_count + 1):
+        timing = create_TimeCountingDown(start_time=0, min_end_time=20, max_end_time=20, likely_end_time=20,
+                                         time_confidence=0, next_start_time=104, next_duration=20)
+        phases.append(create_Phase(phase_id=movement, phase_states=[create_PhaseState(light=6, timing=timing)]))
+    intersection_state = create_DF_IntersectionState(intersection_id=create_NodeReferenceID(node_id),
+                                                     status={'status': 5}, moy=1, timestamp=1., time_confidence=0,
+                                                     phases=phases)
+    return create_SignalPhaseAndTiming(moy=1, timestamp=1., name=str(node_id), intersections=[intersection_state])
+
+
+@dataclass
+class LoadReport:
+    """压测结果"""
+    injected: int = 0  # 注入的下发消息数
+    received: int = 0  # 仿真侧读取到的下发消息数
+    published: int = 0  # 仿真侧推送的消息数
+    step_latency: List[float] = field(default_factory=list)  # 每一步从注入消息到推送完成的用时 (s)
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.step_latency)
+
+    @property
+    def publish_rate(self) -> float:
+        """推送速率 (条/s)"""
+        return self.published / self.elapsed if self.elapsed > 0 else 0.
+
+    def latency_percentile(self, q: float) -> float:
+        if not self.step_latency:
+            return 0.
+        ordered = sorted(self.step_latency)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            'steps': len(self.step_latency),
+            'injected': self.injected,
+            'received': self.received,
+            'published': self.published,
+            'publish_rate': round(self.publish_rate, 1),
+            'latency_p50_ms': round(self.latency_percentile(50) * 1000, 3),
+            'latency_p95_ms': round(self.latency_percentile(95) * 1000, 3),
+            'latency_max_ms': round(max(self.step_latency, default=0.) * 1000, 3)
+        }
+
+
+class MessagingLoadGenerator:
+    """
+    消息链路压测工具，在回环代理上回放下发消息并测量仿真侧每一步收发的用时
+
+    Notes:
+        每一步依次执行: 1) 外部客户端发布一组下发消息 2) MQTTConnection读取并交由handler处理
+        3) 推送outbound产生的消息，与Simulation.run中单步的通信部分一致。
+        单步注入的消息数不应超过MessageTransfer队列的长度(1024)
+    """
+
+    def __init__(self, broker: LoopbackBroker = None,
+                 handler: Callable[[DetailMsgType, MsgInfo], None] = None):
+        """
+
+        Args:
+            broker: 回环消息代理，未提供时新建
+            handler: 仿真侧对读取到的消息的处理方法，例如TaskQueue.handle_current_msg
+        """
+        self.broker = broker if broker is not None else LoopbackBroker()
+        self.connection = MQTTConnection()
+        self.connection.connect_loopback(self.broker)
+        self.injector = LoopbackClient(self.broker, client_id='loopback-injector')
+        self.handler = handler
+
+    @staticmethod
+    def encode(msg_type: DetailMsgType, msg: dict) -> Tuple[str, bytes]:
+        """按照MSG_TYPE_INFO将下发消息转换成topic和对应的负载"""
+        topic, fb_code = MSG_TYPE_INFO[msg_type]
+        payload = json.dumps(msg).encode('utf-8')
+        if fb_code is not None:
+            success, payload = fb_converter.json2fb(fb_code, payload)
+            if success != 0:
+                raise ValueError(f'json2fb error occurs when encoding {msg_type}, error code: {success}')
+        return topic, payload
+
+    def run(self, bursts: Iterable[Burst],
+            outbound: Callable[[], Iterable[PubMsgLabel]] = None) -> LoadReport:
+        """
+        回放消息并测量
+        Args:
+            bursts: 各仿真步注入的下发消息
+            outbound: 每一步需要推送的消息
+
+        Returns: 压测结果
+
+        """
+        self.connection.clear_residual_data()
+        report = LoadReport()
+        for burst in bursts:
+            encoded = [self.encode(msg_type, msg) for msg_type, msg in burst]  # 编码属于外部算法的开销，不计入用时
+
+            start = time.perf_counter()
+            for topic, payload in encoded:
+                self.injector.publish(topic, payload)
+            for msg_type, msg_info in self.connection.loading_msg(DataMsg):
+                report.received += 1
+                if self.handler is not None:
+                    self.handler(msg_type, msg_info)
+            if outbound is not None:
+                for msg_label in outbound():
+                    self.connection.publish(msg_label)
+                    report.published += len(msg_label.raw_msg) if msg_label.multiple else 1
+            self.connection.flush()
+            report.step_latency.append(time.perf_counter() - start)
+            report.injected += len(encoded)
+        return report
+
+
+def repeat_bursts(burst: Burst, steps: int) -> Iterator[Burst]:
+    for _ in range(steps):
+        yield burst
+
+
+if __name__ == '__main__':
+    generator = MessagingLoadGenerator()
+    spat_label = PubMsgLabel([sample_spat(node_id) for node_id in range(10)], DataMsg.SignalPhaseAndTiming,
+                             convert_method='flatbuffers', multiple=True)
+    res = generator.run(repeat_bursts(signal_scheme_burst() + speed_guide_burst(50), steps=100),
+                        outbound=lambda: [spat_label])
+    print(res.summary())
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 15:20
+# @File        : fb_builder.py
+# @Description : 不经过json直接构造Flatbuffers消息的原生序列化
+
+"""
+原生Flatbuffers序列化
+
+PubMsgLabel的convert_method为'flatbuffers_native'时，PubClient调用按消息类型注册的原生构造函数，
+将消息字典直接写入flatbuffers.Builder，不经过json.dumps及FBConverter.json2fb。
+构造过程为纯python实现，单条消息耗时高于json.dumps，与json2fb的比较见benchmark/encoding.py。
+
+构造函数由connection/fb_schema/MECData.fbs驱动：模块加载时解析schema中的table/enum/union定义，
+按字段声明顺序确定vtable槽位(union占用类型和值两个槽位)，构造时按字典的键写入对应字段，规则与flatc解析json一致:
+  * 标量等于schema默认值时不写入，None视为缺省
+  * enum字段接受枚举名称或整数，union字段由`<字段名>_type`给出成员类型名称
+  * 缺少required字段、出现schema中不存在的字段或数值越界时抛出ValueError
+
+目前为SafetyMessage、RoadsideSafetyMessage、SignalPhaseAndTiming和TrafficFlow注册了构造函数，
+其余消息类型仍使用json转换的路径，新增构造函数后应使用check_native_parity确认与json2fb的反序列化结果一致
+"""
+
+import json
+import os
+import re
+import struct
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from simulation.lib.public_conn_data import DataMsg, DetailMsgType
+
+try:
+    import flatbuffers
+except ImportError:
+    flatbuffers = None
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), 'fb_schema', 'MECData.fbs')
+
+# 消息类型对应schema中的根table
+NATIVE_ROOT_TABLES = {
+    DataMsg.SafetyMessage: 'MSG_SafetyMessage',
+    DataMsg.RoadsideSafetyMessage: 'MSG_RoadsideSafetyMessage',
+    DataMsg.SignalPhaseAndTiming: 'MSG_SignalPhaseAndTiming',
+    DataMsg.TrafficFlow: 'MSG_TrafficFlow',
+}
+
+# schema标量类型对应flatbuffers.Builder方法名后缀及字节数
+_SCALAR_TYPES = {
+    'bool': ('Bool', 1),
+    'byte': ('Int8', 1), 'int8': ('Int8', 1),
+    'ubyte': ('Uint8', 1), 'uint8': ('Uint8', 1),
+    'short': ('Int16', 2), 'int16': ('Int16', 2),
+    'ushort': ('Uint16', 2), 'uint16': ('Uint16', 2),
+    'int': ('Int32', 4), 'int32': ('Int32', 4),
+    'uint': ('Uint32', 4), 'uint32': ('Uint32', 4),
+    'long': ('Int64', 8), 'int64': ('Int64', 8),
+    'ulong': ('Uint64', 8), 'uint64': ('Uint64', 8),
+    'float': ('Float32', 4), 'float32': ('Float32', 4),
+    'double': ('Float64', 8), 'float64': ('Float64', 8),
+}
+_SLOT_METHODS = {type_name: f'Prepend{method}Slot' for type_name, (method, _) in _SCALAR_TYPES.items()}
+
+_COMMENT_PAT = re.compile(r'//[^\n]*')
+_DECL_PAT = re.compile(r'\b(table|struct|enum|union)\s+(\w+)\s*(?::\s*(\w+)\s*)?\{(.*?)\}', re.S)
+_FIELD_PAT = re.compile(r'^(\w+)\s*:\s*(\[?\s*\w+\s*\]?)\s*(?:=\s*([^(]+?))?\s*(?:\((.*)\))?$', re.S)
+
+
+class _Field(NamedTuple):
+    name: str
+    slot: int
+    kind: str  # scalar, enum, string, table, union_type, union, vector
+    type_name: str  # 标量类型、enum、table或union名称，vector为元素类型
+    default: Any = 0
+    required: bool = False
+
+
+class FBSchema:
+    """解析fbs文件中构造消息所需的table、enum和union定义(不支持struct)"""
+
+    def __init__(self, schema_text: str):
+        self.enums: Dict[str, Tuple[str, Dict[str, int]]] = {}  # enum名称: (底层类型, 名称: 值)
+        self.unions: Dict[str, List[str]] = {}  # union名称: 成员table，类型值为下标+1
+        self.tables: Dict[str, Dict[str, _Field]] = {}
+        raw_tables = []
+        for kind, name, base_type, body in _DECL_PAT.findall(_COMMENT_PAT.sub('', schema_text)):
+            if kind == 'enum':
+                self.enums[name] = (base_type, self._parse_enum(body))
+            elif kind == 'union':
+                self.unions[name] = [member.strip() for member in body.split(',') if member.strip()]
+            elif kind == 'table':
+                raw_tables.append((name, body))
+            else:
+                raise ValueError(f'struct {name} is not supported by the native flatbuffers builder')
+        for name, body in raw_tables:
+            self.tables[name] = self._parse_table(name, body)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'FBSchema':
+        with open(file_path, encoding='utf-8') as f:
+            return cls(f.read())
+
+    @staticmethod
+    def _parse_enum(body: str) -> Dict[str, int]:
+        values = {}
+        next_value = 0
+        for item in body.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            name, _, value = item.partition('=')
+            if value:
+                next_value = int(value.strip(), 0)
+            values[name.strip()] = next_value
+            next_value += 1
+        return values
+
+    def _parse_table(self, table_name: str, body: str) -> Dict[str, _Field]:
+        fields = {}
+        slot = 0
+        for declaration in body.split(';'):
+            declaration = declaration.strip()
+            if not declaration:
+                continue
+            matched = _FIELD_PAT.match(declaration)
+            if matched is None:
+                raise ValueError(f'cannot parse field declaration "{declaration}" in table {table_name}')
+            name, type_name, default, attributes = matched.groups()
+            required = attributes is not None and 'required' in attributes
+            type_name = type_name.replace(' ', '')
+            if type_name.startswith('['):
+                element_type = type_name[1:-1]
+                if element_type in self.unions:
+                    raise ValueError(f'vector of unions in {table_name}.{name} is not supported')
+                fields[name] = _Field(name, slot, 'vector', element_type, required=required)
+            elif type_name in _SCALAR_TYPES:
+                fields[name] = _Field(name, slot, 'scalar', type_name, self._scalar_default(type_name, default))
+            elif type_name in self.enums:
+                enum_values = self.enums[type_name][1]
+                value = enum_values[default.strip()] if default is not None else 0
+                fields[name] = _Field(name, slot, 'enum', type_name, value)
+            elif type_name in self.unions:
+                type_field = name + '_type'
+                fields[type_field] = _Field(type_field, slot, 'union_type', type_name)
+                slot += 1
+                fields[name] = _Field(name, slot, 'union', type_name, required=required)
+            elif type_name == 'string':
+                fields[name] = _Field(name, slot, 'string', type_name, required=required)
+            else:
+                fields[name] = _Field(name, slot, 'table', type_name, required=required)
+            slot += 1
+        return fields
+
+    @staticmethod
+    def _scalar_default(type_name: str, default: Optional[str]):
+        if default is None:
+            return 0
+        default = default.strip()
+        if type_name == 'bool':
+            return default == 'true'
+        if type_name.startswith(('float', 'double')):
+            return float(default)
+        return int(default, 0)
+
+
+class NativeFBBuilder:
+    """按照schema将消息字典写入flatbuffers.Builder"""
+
+    def __init__(self, schema: FBSchema, init_size: int = 1024):
+        if flatbuffers is None:
+            raise ImportError('flatbuffers package is required by the native flatbuffers builder')
+        self.schema = schema
+        self.init_size = init_size
+        self._num_slots = {name: max((field.slot for field in fields.values()), default=-1) + 1
+                           for name, fields in schema.tables.items()}
+        self._required = {name: tuple(field.name for field in fields.values() if field.required)
+                          for name, fields in schema.tables.items()}
+
+    def build(self, root_table: str, msg: dict) -> bytes:
+        """
+        构造以root_table为根的Flatbuffers消息
+        Args:
+            root_table: schema中的table名称
+            msg: 消息内容，格式与json2fb接收的json一致
+
+        Returns: Flatbuffers二进制消息
+
+        """
+        builder = flatbuffers.Builder(self.init_size)
+        try:
+            root = self._build_table(builder, root_table, msg)
+        except (TypeError, struct.error) as e:
+            raise ValueError(f'cannot serialize {root_table}: {e}') from e
+        builder.Finish(root)
+        return bytes(builder.Output())
+
+    def _enum_value(self, enum_name: str, value) -> int:
+        if isinstance(value, str):
+            try:
+                return self.schema.enums[enum_name][1][value]
+            except KeyError:
+                raise ValueError(f'unknown value {value} of enum {enum_name}') from None
+        return value
+
+    def _build_table(self, builder, table_name: str, msg: dict) -> int:
+        if not isinstance(msg, dict):
+            raise ValueError(f'{table_name} expects an object, got {type(msg).__name__}')
+        fields = self.schema.tables[table_name]
+        for name in self._required[table_name]:
+            if msg.get(name) is None:
+                raise ValueError(f'required field {table_name}.{name} is missing')
+
+        scalars = []
+        offsets = []
+        # 子对象需要在StartObject之前写入
+        for key, value in msg.items():
+            if value is None:
+                continue
+            field = fields.get(key)
+            if field is None:
+                raise ValueError(f'unknown field {table_name}.{key}')
+            kind = field.kind
+            if kind == 'scalar':
+                scalars.append((_SLOT_METHODS[field.type_name], field.slot, value, field.default))
+            elif kind == 'enum':
+                base_type = self.schema.enums[field.type_name][0]
+                scalars.append((_SLOT_METHODS[base_type], field.slot,
+                                self._enum_value(field.type_name, value), field.default))
+            elif kind == 'union_type':
+                scalars.append(('PrependUint8Slot', field.slot, self._union_index(field.type_name, value), 0))
+            elif kind == 'string':
+                offsets.append((field.slot, builder.CreateString(value)))
+            elif kind == 'table':
+                offsets.append((field.slot, self._build_table(builder, field.type_name, value)))
+            elif kind == 'union':
+                member_type = msg.get(key + '_type')
+                if member_type is None:
+                    raise ValueError(f'union field {table_name}.{key} requires {key}_type')
+                member_table = self.schema.unions[field.type_name][self._union_index(field.type_name, member_type) - 1]
+                offsets.append((field.slot, self._build_table(builder, member_table, value)))
+            else:
+                offsets.append((field.slot, self._build_vector(builder, field.type_name, value)))
+
+        builder.StartObject(self._num_slots[table_name])
+        for slot, offset in offsets:
+            builder.PrependUOffsetTRelativeSlot(slot, offset, 0)
+        for method, slot, value, default in scalars:
+            getattr(builder, method)(slot, value, default)
+        return builder.EndObject()
+
+    def _union_index(self, union_name: str, member_type) -> int:
+        if isinstance(member_type, str):
+            try:
+                return self.schema.unions[union_name].index(member_type) + 1
+            except ValueError:
+                raise ValueError(f'unknown member {member_type} of union {union_name}') from None
+        return member_type
+
+    def _build_vector(self, builder, element_type: str, values: list) -> int:
+        if element_type == 'string':
+            elements = [builder.CreateString(value) for value in values]
+            prepend, width = builder.PrependUOffsetTRelative, 4
+        elif element_type in self.schema.tables:
+            elements = [self._build_table(builder, element_type, value) for value in values]
+            prepend, width = builder.PrependUOffsetTRelative, 4
+        elif element_type in self.schema.enums:
+            base_type = self.schema.enums[element_type][0]
+            elements = [self._enum_value(element_type, value) for value in values]
+            method, width = _SCALAR_TYPES[base_type]
+            prepend = getattr(builder, f'Prepend{method}')
+        else:
+            method, width = _SCALAR_TYPES[element_type]
+            elements = values
+            prepend = getattr(builder, f'Prepend{method}')
+
+        builder.StartVector(width, len(elements), width)
+        for element in reversed(elements):
+            prepend(element)
+        return builder.EndVector()
+
+
+NativeBuilder = Callable[[Any], bytes]
+
+_native_builders: Dict[DetailMsgType, NativeBuilder] = {}
+
+
+def register_native_builder(msg_type: DetailMsgType, func: NativeBuilder):
+    """注册消息类型对应的原生Flatbuffers构造函数"""
+    _native_builders[msg_type] = func
+
+
+def get_native_builder(msg_type: DetailMsgType) -> Optional[NativeBuilder]:
+    return _native_builders.get(msg_type)
+
+
+def load_native_builders(schema_file: str = SCHEMA_FILE) -> bool:
+    """
+    解析schema并注册NATIVE_ROOT_TABLES中各消息类型的构造函数
+    Returns: 是否成功注册，未安装flatbuffers时返回False
+    """
+    if flatbuffers is None:
+        return False
+    native_builder = NativeFBBuilder(FBSchema.from_file(schema_file))
+    for msg_type, root_table in NATIVE_ROOT_TABLES.items():
+        register_native_builder(msg_type, partial(native_builder.build, root_table))
+    return True
+
+
+def check_native_parity(converter, fb_code: int, msg_type: DetailMsgType, raw_msg: Any) -> Tuple[bool, dict, dict]:
+    """
+    校验原生构造函数与json转换路径生成的Flatbuffers反序列化结果是否一致
+    Args:
+        converter: FBConverter实例
+        fb_code: 消息对应的Flatbuffers类型编号
+        msg_type: 消息类型
+        raw_msg: 消息内容
+
+    Returns: 1) 是否一致 2) json转换路径的反序列化结果 3) 原生构造函数的反序列化结果
+
+    """
+    native_builder = get_native_builder(msg_type)
+    if native_builder is None:
+        raise KeyError(f'no native flatbuffers builder registered for msg type {msg_type}')
+
+    success, json_fb_msg = converter.json2fb(fb_code, json.dumps(raw_msg, separators=(',', ':')).encode('utf-8'))
+    if success != 0:
+        raise ValueError(f'json2fb error occurs when checking parity, msg type: {msg_type}, error code: {success}')
+    decoded = []
+    for fb_msg in (json_fb_msg, native_builder(raw_msg)):
+        success, json_msg = converter.fb2json(fb_code, fb_msg)
+        if success != 0:
+            raise ValueError(f'fb2json error occurs when checking parity, msg type: {msg_type}, error code: {success}')
+        decoded.append(json_msg)
+    return decoded[0] == decoded[1], json.loads(decoded[0].strip('\x00')), json.loads(decoded[1].strip('\x00'))
+
+
+load_native_builders()
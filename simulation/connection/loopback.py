@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 10:12
+# @File        : loopback.py
+# @Description : 进程内消息回环通信，替代MQTT服务器用于离线测试
+
+import itertools
+from collections import defaultdict, namedtuple
+from typing import Dict, List, Optional, Union, Iterable, Tuple
+
+LoopbackMsgInfo = namedtuple('LoopbackMsgInfo', ['rc', 'mid'])  # 与paho MQTTMessageInfo中使用到的字段对应
+
+
+class LoopbackMessage:
+    """回环传输的消息，提供与paho MQTTMessage相同的topic/payload属性"""
+
+    __slots__ = ('topic', 'payload', 'qos')
+
+    def __init__(self, topic: str, payload: bytes, qos: int = 0):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+
+
+class LoopbackBroker:
+    """
+    进程内消息代理，按topic将发布的消息同步分发给订阅的客户端
+
+    Notes:
+        消息在发布方调用publish的线程中直接回调订阅方的on_message，不经过网络，也不存在排队和丢包，
+        因而可用于在无网络环境下对MQTTConnection收发链路进行端到端测试和压测
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[str, List['LoopbackClient']] = defaultdict(list)
+        self.publish_count: Dict[str, int] = defaultdict(int)  # 各topic发布的消息条数
+        self.publish_bytes: Dict[str, int] = defaultdict(int)  # 各topic发布的消息字节数
+
+    def register(self, client: 'LoopbackClient', topic: str):
+        if client not in self._subscriptions[topic]:
+            self._subscriptions[topic].append(client)
+
+    def unregister(self, client: 'LoopbackClient'):
+        for subscribers in self._subscriptions.values():
+            if client in subscribers:
+                subscribers.remove(client)
+
+    def deliver(self, topic: str, payload: bytes, qos: int = 0):
+        """向订阅topic的所有客户端分发消息"""
+        self.publish_count[topic] += 1
+        self.publish_bytes[topic] += len(payload)
+        for client in self._subscriptions.get(topic, ()):
+            client.handle_message(LoopbackMessage(topic, payload, qos))
+
+    def reset_statistics(self):
+        self.publish_count.clear()
+        self.publish_bytes.clear()
+
+
+class LoopbackClient:
+    """
+    回环通信客户端，实现MQTTConnection/PubClient所用到的paho Client接口子集(subscribe, publish, reconnect)
+    """
+
+    def __init__(self, broker: LoopbackBroker, client_id: str = ''):
+        self.broker = broker
+        self.client_id = client_id
+        self.on_connect = None
+        self.on_message = None
+        self.on_disconnect = None
+        self._mid_generator = itertools.count(1)
+
+    def subscribe(self, topic: Union[str, Tuple[str, int], Iterable[Tuple[str, int]]], qos: int = 0):
+        """订阅topic，参数形式与paho Client.subscribe相同"""
+        if isinstance(topic, str):
+            topics = [topic]
+        elif isinstance(topic, tuple):
+            topics = [topic[0]]
+        else:
+            topics = [item[0] for item in topic]
+
+        for topic_name in topics:
+            self.broker.register(self, topic_name)
+        return 0, next(self._mid_generator)
+
+    def unsubscribe_all(self):
+        self.broker.unregister(self)
+
+    def publish(self, topic: str, payload: Optional[Union[str, bytes]] = None, qos: int = 0, retain: bool = False):
+        """发布消息，str类型的消息与paho一致按utf-8编码"""
+        if payload is None:
+            payload = b''
+        elif isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        self.broker.deliver(topic, payload, qos)
+        return LoopbackMsgInfo(0, next(self._mid_generator))
+
+    def reconnect(self):
+        return 0
+
+    def handle_message(self, msg: LoopbackMessage):
+        if self.on_message is not None:
+            self.on_message(self, None, msg)
@@ -6,14 +6,19 @@
 import json
 import random
 import threading
+import time
 from collections import namedtuple
 from queue import Queue
-from typing import Tuple, Iterator, Iterable, Union, Type
+from typing import Tuple, Iterator, Iterable, Union, Type, Dict
 
 from paho.mqtt.client import Client, MQTTMessage
 
+from simulation.connection.fb_builder import get_native_builder
+from simulation.connection.loopback import LoopbackBroker, LoopbackClient
+from simulation.connection.msg_batch import BatchBuffer
 from simulation.connection.python_fbconv.fbconv import FBConverter
 from simulation.lib.common import logger
+from simulation.lib.profiler import profiler
 from simulation.lib.public_conn_data import OrderMsg, DataMsg, SpecialDataMsg, DetailMsgType, PubMsgLabel
 
 FB_CACHE_SIZE = 102400
@@ -61,6 +66,21 @@ class MQTTConnection:
         """向指定topic推送消息，未连接状态则不进行推送"""
         return self.__pub_client.publish(msg_label)
 
+    def flush(self, force: bool = False):
+        """推送批量缓存中达到等待时间的消息，force为True时推送所有缓存消息"""
+        self.__pub_client.flush(force)
+
+    def set_batch_policy(self, msg_type: DetailMsgType, max_bytes: int, window: float = 0.):
+        """
+        开启指定消息类型的批量推送，多条消息按msg_batch中的分帧格式合并为一条MQTT消息
+        Args:
+            msg_type: 消息类型
+            max_bytes: 单条MQTT消息的最大字节数
+            window: 消息在缓存中的最长等待时间 (s)
+        """
+        target_topic = MSG_TYPE_INFO[msg_type].topic_name
+        self.__pub_client.batch_buffers[target_topic] = BatchBuffer(max_bytes, window)
+
     def loading_msg(self, msg_type: Type[DetailMsgType]) -> Iterator[Tuple[DetailMsgType, MsgInfo]]:
         """获取当前的所有消息，以遍历形式读取"""
         return self.__msg_transfer.loading_msg(msg_type)
@@ -78,6 +98,20 @@ class MQTTConnection:
         self.__sub_thread.start()
         self.state = True
 
+    def connect_loopback(self, broker: LoopbackBroker, topics=None):
+        """
+        连接进程内的回环消息代理，收发流程与MQTT一致但不经过网络，用于离线测试
+        Args:
+            broker: 回环消息代理
+            topics: 需要订阅的一系列主题，若为空则订阅所有可用MSG_TYPE中的主题
+        """
+        client = LoopbackClient(broker, client_id='sub-loopback')
+        client.on_connect = on_connect
+        client.on_message = on_message
+        client.subscribe(topic=normalize_topics(topics), qos=1)
+        self.__pub_client = PubClient(None, None, client)
+        self.state = True
+
     def clear_residual_data(self):
         self.__msg_transfer.clear_residual_info()
 
@@ -142,6 +176,18 @@ VALID_TOPIC = {item.topic_name: (short_name, item.fb_code) for short_name, item
                item.topic_name.startswith('MECUpload') or item.topic_name.endswith('SIM')}
 
 
+def normalize_topics(topics: Union[str, Iterable[str], None]):
+    """将需要订阅的主题转换成客户端subscribe方法接受的形式，若为空则订阅所有可用MSG_TYPE中的主题"""
+    if topics is None:
+        return [(topic, 0) for topic in VALID_TOPIC.keys()]
+    elif isinstance(topics, str):
+        return topics
+    elif isinstance(topics, Iterable):
+        return [(topic, 0) for topic in topics]
+    else:
+        raise TypeError(f'wrong topics type {type(topics)}')
+
+
 def on_connect(client, userdata, flags, rc):
     """MQTT连接服务器回调函数"""
     if rc == 0:
@@ -192,14 +238,7 @@ class SubClientThread(threading.Thread):
         super().__init__()
         self.broker = broker
         self.port = port
-        if topics is None:
-            self.topics = [(topic, 0) for topic in VALID_TOPIC.keys()]
-        elif isinstance(topics, str):
-            self.topics = topics
-        elif isinstance(topics, Iterable):
-            self.topics = [(topic, 0) for topic in topics]
-        else:
-            raise TypeError(f'wrong topics type {type(topics)}')
+        self.topics = normalize_topics(topics)
         self.client = None
         self.daemon = True
 
@@ -230,6 +269,7 @@ class PubClient:
             self.client = self.__connect_pub_mqtt(broker, port)
         else:
             self.client = sub_client
+        self.batch_buffers: Dict[str, BatchBuffer] = {}  # 开启批量推送的topic
 
     @staticmethod
     def __connect_pub_mqtt(broker, port):
@@ -244,7 +284,8 @@ class PubClient:
 
     def _publish(self, topic: str, msg: str):
         """通过客户端发布单条消息"""
-        msg_info = self.client.publish(topic, msg)
+        with profiler.phase('publish'):
+            msg_info = self.client.publish(topic, msg)
         if msg_info.rc == 0:
             return
         logger.info(f'fail to send message to topic {topic}, return code: {msg_info.rc}')
@@ -276,10 +317,20 @@ class PubClient:
         Returns:
 
         """
-        if convert_method == 'flatbuffers':
+        encode_start = time.perf_counter()
+        native_builder = get_native_builder(msg_type) if convert_method == 'flatbuffers_native' else None
+        if native_builder is not None:
+            try:
+                _msg = native_builder(raw_msg)
+            except ValueError as e:
+                logger.warning(f'native flatbuffers builder error occurs when sending message, '
+                               f'msg type: {msg_type}, error: {e}, msg body: {raw_msg}')
+                return None
+        elif convert_method in ('flatbuffers', 'flatbuffers_native'):
+            # 未注册原生构造函数的消息类型(或未安装flatbuffers)使用json转换
             if fb_code is None:
                 raise ValueError(f'no flatbuffers structure for msg type {msg_type}')
-            _msg = json.dumps(raw_msg).encode('utf-8')
+            _msg = json.dumps(raw_msg, separators=(',', ':')).encode('utf-8')
 
             success, _msg = fb_converter.json2fb(fb_code, _msg)
             if success != 0:
@@ -292,5 +343,21 @@ class PubClient:
             _msg = raw_msg
         else:
             raise ValueError(f'cannot handle convert type: {convert_method}')
-
-        self._publish(target_topic, _msg)
+        profiler.record('encode', time.perf_counter() - encode_start)
+
+        batch_buffer = self.batch_buffers.get(target_topic)
+        if batch_buffer is None:
+            self._publish(target_topic, _msg)
+            return None
+
+        if isinstance(_msg, str):
+            _msg = _msg.encode('utf-8')
+        ready_payload = batch_buffer.append(_msg)
+        if ready_payload is not None:
+            self._publish(target_topic, ready_payload)
+
+    def flush(self, force: bool = False):
+        """推送批量缓存中的消息"""
+        for target_topic, batch_buffer in self.batch_buffers.items():
+            if force and len(batch_buffer) or batch_buffer.is_due():
+                self._publish(target_topic, batch_buffer.pop())
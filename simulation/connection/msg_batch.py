@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 13:20
+# @File        : msg_batch.py
+# @Description : 多条消息合并为单条MQTT消息推送的分帧格式
+
+"""
+批量推送的分帧格式:
+
+    payload = frame_1 + frame_2 + ... + frame_n
+    frame   = length (4字节, 大端无符号整数) + body (length字节, 单条序列化后的消息, 如Flatbuffers)
+
+消息体本身不做任何修改，接收方使用decode_batch按长度前缀依次切分即可还原出每条消息
+"""
+
+import struct
+import time
+from typing import List, Optional
+
+FRAME_HEADER = struct.Struct('>I')
+
+
+def encode_batch(bodies: List[bytes]) -> bytes:
+    """将多条消息按长度前缀分帧合并"""
+    return b''.join(FRAME_HEADER.pack(len(body)) + body for body in bodies)
+
+
+def decode_batch(payload: bytes) -> List[bytes]:
+    """
+    将批量推送的消息还原成单条消息
+    Args:
+        payload: 接收到的MQTT消息内容
+
+    Returns: 各条消息
+
+    Raises: ValueError(消息分帧不完整)
+    """
+    bodies = []
+    offset, total = 0, len(payload)
+    while offset < total:
+        if offset + FRAME_HEADER.size > total:
+            raise ValueError(f'incomplete frame header at offset {offset}')
+        body_len, = FRAME_HEADER.unpack_from(payload, offset)
+        offset += FRAME_HEADER.size
+        if offset + body_len > total:
+            raise ValueError(f'incomplete frame body at offset {offset}, expect {body_len} bytes')
+        bodies.append(bytes(payload[offset: offset + body_len]))
+        offset += body_len
+    return bodies
+
+
+class BatchBuffer:
+    """单个topic的批量推送缓存，达到最大字节数或最长等待时间后合并推送"""
+
+    def __init__(self, max_bytes: int, window: float = 0.):
+        """
+
+        Args:
+            max_bytes: 单条MQTT消息的最大字节数，单条消息超过该值时单独成帧推送
+            window: 消息在缓存中的最长等待时间 (s)，为0时每一仿真步推送一次
+        """
+        if max_bytes <= FRAME_HEADER.size:
+            raise ValueError(f'batch max bytes must be greater than {FRAME_HEADER.size}')
+        self.max_bytes = max_bytes
+        self.window = window
+        self._bodies: List[bytes] = []
+        self._size = 0
+        self._first_append_time: Optional[float] = None
+
+    def __len__(self):
+        return len(self._bodies)
+
+    def append(self, body: bytes) -> Optional[bytes]:
+        """
+        添加一条消息
+        Returns: 加入该消息会超过最大字节数时，返回此前缓存的消息合并后的结果
+        """
+        frame_size = FRAME_HEADER.size + len(body)
+        ready_payload = None
+        if self._bodies and self._size + frame_size > self.max_bytes:
+            ready_payload = self.pop()
+
+        if self._first_append_time is None:
+            self._first_append_time = time.monotonic()
+        self._bodies.append(body)
+        self._size += frame_size
+        return ready_payload
+
+    def is_due(self) -> bool:
+        """缓存的消息是否达到最长等待时间"""
+        if not self._bodies:
+            return False
+        return time.monotonic() - self._first_append_time >= self.window
+
+    def pop(self) -> bytes:
+        """取出缓存的消息并合并"""
+        payload = encode_batch(self._bodies)
+        self._bodies = []
+        self._size = 0
+        self._first_append_time = None
+        return payload
@@ -3,6 +3,7 @@
 # @File        : core.py
 # @Description : 仿真平台及测评系统核心模块
 
+import math
 import os
 import sys
 import re
@@ -10,22 +11,33 @@ import json
 import subprocess
 import time
 import traceback
-import heapq
 
 from collections import defaultdict, abc
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
 from functools import partial
 from itertools import chain
-from typing import List, Dict, Optional, Callable, Union, Iterable
+from typing import List, Dict, Optional, Callable, Union, Iterable, Any
 
 import simulation.lib.config as config
 from simulation.lib.common import logger, singleton, ImplementCounter
-from simulation.lib.public_conn_data import DataMsg, OrderMsg, SpecialDataMsg, DetailMsgType, PubMsgLabel
-from simulation.lib.public_data import ImplementTask, InfoTask, BaseTask, SimStatus
-from simulation.lib.sim_data import SimInfoStorage, ArterialSimInfoStorage
+from simulation.lib.public_conn_data import (DataMsg, OrderMsg, SpecialDataMsg, DetailMsgType, PubMsgLabel,
+                                             CONFIG_PUB_MSG_TYPE)
+from simulation.lib.profiler import profiler
+from simulation.lib.public_data import ImplementTask, InfoTask, InfoTaskGroup, BaseTask, SimStatus
+from simulation.lib.sim_data import SimInfoStorage, ArterialSimInfoStorage, REGION_DETECTION_RADIUS
+from simulation.lib.net_cache import load_compiled_net
+from simulation.lib.sub_record import SubscriptionRecorder
+from simulation.lib.timing_wheel import TimingWheel
+from simulation.lib.trajectory_store import JunctionTrajectory, TrajectoryTolerance, load_record_policies
 from simulation.connection.mqtt import MQTTConnection
 
 from simulation.evaluation.data_process import get_stats
+from simulation.evaluation.stats_store import StatsStore, STATS_DB_NAME, next_run_index
+from simulation.evaluation.queue_geometry import load_detector_geometry
+from simulation.evaluation.eval_service import get_eval_service, FAILURE_RESULT
+from simulation.evaluation.score_engine import ENGINE_NAME
+from simulation.evaluation.result_registry import EvalResultRegistry, TaskResults
 
 # 校验环境变量中是否存在SUMO_HOME
 if 'SUMO_HOME' in os.environ:
@@ -69,8 +81,9 @@ class Simulation:
         # self.internal_task_creator: List[Callable[[], Union[Sequence[BaseTask], BaseTask]]] = []
         self.task_queue = TaskQueue()
         self.terminate_func: Optional[Callable[[], bool]] = None
+        self.recorder: Optional[SubscriptionRecorder] = None  # 设置后逐步录制订阅数据，用于离线回放
 
-        def initialize_sumo(self,
+    def initialize_sumo(self,
                         sumo_cfg_fp: str,
                         network_fp: str,
                         route_fp: str,
@@ -114,6 +127,8 @@ class Simulation:
             sumoCmd.extend(['--step-length', str(sim_time_len)])
         traci.start(sumoCmd)
 
+        if sim_time_len is not None:
+            self.task_queue.set_tick_length(sim_time_len)
         self.sim_core.sim_time_limit = sim_time_limit
         self.sim_core.warm_up_time = warm_up_time
 
@@ -122,8 +137,19 @@ class Simulation:
 
     def initialize_storage(self, network_fp, *, junction_list=None,
                            trajectory_feature: bool = True,
-                           traffic_flow_feature: bool = False):
-        """平台内部各功能模块仿真场景范围初始化"""
+                           traffic_flow_feature: bool = False,
+                           trajectory_tolerance: TrajectoryTolerance = TrajectoryTolerance(),
+                           trajectory_record: Optional[Dict[str, dict]] = None):
+        """
+        平台内部各功能模块仿真场景范围初始化
+        Args:
+            network_fp: 路网文件路径
+            junction_list: 场景中的交叉口，为None时为路网中所有信控交叉口
+            trajectory_feature: 记录车辆轨迹
+            traffic_flow_feature: 统计TrafficFlow
+            trajectory_tolerance: 轨迹增量编码的容差
+            trajectory_record: 各交叉口的轨迹记录策略配置，见trajectory_store.load_record_policies
+        """
 
         self.sim_core.load_net(network_fp)
         self.storage.initialize_signal_controller(self.sim_core.net, junction_list=junction_list)
@@ -131,7 +157,10 @@ class Simulation:
         self.storage.initialize_participant(self.sim_core.net, junction_list=junction_list)
 
         self.storage.initialize_update_execute(trajectory_update=trajectory_feature,
-                                               traffic_flow_update=traffic_flow_feature)
+                                               traffic_flow_update=traffic_flow_feature,
+                                               trajectory_tolerance=trajectory_tolerance,
+                                               record_policies=load_record_policies(trajectory_record,
+                                                                                    self.storage.junction_veh_cons))
 
     def run(self, connection: MQTTConnection) -> int:
         """
@@ -157,21 +186,28 @@ class Simulation:
         try:
             while traci.simulation.getMinExpectedNumber() >= 0:
 
-                self.sim_core.run_single_step()
+                with profiler.phase('sumo_step'):
+                    self.sim_core.run_single_step()
                 # time.sleep(0.03)
 
                 if self.sim_core.waiting_warm_up():
                     continue
 
-                self.storage.update_storage()  # 执行storage更新任务
+                if self.recorder is not None:
+                    self.recorder.record_step(SimStatus.sim_time_stamp, self.storage)
 
-                # 处理接收到的数据类消息，转化成控制任务
-                for msg_type, msg_info in connection.loading_msg(DataMsg):
-                    self.task_queue.handle_current_msg(msg_type, msg_info)
+                with profiler.phase('storage_and_tasks'):  # 不含sumo_step，storage更新、消息读取与任务执行的合计
+                    self.storage.update_storage()  # 执行storage更新任务
 
-                # 推送各消息类任务产生消息
-                for msg in chain(self.task_queue.cycle_task_execute(), self.task_queue.single_task_execute()):
-                    connection.publish(msg)
+                    # 处理接收到的数据类消息，转化成控制任务
+                    with profiler.phase('mqtt_drain'):
+                        for msg_type, msg_info in connection.loading_msg(DataMsg):
+                            self.task_queue.handle_current_msg(msg_type, msg_info)
+
+                    # 推送各消息类任务产生消息
+                    for msg in chain(self.task_queue.cycle_task_execute(), self.task_queue.single_task_execute()):
+                        connection.publish(msg)
+                    connection.flush()  # 推送批量缓存中达到等待时间的消息
 
                 if self.sim_core.reach_limit():
                     break  # 完成仿真任务提前终止仿真程序
@@ -185,7 +221,9 @@ class Simulation:
             logger.error(''.join(traceback.format_exception(exc_type, exc_value, exc_traceback)))
             ret_val = SIM_FLAG_ERROR
 
+        connection.flush(force=True)
         logger.info('仿真结束')
+        logger.debug(f'任务执行用时统计: {({name: stat.to_dict() for name, stat in self.task_queue.task_stats.items()})}')
         SimStatus.reset()  # 仿真状态信息重置
         return ret_val
 
@@ -193,6 +231,7 @@ class Simulation:
         """运行仿真结束后重置仿真状态"""
         self.storage.reset()
         self.task_queue.reset(single_only=True)
+        profiler.reset()
 
     def quick_register_task_creator_all(self):
         """快速注册从接收的数据转换成任务的处理方法"""
@@ -224,11 +263,21 @@ class Simulation:
             'signalExecution': self.task_queue.activate_signal_execution_publish
         }
 
-        for msg_type, pub_cycle in config.SimulationConfig.pub_msgs:
-            activate_func = msg_mapping.get(msg_type)
+        for msg_cfg in config.SimulationConfig.pub_msgs:
+            activate_func = msg_mapping.get(msg_cfg.name)
             if activate_func is None:
-                raise KeyError(f'message: {msg_type} is not supported')
-            activate_func(self.storage, config.SimulationConfig.junction_region, pub_cycle)
+                raise KeyError(f'message: {msg_cfg.name} is not supported')
+            activate_func(self.storage, config.SimulationConfig.junction_region, msg_cfg.frequency)
+
+    def auto_activate_batch_publish(self, connection: MQTTConnection):
+        """自动读取Config开启消息的批量推送"""
+        for msg_cfg in config.SimulationConfig.pub_msgs:
+            if msg_cfg.batch_max_bytes is None:
+                continue
+            msg_type = CONFIG_PUB_MSG_TYPE.get(msg_cfg.name)
+            if msg_type is None:
+                raise KeyError(f'message: {msg_cfg.name} is not supported')
+            connection.set_batch_policy(msg_type, msg_cfg.batch_max_bytes, msg_cfg.batch_window)
 
 
 class SimCoreSUMO:
@@ -240,7 +289,7 @@ class SimCoreSUMO:
         self._warm_up_time = 0
 
     def load_net(self, network_fp: str):
-        self._net = sumolib.net.readNet(network_fp, withLatestPrograms=True)  # 静态路网对象化数据
+        self._net = load_compiled_net(network_fp, REGION_DETECTION_RADIUS)  # 信控交叉口静态信息，优先读取缓存
 
     @property
     def net(self):
@@ -287,21 +336,98 @@ class SimCoreSUMO:
 implement_counter = ImplementCounter()
 
 
-class TaskQueue:
-    """任务池"""
+class TaskStat:
+    """单类任务的执行用时统计"""
+
+    __slots__ = ('count', 'total_time', 'max_time')
 
     def __init__(self):
-        self.cycle_task_queue: List[BaseTask] = []
-        self.single_task_queue: List[BaseTask] = []
+        self.count = 0
+        self.total_time = 0.
+        self.max_time = 0.
+
+    def record(self, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.count if self.count else 0.
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'total_ms': round(self.total_time * 1000, 3),
+                'mean_ms': round(self.mean_time * 1000, 3), 'max_ms': round(self.max_time * 1000, 3)}
+
+
+class TaskQueue:
+    """
+    任务池
+
+    Notes:
+        周期任务和定时任务分别存放在以仿真步为单位的时间轮中，exec_time为None的任务在下一次执行时立即执行。
+        周期任务的周期按仿真步长取整，因跳过仿真步(预热)而错过的执行时间不会补执行，顺延至当前步及以后的周期时刻
+    """
+
+    def __init__(self, tick_length: Optional[float] = None, info_workers: Optional[int] = None):
+        """
+
+        Args:
+            tick_length: 仿真步长 (s)，未提供时读取配置中的仿真步长
+            info_workers: 任务组内并行生成消息的线程数，未提供时读取配置，为0时串行执行
+        """
+        if tick_length is None:
+            tick_length = config.SimulationConfig.sim_time_step
+        if info_workers is None:
+            info_workers = config.SimulationConfig.info_task_workers
+        # ImplementTask调用traci控制接口，始终在主线程串行执行; 仅InfoTaskGroup的成员使用线程池并行
+        self.info_executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=info_workers, thread_name_prefix='info-task') if info_workers > 0 else None
+        self.cycle_task_wheel: TimingWheel[BaseTask] = TimingWheel(tick_length)
+        self.single_task_wheel: TimingWheel[BaseTask] = TimingWheel(tick_length)
+        self.immediate_tasks: List[BaseTask] = []
+        self.task_stats: Dict[str, TaskStat] = defaultdict(TaskStat)  # 按任务名称统计的执行用时
         self._task_create_func: Dict[DetailMsgType,
         Callable[[Union[dict, str]], Optional[Union[BaseTask, Iterable[BaseTask]]]]] = {}
 
+    @property
+    def tick_length(self) -> float:
+        return self.cycle_task_wheel.tick_length
+
+    def set_tick_length(self, tick_length: float):
+        """修改仿真步长，已添加的任务按执行时间重新放入时间轮"""
+        if tick_length == self.tick_length:
+            return
+        cycle_tasks = [task for _, task in self.cycle_task_wheel.items()]
+        single_tasks = [task for _, task in self.single_task_wheel.items()]
+        self.cycle_task_wheel = TimingWheel(tick_length)
+        self.single_task_wheel = TimingWheel(tick_length)
+        for task in chain(cycle_tasks, single_tasks):
+            self.add_new_task(task)
+
+    def _cycle_ticks(self, task: BaseTask) -> int:
+        """周期任务以步数表示的周期，至少为1步"""
+        return max(1, round(task.cycle_time / self.tick_length))
+
     def add_new_task(self, new_task: BaseTask):
         """添加新任务"""
-        if new_task.cycle_time is None:
-            heapq.heappush(self.single_task_queue, new_task)
+        if new_task.cycle_time is not None:
+            self.cycle_task_wheel.add(self.cycle_task_wheel.to_tick(new_task.exec_time), new_task)
+        elif new_task.exec_time is None:
+            self.immediate_tasks.append(new_task)
         else:
-            heapq.heappush(self.cycle_task_queue, new_task)
+            self.single_task_wheel.add(self.single_task_wheel.to_tick(new_task.exec_time), new_task)
+
+    def _execute_task(self, task: BaseTask):
+        """执行任务并记录用时"""
+        start = time.perf_counter()
+        res = task.execute()
+        elapsed = time.perf_counter() - start
+        task_name = task.task_name or type(task).__name__
+        self.task_stats[task_name].record(elapsed)
+        profiler.record(f'task/{task_name.split("-", 1)[0]}', elapsed)
+        return res
 
     def cycle_task_execute(self) -> List[PubMsgLabel]:
         """
@@ -311,24 +437,21 @@ class TaskQueue:
 
         """
         publish_msgs = []
+        wheel = self.cycle_task_wheel
+        current_tick = wheel.to_tick(SimStatus.sim_time_stamp)
+        for expire_tick, task in wheel.advance(current_tick):
+            cycle_ticks = self._cycle_ticks(task)
+            if expire_tick < current_tick:
+                # 错过的执行时间顺延至当前步及以后的周期时刻
+                expire_tick += math.ceil((current_tick - expire_tick) / cycle_ticks) * cycle_ticks
+                if expire_tick > current_tick:
+                    task.exec_time = wheel.to_time(wheel.add(expire_tick, task))
+                    continue
 
-        if len(self.cycle_task_queue):
-            top_task = self.cycle_task_queue[0]
-            while top_task.exec_time < SimStatus.sim_time_stamp:
-                top_task.exec_time = round(top_task.cycle_time + top_task.exec_time, 3)  # 防止浮点数运算时精度损失
-                if top_task.exec_time > SimStatus.sim_time_stamp:
-                    heapq.heappop(self.cycle_task_queue)
-                    heapq.heappush(self.cycle_task_queue, top_task)
-                    top_task = self.cycle_task_queue[0]
-            while top_task.exec_time == SimStatus.sim_time_stamp:
-                success, msg_label = top_task.execute()
-                if msg_label is not None and success:
-                    publish_msgs.append(msg_label)
-                top_task.exec_time = round(top_task.cycle_time + top_task.exec_time, 3)
-
-                heapq.heappop(self.cycle_task_queue)
-                heapq.heappush(self.cycle_task_queue, top_task)
-                top_task = self.cycle_task_queue[0]
+            success, msg_label = self._execute_task(task)
+            if msg_label is not None and success:
+                publish_msgs.append(msg_label)
+            task.exec_time = wheel.to_time(wheel.add(expire_tick + cycle_ticks, task))
         return publish_msgs
 
     def single_task_execute(self) -> List[PubMsgLabel]:
@@ -339,18 +462,16 @@ class TaskQueue:
 
         """
         publish_msgs = []
-        while len(self.single_task_queue):
-            top_task = self.single_task_queue[0]
-            if top_task.exec_time is None or top_task.exec_time == SimStatus.sim_time_stamp:
-                if isinstance(top_task, ImplementTask):
-                    success, res = top_task.execute()
-                elif isinstance(top_task, InfoTask):
-                    success, msg_label = top_task.execute()  # 返回结果: 执行是否成功, 需要发送的消息Optional[PubMsgLabel]
-                    if msg_label is not None and success:
-                        publish_msgs.append(msg_label)
-            elif top_task.exec_time > SimStatus.sim_time_stamp:
-                break
-            heapq.heappop(self.single_task_queue)
+        current_tick = self.single_task_wheel.to_tick(SimStatus.sim_time_stamp)
+        immediate_tasks, self.immediate_tasks = self.immediate_tasks, []
+        due_tasks = chain(immediate_tasks, (task for _, task in self.single_task_wheel.advance(current_tick)))
+        for task in due_tasks:
+            if isinstance(task, ImplementTask):
+                success, res = self._execute_task(task)
+            elif isinstance(task, InfoTask):
+                success, msg_label = self._execute_task(task)  # 返回结果: 执行是否成功, 需要发送的消息Optional[PubMsgLabel]
+                if msg_label is not None and success:
+                    publish_msgs.append(msg_label)
         return publish_msgs
 
     def handle_current_msg(self, msg_type: DetailMsgType, msg_info: dict, unbound_warning: bool = False):
@@ -392,10 +513,42 @@ class TaskQueue:
         self._task_create_func[msg_type] = handler_func
 
     def reset(self, single_only: bool = False):
-        """重置任务池"""
-        if not single_only:
-            self.cycle_task_queue.clear()
-        self.single_task_queue.clear()
+        """
+        重置任务池
+        Args:
+            single_only: 是否保留周期任务，保留的周期任务从仿真开始后的第一个周期重新计时
+
+        Returns:
+
+        """
+        cycle_tasks = [task for _, task in self.cycle_task_wheel.items()] if single_only else []
+        self.cycle_task_wheel.clear()
+        for task in cycle_tasks:
+            task.exec_time = task.cycle_time
+            self.add_new_task(task)
+        self.single_task_wheel.clear()
+        self.immediate_tasks.clear()
+        self.task_stats.clear()
+
+    @staticmethod
+    def _select_containers(containers: Dict[str, Any], intersections: Optional[List[str]]) -> list:
+        """按交叉口选取storage中的数据容器, 若未提供交叉口则选中全部"""
+        if intersections is None:
+            return list(containers.values())
+        selected = []
+        for ints_id in intersections:
+            container = containers.get(ints_id)
+            if container is None:
+                raise KeyError(f'cannot find intersection {ints_id} in storage')
+            selected.append(container)
+        return selected
+
+    def _add_task_group(self, member_funcs: list, msg_type: DetailMsgType, pub_cycle: float, task_prefix: str):
+        """将各交叉口同一类型的消息生成方法合并为一个周期任务组"""
+        if not member_funcs:
+            return
+        self.add_new_task(InfoTaskGroup(member_funcs, msg_type, cycle_time=pub_cycle, task_name=f'{task_prefix}-group',
+                                        executor=self.info_executor))
 
     def activate_spat_publish(self, storage: SimInfoStorage, intersections: List[str] = None, pub_cycle: float = 0.1):
         """
@@ -408,18 +561,9 @@ class TaskQueue:
         Returns:
 
         """
-
-        if intersections is None:
-            for ints_id, sc in storage.signal_controllers.items():
-                self.add_new_task(
-                    InfoTask(exec_func=sc.create_spat_pub_msg, cycle_time=pub_cycle, task_name=f'SPAT-{ints_id}'))
-        else:
-            for ints_id in intersections:
-                sc = storage.signal_controllers.get(ints_id)
-                if sc is None:
-                    raise KeyError(f'cannot find intersection {ints_id} in storage')
-                self.add_new_task(
-                    InfoTask(exec_func=sc.create_spat_pub_msg, cycle_time=pub_cycle, task_name=f'SPAT-{ints_id}'))
+        self._add_task_group([sc.create_spat_pub_msg for sc in
+                              self._select_containers(storage.signal_controllers, intersections)],
+                             DataMsg.SignalPhaseAndTiming, pub_cycle, 'SPAT')
 
     def activate_signal_execution_publish(self, storage: SimInfoStorage, intersections: List[str] = None,
                                           pub_cycle: float = 0.1):
@@ -433,19 +577,9 @@ class TaskQueue:
         Returns:
 
         """
-        if intersections is None:
-            for ints_id, sc in storage.signal_controllers.items():
-                self.add_new_task(
-                    InfoTask(exec_func=sc.create_signal_execution_pub_msg, cycle_time=pub_cycle,
-                             task_name=f'SignalExe-{ints_id}'))
-        else:
-            for ints_id in intersections:
-                sc = storage.signal_controllers.get(ints_id)
-                if sc is None:
-                    raise KeyError(f'cannot find intersection {ints_id} in storage')
-                self.add_new_task(
-                    InfoTask(exec_func=sc.create_signal_execution_pub_msg, cycle_time=pub_cycle,
-                             task_name=f'SignalExe-{ints_id}'))
+        self._add_task_group([sc.create_signal_execution_pub_msg for sc in
+                              self._select_containers(storage.signal_controllers, intersections)],
+                             DataMsg.SignalExecution, pub_cycle, 'SignalExe')
 
     def activate_bsm_publish(self, storage: SimInfoStorage, intersections: List[str] = None, pub_cycle: float = 0.1):
         """
@@ -458,17 +592,9 @@ class TaskQueue:
         Returns:
 
         """
-        if intersections is None:
-            for ints_id, veh_container in storage.junction_veh_cons.items():
-                self.add_new_task(InfoTask(exec_func=veh_container.create_bsm_pub_msg, cycle_time=pub_cycle,
-                                           task_name=f'BSM-{ints_id}'))
-        else:
-            for ints_id in intersections:
-                veh_container = storage.junction_veh_cons.get(ints_id)
-                if veh_container is None:
-                    raise KeyError(f'cannot find intersection {ints_id} in storage')
-                self.add_new_task(InfoTask(exec_func=veh_container.create_bsm_pub_msg, cycle_time=pub_cycle,
-                                           task_name=f'BSM-{ints_id}'))
+        self._add_task_group([veh_container.create_bsm_pub_msg for veh_container in
+                              self._select_containers(storage.junction_veh_cons, intersections)],
+                             DataMsg.SafetyMessage, pub_cycle, 'BSM')
 
     def activate_rsm_publish(self, storage: SimInfoStorage, intersections: List[str] = None, pub_cycle: float = 0.1):
         """
@@ -481,17 +607,9 @@ class TaskQueue:
         Returns:
 
         """
-        if intersections is None:
-            for ints_id, veh_container in storage.junction_veh_cons.items():
-                self.add_new_task(InfoTask(exec_func=veh_container.create_rsm_pub_msg, cycle_time=pub_cycle,
-                                           task_name=f'RSM-{ints_id}'))
-        else:
-            for ints_id in intersections:
-                veh_container = storage.junction_veh_cons.get(ints_id)
-                if veh_container is None:
-                    raise KeyError(f'cannot find intersection {ints_id} in storage')
-                self.add_new_task(InfoTask(exec_func=veh_container.create_rsm_pub_msg, cycle_time=pub_cycle,
-                                           task_name=f'RSM-{ints_id}'))
+        self._add_task_group([veh_container.create_rsm_pub_msg for veh_container in
+                              self._select_containers(storage.junction_veh_cons, intersections)],
+                             DataMsg.RoadsideSafetyMessage, pub_cycle, 'RSM')
 
     def activate_traffic_flow_publish(self, storage: SimInfoStorage, intersections: List[str] = None,
                                       pub_cycle: float = 60):
@@ -505,17 +623,9 @@ class TaskQueue:
         Returns:
 
         """
-        if intersections is None:
-            for ints_id, flow_container in storage.flow_cons.items():
-                self.add_new_task(InfoTask(exec_func=flow_container.create_traffic_flow_pub_msg, cycle_time=pub_cycle,
-                                           task_name=f'TF-{ints_id}'))
-        else:
-            for ints_id in intersections:
-                flow_container = storage.flow_cons.get(ints_id)
-                if flow_container is None:
-                    raise KeyError(f'cannot find intersection {ints_id} in storage')
-                self.add_new_task(InfoTask(exec_func=flow_container.create_traffic_flow_pub_msg, cycle_time=pub_cycle,
-                                           task_name=f'TF-{ints_id}'))
+        self._add_task_group([flow_container.create_traffic_flow_pub_msg for flow_container in
+                              self._select_containers(storage.flow_cons, intersections)],
+                             DataMsg.TrafficFlow, pub_cycle, 'TF')
 
 
 @singleton
@@ -523,19 +633,22 @@ class AlgorithmEval:
     def __init__(self):
         self.sim = Simulation()
         self.testing_name: str = config.SetupConfig.test_name
-        self.eval_record: Dict[str, dict] = {}
+        self.eval_record = EvalResultRegistry()
         self.__eval_start_func: Optional[Callable] = None
 
         # 生成存储sumo统计指标的文件夹
         output_path = config.SetupConfig.output_file_path
-        current_output_number = len(os.listdir(output_path))
-        new_output_index = current_output_number + 1
-        os.mkdir(os.path.join(output_path, str(new_output_index)))
+        new_output_index = next_run_index(output_path)  # 只按已有的运行目录编号，stats.db等文件不计入
         output_path = os.path.join(output_path, str(new_output_index))
+        os.mkdir(output_path)
 
         # 仿真运行开始方式
         self.mode_setting(config.SetupConfig.route_file_path,
-                          config.SetupConfig.is_route_directory())
+                          config.SetupConfig.is_route_directory(),
+                          output_path,
+                          config.SetupConfig.e1detector_output_file_path,
+                          config.SetupConfig.e2detector_output_file_path,
+                          new_output_index)
 
         # 注册仿真各环节触发的事件
         self.auto_initialize_event()
@@ -546,9 +659,12 @@ class AlgorithmEval:
                                     junction_list=config.SimulationConfig.junction_region,
                                     traffic_flow_feature=any(
                                         msg.name == config.CONFIG_MSG_NAME['TF'] for msg in
-                                        config.SimulationConfig.pub_msgs))
+                                        config.SimulationConfig.pub_msgs),
+                                    trajectory_tolerance=TrajectoryTolerance.from_config(
+                                        config.SimulationConfig.trajectory_tolerance),
+                                    trajectory_record=config.SimulationConfig.trajectory_record)
 
-        def _initialize_simulation(self, route_fp: str, general_output_fp: str, vehicle_output_fp: str):
+    def _initialize_simulation(self, route_fp: str, general_output_fp: str, vehicle_output_fp: str):
         """初始化仿真内容"""
         self.sim.initialize_sumo(sumo_cfg_fp=config.SetupConfig.config_file_path,
                                  network_fp=config.SetupConfig.network_file_path,
@@ -571,6 +687,25 @@ class AlgorithmEval:
                     return True
         return False
 
+    def _start_recording(self, output_dir_fp: str, sce_name: str):
+        """按配置开启场景订阅数据的录制"""
+        if config.SimulationConfig.record_subscription:
+            self.sim.recorder = SubscriptionRecorder(os.path.join(output_dir_fp, sce_name + '_subscription.rec'))
+
+    def _stop_recording(self):
+        if self.sim.recorder is not None:
+            self.sim.recorder.close()
+            self.sim.recorder = None
+
+    def _report_stats(self, run_index: int, sce_name_list: List[str]):
+        """统计各场景的指标并写入outputFilePath下的指标存储"""
+        geometry = None
+        if config.SetupConfig.detector_file_path is not None:
+            geometry = load_detector_geometry(config.SetupConfig.network_file_path,
+                                              config.SetupConfig.detector_file_path)
+        with StatsStore(os.path.join(config.SetupConfig.output_file_path, STATS_DB_NAME)) as store:
+            get_stats(run_index, sce_name_list, store=store, algorithm=self.testing_name, geometry=geometry)
+
     def sim_task_start(self, connection: MQTTConnection, sim_task_name: str = 'default') -> int:
         """开始运行仿真任务"""
         emit_eval_event(EvalEventType.BEFORE_TASK, connection=connection)
@@ -586,7 +721,7 @@ class AlgorithmEval:
         traci.close()
 
         self.eval_task_start(connection=connection, docker_name=self.testing_name, task_name=sim_task_name,
-                             eval_record=self.eval_record)
+                             eval_record=self.eval_record, trajectories=self.sim.storage.trajectory_info)
         return sim_ret_val
 
     def eval_task_start(*args, **kwargs):
@@ -607,7 +742,12 @@ class AlgorithmEval:
         self._initialize_simulation(route_fp, general_output_filename, vehicle_output_filename)
         self.sim.auto_activate_publish()
 
-        sim_ret_val = self.sim_task_start(connection)
+        self._start_recording(output_dir_fp, sce_name)
+        try:
+            sim_ret_val = self.sim_task_start(connection)
+        finally:
+            self._stop_recording()
+        profiler.dump(output_dir_fp, sce_name)
         e1detector_output_target_fp = os.path.join(output_dir_fp, sce_name + '_e1detectorinfo.xml')
         os.rename(e1detector_output_source_fp, e1detector_output_target_fp)
         e2detector_output_target_fp = os.path.join(output_dir_fp, sce_name + '_e2detectorinfo.xml')
@@ -618,7 +758,7 @@ class AlgorithmEval:
                         docker_name=self.testing_name,
                         connection=connection,
                         eval_record=self.eval_record)
-        get_stats(run_index, [sce_name])
+        self._report_stats(run_index, [sce_name])
 
     def sim_task_from_directory(self, connection: MQTTConnection, sce_dir_fp: str, *, f_name_startswith: str = None,
                                 output_dir_fp: str, e1detector_output_source_fp: str,
@@ -651,7 +791,12 @@ class AlgorithmEval:
             self._initialize_simulation(route_fp=route_fp, general_output_fp=general_output_fp,
                                         vehicle_output_fp=vehicle_output_fp)
             self.sim.auto_activate_publish()
-            sim_ret_val = self.sim_task_start(connection, sim_task_name=str(index))
+            self._start_recording(output_dir_fp, sce_name)
+            try:
+                sim_ret_val = self.sim_task_start(connection, sim_task_name=str(index))
+            finally:
+                self._stop_recording()
+            profiler.dump(output_dir_fp, sce_name)
 
             # 提前终止仿真运行
             if sim_ret_val == SIM_FLAG_TERMINATE:
@@ -668,7 +813,7 @@ class AlgorithmEval:
                         docker_name=self.testing_name,
                         connection=connection,
                         eval_record=self.eval_record)
-        get_stats(run_index, sce_name_list)
+        self._report_stats(run_index, sce_name_list)
 
     def mode_setting(self, route_fp: str, multiple_file: bool, output_dir_fp: str,
                      e1detector_output_source_fp: str, e2detector_output_source_fp: str, run_index: int) -> None:
@@ -786,7 +931,9 @@ def handle_trajectory_record_event(*args, **kwargs) -> None:
     Args:
         *args:
         **kwargs: 1) docker_name: str docker名 2) sub_name: str 子任务的文件名
-                  3) traj_record_dir: str 轨迹数据存储路径 4) veh_info: dict 字典
+                  3) traj_record_dir: str 轨迹数据存储路径 4) veh_info: dict 字典或JunctionTrajectory
+                  5) file_format: str full保存逐时刻展开的轨迹，delta保存编码后的轨迹(仅python评价模式可读取)，
+                     默认为SimulationConfig.trajectory_file_format
 
     """
 
@@ -798,8 +945,14 @@ def handle_trajectory_record_event(*args, **kwargs) -> None:
     veh_info = kwargs.get('veh_info')
     sub_name = kwargs.get('sub_name', docker_name)
     path = os.path.join(traj_record_dir, docker_name, sub_name) + '.json'
+    file_format = kwargs.get('file_format', config.SimulationConfig.trajectory_file_format)
     with open(path, 'w+') as f:
-        json.dump(veh_info, f, indent=2)
+        if not isinstance(veh_info, JunctionTrajectory):
+            json.dump(veh_info, f, indent=2)
+        elif file_format == 'delta':
+            json.dump(veh_info.to_dict(), f, separators=(',', ':'))
+        else:
+            veh_info.dump(f)
 
 
 def handle_multiple_trajectory_record_event(*args, **kwargs) -> None:
@@ -825,6 +978,10 @@ def handle_eval_apply_event(*args, **kwargs) -> None:
         2) docker_name: str docker名
         3) traj_record_dir: str 轨迹数据存储路径
         4) eval_record_dir: str 评测结果存储路径 结果存储于eval_record_dir/docker_name/sub_name.json
+        5) eval_mode: str exe使用外部评测程序，python使用常驻的评价服务，默认为SetupConfig.eval_mode
+        6) trajectories: dict 交叉口id -> 轨迹，python模式下提供时直接评价内存中的轨迹而不读取轨迹文件
+        7) eval_record: EvalResultRegistry 提供时评价结果登记在内存中，python模式下不再写入评测结果文件
+        8) task_name: str 场景名
     Returns:
 
     """
@@ -845,17 +1002,46 @@ def handle_eval_apply_event(*args, **kwargs) -> None:
     if not os.path.exists(docker_eval_record_dir):
         os.mkdir(docker_eval_record_dir)
     docker_traj_record_dir = os.path.join(traj_record_dir, docker_name)
+    eval_record: Optional[EvalResultRegistry] = kwargs.get('eval_record')
+    task_name = kwargs.get('task_name', 'default')
+
+    def register(sub_name: str, eval_res: dict):
+        if eval_record is not None:
+            eval_record.add(task_name, sub_name, eval_res)
+        else:
+            with open(os.path.join(docker_eval_record_dir, sub_name) + '.json', 'w+') as f:
+                json.dump(eval_res, f)
+
+    eval_mode = kwargs.get('eval_mode', config.SetupConfig.eval_mode)
+    if eval_mode == 'python':
+        # 交叉口文件只读取一次，不再为每个轨迹文件启动评测进程
+        service = get_eval_service(junction_info_dir, config.SetupConfig.eval_workers)
+        trajectories = kwargs.get('trajectories')
+        if trajectories is not None:
+            for junction_id, veh_info in trajectories.items():
+                register('_'.join((docker_name, junction_id)), service.evaluate(junction_id, veh_info))
+            return None
+        traj_file_paths = [os.path.join(docker_traj_record_dir, file) for file in os.listdir(docker_traj_record_dir)]
+        for traj_file_path, eval_res in service.evaluate_files(traj_file_paths):
+            register(os.path.splitext(os.path.basename(traj_file_path))[0], eval_res)
+        return None
+
     for file in os.listdir(docker_traj_record_dir):
         traj_file_path = os.path.join(docker_traj_record_dir, file)
         eval_file_path = os.path.join(docker_eval_record_dir, file)
         eval_cmd = [eval_exe_path, traj_file_path, junction_info_dir, eval_file_path]
         process = subprocess.Popen(eval_cmd)
         exit_code = process.wait()
-        # 仅在评测异常时由主程序写入结果，否则由评测程序写入
+        # 仅在评测异常时由主程序写入结果，否则由评测程序写入，评测程序的结果只在此处读取一次
         if exit_code != 0:
-            eval_res = {'score': -1, 'detail': 'evaluation faliure'}
+            eval_res = dict(FAILURE_RESULT)
             with open(eval_file_path, 'w+') as f:
                 json.dump(eval_res, f)
+        elif eval_record is not None:
+            with open(eval_file_path, 'r') as f:
+                eval_res = json.load(f)
+        if eval_record is not None:
+            eval_record.add(task_name, os.path.splitext(file)[0], eval_res)
 
 
 def handle_score_report_event(*args, **kwargs) -> None:
@@ -864,32 +1050,32 @@ def handle_score_report_event(*args, **kwargs) -> None:
     Args:
         *args:
         **kwargs:
-        1) eval_record_dir: str 评测结果存储路径
+        1) eval_record_dir: str 评测结果存储路径，未提供eval_record时从中读取评测结果
         2) docker_name: str docker名
         3) connection mqtt连接
-        4) eval_record: list
+        4) eval_record: EvalResultRegistry 评测结果登记表，场景汇总结果登记后写入eval_output_path
+        5) task_name: str 场景名
+        6) eval_output_path: str 场景汇总结果存储路径
     """
     eval_record_dir = kwargs.get('eval_record_dir', '../data/evaluation')
     docker_name = kwargs.get('docker_name', 'test')
+    eval_record: Optional[EvalResultRegistry] = kwargs.get('eval_record')
+    task_name = kwargs.get('task_name', 'default')
 
-    # eval_record_dir = kwargs.get('eval_record_dir')
-    # docker_name = kwargs.get('docker_name')
     all_result = {'score': 0, 'name': docker_name, 'abnormal': 0}
     detail = {'errorTimes': 0, 'detailInfo': [], 'errorInfo': []}
     if implement_counter.valid_implement:
-        eval_count = 0
-        for file in os.listdir(os.path.join(eval_record_dir, docker_name)):
-            eval_count += 1
-            with open(os.path.join(eval_record_dir, docker_name, file), 'r') as f:
-                single_result: dict = json.load(f)
-                if single_result['score'] == -1:  # evaluation error
-                    all_result['abnormal'] = 1
-                    detail['errorTimes'] = detail['errorTimes'] + 1
-                    detail['detailInfo'].append(single_result['detail'])
-                else:
-                    all_result['score'] = all_result['score'] + single_result['score']
-                    detail['detailInfo'].append(single_result)
-        all_result['score'] = float(all_result['score']) / float(eval_count)
+        if eval_record is not None:
+            task_results = eval_record.task(task_name)
+        else:
+            task_results = TaskResults()
+            for file in os.listdir(os.path.join(eval_record_dir, docker_name)):
+                with open(os.path.join(eval_record_dir, docker_name, file), 'r') as f:
+                    task_results.add(os.path.splitext(file)[0], json.load(f))
+        all_result['score'] = task_results.mean_score
+        all_result['abnormal'] = 1 if task_results.error_count else 0  # evaluation error
+        detail['errorTimes'] = task_results.error_count
+        detail['detailInfo'] = task_results.detail_info()
     else:
         detail['errorTimes'] = 1
         detail['errorInfo'].append('No valid execution received from Algorithm')
@@ -901,53 +1087,48 @@ def handle_score_report_event(*args, **kwargs) -> None:
 
     all_result['detail'] = detail
 
-    eval_record = kwargs.get('eval_record')
     if eval_record is None:
         # 如果未给定记录集合, 直接通过发布评测结果
         connection = kwargs.get('connection')
         print(f'测试{config.SetupConfig.test_name!r}测评结果: {all_result}')
-        connection.publish(PubMsgLabel(all_result, OrderMsg.ScoreReport, 'json'))
+        publish_score_report(connection, all_result)
+        return None
 
-    task_name = kwargs.get('task_name', 'default')
-    eval_record[task_name] = all_result
+    eval_record.record(task_name, all_result, kwargs.get('eval_output_path', '../data/output'), docker_name)
 
 
 def handle_test_batch_complete(*args, **kwargs) -> None:
     docker_name = kwargs.get('docker_name', 'test')
-    eval_record: Dict[str, dict] = kwargs.get('eval_record')
-    eval_record_dir = kwargs.get('eval_output_path', '../data/output')
-
-    docker_eval_record_dir = os.path.join(eval_record_dir, docker_name)
-    if not os.path.exists(docker_eval_record_dir):
-        os.mkdir(docker_eval_record_dir)
+    eval_record: EvalResultRegistry = kwargs.get('eval_record')
 
     if not eval_record:
         return None
 
-    score_res = []
-    abnormal_count = 0
-    detail = []
-    for task_name, single_eval_result in eval_record.items():
-        if single_eval_result['score'] == 0:
-            abnormal_count += 1
-        score_res.append(single_eval_result['score'])
-        detail.append(single_eval_result['detail'])
-        score_record_name = os.path.join(docker_eval_record_dir, f'{docker_name}_{task_name}.json')
-        with open(score_record_name, 'w') as f:
-            json.dump(single_eval_result, f, indent=2)
-    assemble_res = {
-        'score': 0 if abnormal_count else sum(score_res) / len(score_res),
-        'name': docker_name,
-        'abnormal': abnormal_count,
-        'detail': detail
-    }
-
-    # clear the dict without influencing the nested data required to report
+    # 各场景汇总结果已在登记时写入，综合评分随登记增量更新
+    assemble_res = eval_record.batch_result(docker_name)
+
+    # clear the registry without influencing the nested data required to report
     eval_record.clear()
     connection = kwargs.get('connection')
     print(f'测试综合测评结果: {assemble_res}')
 
-    connection.publish(PubMsgLabel(assemble_res, OrderMsg.ScoreReport, 'json'))
+    publish_score_report(connection, assemble_res)
+
+
+def publish_score_report(connection: MQTTConnection, result: dict) -> bool:
+    """
+    上报评分，python评价模式的评分公式未经外部评价程序校准(见score_engine.compare_with_external)，
+    默认不作为正式评分上报，SetupConfig.python_score_report开启时上报并标记评分来源
+    Returns: 是否上报
+    """
+    if config.SetupConfig.eval_mode == 'python':
+        if not config.SetupConfig.python_score_report:
+            logger.warning('python评价模式的评分未经外部评价程序校准，不上报ScoreReport，'
+                           '评价结果仅保存在本地，可在setting.yaml中设置pythonScoreReport上报')
+            return False
+        result = {**result, 'engine': ENGINE_NAME}
+    connection.publish(PubMsgLabel(result, OrderMsg.ScoreReport, 'json'))
+    return True
 
 
 def initialize_score_prepare():
@@ -1,98 +1,184 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional
 from xml.etree import ElementTree as ET
 
 # PATH = os.getcwd() + '/statistics'
 PATH = '../../data/statistics'
 
+ADD_LENGTH: dict = {'E': {0: 223.83, 1: 131.84, 2: 83.02, 3: 25.75},
+                    'W': {0: 275.81, 1: 256.25, 2: 141.82, 3: 20.5},
+                    'N': {0: 81.4, 1: 0},
+                    'S': {0: 106.37, 1: 62.3, 2: 0},
+                    }
+
+
+def _output_filepath(index, scene_name: str, suffix: str) -> str:
+    return PATH + '/' + str(index) + '/' + scene_name + suffix
+
+
+def iter_top_level_attrib(filepath: str) -> Iterator[dict]:
+    """流式读取xml文件根节点下每个子节点的属性，读取后立即清除节点，内存占用与文件大小无关"""
+    depth = 0
+    root = None
+    for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1:
+            yield elem.attrib
+            root.clear()  # 释放已读取的子节点
+
+
+def parse_statistics(filepath: str) -> float:
+    """statistics输出中的平均延误"""
+    for event, elem in ET.iterparse(filepath, events=('end',)):
+        if elem.tag == 'vehicleTripStatistics':
+            return float(elem.attrib.get('timeLoss'))
+    raise ValueError(f'vehicleTripStatistics not found in {filepath}')
+
+
+def parse_tripinfo(filepath: str) -> int:
+    """tripinfo输出中所有车辆的总停车次数"""
+    return sum(int(attrib.get('waitingCount')) for attrib in iter_top_level_attrib(filepath))
+
+
+def parse_e2detector(filepath: str, geometry=None) -> Dict[str, float]:
+    """
+    e2检测器输出中各进口道的最大排队长度
+    Args:
+        filepath: e2检测器输出文件路径
+        geometry: queue_geometry.DetectorGeometry，提供时按路网计算的检测器位置求排队长度，否则按检测器id和ADD_LENGTH计算
+
+    Returns: 进口道 -> 排队长度，geometry包含多个交叉口时键为'交叉口id/进口道'
+
+    """
+    if geometry is not None:
+        detector_ids, jam_lengths = [], []
+        for attrib in iter_top_level_attrib(filepath):
+            detector_ids.append(attrib.get('id'))
+            jam_lengths.append(float(attrib.get('maxJamLengthInMeters')))
+        junction_queue = geometry.max_queue(detector_ids, jam_lengths)
+        if len(junction_queue) == 1:
+            return next(iter(junction_queue.values()))
+        return {f'{junction_id}/{approach}': length for junction_id, approach_queue in junction_queue.items()
+                for approach, length in approach_queue.items()}
+
+    queue_info = {'E': [10, 0, 0.], 'W': [10, 0, 0.], 'N': [10, 0, 0.], 'S': [10, 0, 0.]}   # [sector, lane, length]
+    for attrib in iter_top_level_attrib(filepath):
+        detector_id = attrib.get('id')
+        approach = detector_id.split('_')[1][0]
+        sector = int(detector_id.split('_')[1][1])
+        lane = int(detector_id.split('_')[1][2])
+        queue_length = float(attrib.get('maxJamLengthInMeters'))
+        if queue_length > 0:    # 有效数据
+            if sector <= queue_info[approach][0]:
+                queue_info[approach][0] = sector
+                if queue_length > queue_info[approach][2]:
+                    queue_info[approach][2] = queue_length
+                    queue_info[approach][1] = lane
+    max_queue_info = {}
+    for approach, (sector, lane, length) in queue_info.items():
+        real_length = length + ADD_LENGTH[approach][sector]
+        # max_queue_info[approach] = (lane, real_length)
+        max_queue_info[approach] = real_length
+    return max_queue_info
+
+
+def parse_e1detector(filepath: str) -> int:
+    """e1检测器输出中的总通过车辆数"""
+    return sum(int(attrib.get('nVehContrib')) for attrib in iter_top_level_attrib(filepath))
+
+
+def get_scene_stats(index, scene_name: str, geometry=None) -> dict:
+    """单个场景的所有指标，每个输出文件只读取一遍，geometry见parse_e2detector"""
+    return {
+        'delay': parse_statistics(_output_filepath(index, scene_name, '_statistics.xml')),
+        'stop_times': parse_tripinfo(_output_filepath(index, scene_name, '_tripinfo.xml')),
+        'max_queue': parse_e2detector(_output_filepath(index, scene_name, '_e2detectorinfo.xml'), geometry),
+        'throughput': parse_e1detector(_output_filepath(index, scene_name, '_e1detectorinfo.xml'))
+    }
+
+
+def collect_stats(index, scene_name_list: list, processes: Optional[int] = None,
+                  geometry=None) -> Dict[str, dict]:
+    """
+    读取多个场景的指标，场景数大于1时使用进程池并行读取
+    Args:
+        index: 运行次数
+        scene_name_list: 场景名称
+        processes: 进程数，未提供时取场景数与CPU核数的较小值
+        geometry: e2检测器几何信息，见parse_e2detector
+
+    Returns: 场景名称 -> 指标
+
+    """
+    if processes is None:
+        processes = min(len(scene_name_list), os.cpu_count() or 1)
+    if processes <= 1 or len(scene_name_list) <= 1:
+        return {scene_name: get_scene_stats(index, scene_name, geometry) for scene_name in scene_name_list}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        scene_stats = executor.map(get_scene_stats, [index] * len(scene_name_list), scene_name_list,
+                                   [geometry] * len(scene_name_list))
+        return dict(zip(scene_name_list, scene_stats))
+
+
+def _select_metric(stats: Dict[str, dict], metric: str) -> dict:
+    return {scene_name: scene_stats[metric] for scene_name, scene_stats in stats.items()}
 
-def get_avg_delay(index, scene_name_list: list):
 
-    delay_dict = {}
-    for scene_name in scene_name_list:
-        filepath = PATH + '/' + str(index) + '/' + scene_name + '_statistics.xml'
-        tree = ET.parse(filepath)
-        root = tree.getroot()
-        vehicle_trip_stats = root.find('vehicleTripStatistics')
-        avg_delay = float(vehicle_trip_stats.attrib.get('timeLoss'))
-        delay_dict[scene_name] = avg_delay
-    return delay_dict
+def get_avg_delay(index, scene_name_list: list):
+    return {scene_name: parse_statistics(_output_filepath(index, scene_name, '_statistics.xml'))
+            for scene_name in scene_name_list}
 
 
 def get_total_stops(index, scene_name_list: list):
+    return {scene_name: parse_tripinfo(_output_filepath(index, scene_name, '_tripinfo.xml'))
+            for scene_name in scene_name_list}
 
-    stop_dict = {}
-    for scene_name in scene_name_list:
-        filepath = PATH + '/' + str(index) + '/' + scene_name + '_tripinfo.xml'
-        tree = ET.parse(filepath)
-        root = tree.getroot()
-        total_stop = 0
-        for trip in root:
-            stop = int(trip.attrib.get('waitingCount'))
-            total_stop += stop
-        stop_dict[scene_name] = total_stop
-    return stop_dict
-
-
-def get_max_queue(index, scene_name_list: list):
-
-    add_length: dict = {'E': {0: 223.83, 1: 131.84, 2: 83.02, 3: 25.75},
-                        'W': {0: 275.81, 1: 256.25, 2: 141.82, 3: 20.5},
-                        'N': {0: 81.4, 1: 0},
-                        'S': {0: 106.37, 1: 62.3, 2: 0},
-                        }
-    queue_dict = {}
-    for scene_name in scene_name_list:
-        filepath = PATH + '/' + str(index) + '/' + scene_name + '_e2detectorinfo.xml'
-        tree = ET.parse(filepath)
-        root = tree.getroot()
-        queue_info = {'E': [10, 0, 0.], 'W': [10, 0, 0.], 'N': [10, 0, 0.], 'S': [10, 0, 0.]}   # [sector, lane, length]
-        for detector in root:
-            detector_id = detector.attrib.get('id')
-            approach = detector_id.split('_')[1][0]
-            sector = int(detector_id.split('_')[1][1])
-            lane = int(detector_id.split('_')[1][2])
-            queue_length = float(detector.attrib.get('maxJamLengthInMeters'))
-            if queue_length > 0:    # 有效数据
-                if sector <= queue_info[approach][0]:
-                    queue_info[approach][0] = sector
-                    if queue_length > queue_info[approach][2]:
-                        queue_info[approach][2] = queue_length
-                        queue_info[approach][1] = lane
-        max_queue_info = {}
-        for approach, (sector, lane, length) in queue_info.items():
-            real_length = length + add_length[approach][sector]
-            # max_queue_info[approach] = (lane, real_length)
-            max_queue_info[approach] = real_length
-        queue_dict[scene_name] = max_queue_info
-    return queue_dict
-
-
-def get_throughput(index, scene_name_list: list):
-
-    throughput_dict = {}
-    for scene_name in scene_name_list:
-        filepath = PATH + '/' + str(index) + '/' + scene_name + '_e1detectorinfo.xml'
-        tree = ET.parse(filepath)
-        root = tree.getroot()
-        throughput = 0
-        for detector in root:
-            vehicle_num = int(detector.attrib.get('nVehContrib'))
-            throughput += vehicle_num
-        throughput_dict[scene_name] = throughput
-    return throughput_dict
 
+def get_max_queue(index, scene_name_list: list, geometry=None):
+    return {scene_name: parse_e2detector(_output_filepath(index, scene_name, '_e2detectorinfo.xml'), geometry)
+            for scene_name in scene_name_list}
 
-def get_stats(index, scene_name_list: list):
 
-    delay = get_avg_delay(index, scene_name_list)
-    stop_times = get_total_stops(index, scene_name_list)
-    max_queue = get_max_queue(index, scene_name_list)
-    throughput = get_throughput(index, scene_name_list)
+def get_throughput(index, scene_name_list: list):
+    return {scene_name: parse_e1detector(_output_filepath(index, scene_name, '_e1detectorinfo.xml'))
+            for scene_name in scene_name_list}
+
+
+def get_stats(index, scene_name_list: list, processes: Optional[int] = None, store=None,
+              algorithm: Optional[str] = None, geometry=None):
+    """
+    读取并打印场景的统计指标
+    Args:
+        index: 运行次数
+        scene_name_list: 场景名称
+        processes: 进程数
+        store: StatsStore，提供时通过存储读取，输出文件未变化的场景不再重新解析
+        algorithm: 测评的算法名称，随指标写入store
+        geometry: e2检测器几何信息，见parse_e2detector
+
+    Returns: 场景名称 -> 指标
+
+    """
+    if store is not None:
+        stats = store.ingest(index, scene_name_list, algorithm, processes, geometry)
+    else:
+        stats = collect_stats(index, scene_name_list, processes, geometry)
+    delay = _select_metric(stats, 'delay')
+    stop_times = _select_metric(stats, 'stop_times')
+    max_queue = _select_metric(stats, 'max_queue')
+    throughput = _select_metric(stats, 'throughput')
 
     print(f'The average delay of the intersection is {delay}')
     print(f'The number of total stop times of all vehicles is {stop_times}')
     print(f'The throughput of the intersection is {throughput}')
     print(f'The max queue of each approach is {max_queue}')
+    return stats
 
 
 if __name__ == '__main__':
@@ -100,12 +186,4 @@ if __name__ == '__main__':
     run_index = 32
     scenes = ['demand_high', 'demand_imbalance', 'demand_low']
 
-    delay = get_avg_delay(run_index, scenes)
-    stop_times = get_total_stops(run_index, scenes)
-    max_queue = get_max_queue(run_index, scenes)
-    throughput = get_throughput(run_index, scenes)
-
-    print(f'The average delay of the intersection is {delay}')
-    print(f'The number of total stop times of all vehicles is {stop_times}')
-    print(f'The max queue of each approach is {max_queue}')
-    print(f'The throughput of the intersection is {throughput}')
+    get_stats(run_index, scenes)
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 09:30
+# @File        : eval_service.py
+# @Description : 常驻的交叉口轨迹评价服务
+
+"""
+交叉口轨迹评价服务
+
+外部评价程序每评价一个轨迹文件都要启动一次进程并重新读取junction_info_dir下的所有交叉口文件。评价服务只读取一次交叉口文件，
+建立(交叉口, 路段id) -> (是否进口道, 长度, 限速)的索引，在当前进程或常驻的进程池中直接评价轨迹
+
+轨迹格式与handle_trajectory_record_event保存的一致: {时刻: {ptcId: trajectory}}，trajectory见public_data.create_trajectory，
+也可以是关键帧+增量编码的trajectory_store.JunctionTrajectory，评价指标及评分见score_engine
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Iterable, Union
+
+from simulation.lib.common import logger
+from simulation.lib.trajectory_store import JunctionTrajectory, is_encoded
+from simulation.evaluation.score_engine import TrajectoryColumns, score_columns
+
+FAILURE_RESULT = {'score': -1, 'detail': 'evaluation faliure'}
+
+
+@dataclass(frozen=True)
+class JunctionLink:
+    """交叉口文件中的路段"""
+    junction_id: str
+    link_id: str
+    is_entry: bool
+    length: float
+    speed: float
+
+    @property
+    def free_flow_time(self) -> float:
+        return self.length / self.speed if self.speed > 0 else 0.
+
+
+class JunctionIndex:
+    """交叉口文件的索引，交叉口id为文件名(不含扩展名)，与仿真中的交叉口id一致"""
+
+    def __init__(self, junctions: Dict[str, dict], signature: tuple = ()):
+        self.junctions = junctions
+        self.signature = signature
+        self.links: Dict[str, Dict[str, JunctionLink]] = {
+            junction_id: {link['id']: JunctionLink(junction_id, link['id'], bool(link['isEntry']),
+                                                   float(link['length']), float(link['speed']))
+                          for link in junction.get('link', [])}
+            for junction_id, junction in junctions.items()}
+
+    def __contains__(self, junction_id: str) -> bool:
+        return junction_id in self.junctions
+
+    def link(self, junction_id: str, link_id: str) -> Optional[JunctionLink]:
+        return self.links[junction_id].get(link_id)
+
+    def entry_links(self, junction_id: str) -> List[JunctionLink]:
+        return [link for link in self.links[junction_id].values() if link.is_entry]
+
+    @classmethod
+    def load(cls, junction_info_dir: str) -> 'JunctionIndex':
+        junctions = {}
+        for file in sorted(os.listdir(junction_info_dir)):
+            if file.endswith('.json'):
+                with open(os.path.join(junction_info_dir, file), 'r') as f:
+                    junctions[file[:-len('.json')]] = json.load(f)
+        return cls(junctions, dir_signature(junction_info_dir))
+
+
+def dir_signature(junction_info_dir: str) -> tuple:
+    """交叉口文件夹的签名，文件增删或修改后变化"""
+    signature = []
+    for file in sorted(os.listdir(junction_info_dir)):
+        if file.endswith('.json'):
+            stat = os.stat(os.path.join(junction_info_dir, file))
+            signature.append((file, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+_junction_indexes: Dict[str, JunctionIndex] = {}  # 交叉口文件夹绝对路径 -> 索引
+
+
+def get_junction_index(junction_info_dir: str) -> JunctionIndex:
+    """读取交叉口索引，同一文件夹中的文件未变化时只读取一次"""
+    key = os.path.abspath(junction_info_dir)
+    index = _junction_indexes.get(key)
+    if index is None or index.signature != dir_signature(junction_info_dir):
+        index = _junction_indexes[key] = JunctionIndex.load(junction_info_dir)
+    return index
+
+
+def trajectory_junction(veh_info: Union[Dict[str, dict], JunctionTrajectory], index: JunctionIndex, sub_name: str = '') -> Optional[str]:
+    """轨迹所属的交叉口，优先使用轨迹点中的junction，没有轨迹点时按sub_name(docker名_交叉口id)的后缀匹配"""
+    for trajectories in veh_info.values():
+        for trajectory in trajectories.values():
+            return trajectory['junction']
+    for junction_id in index.junctions:
+        if sub_name == junction_id or sub_name.endswith('_' + junction_id):
+            return junction_id
+    return None
+
+
+def score_trajectories(index: JunctionIndex, junction_id: str,
+                       veh_info: Union[Dict[str, dict], JunctionTrajectory]) -> dict:
+    """
+    评价单个交叉口的轨迹
+    Args:
+        index: 交叉口索引
+        junction_id: 交叉口id
+        veh_info: 轨迹 {时刻: {ptcId: trajectory}}或JunctionTrajectory
+
+    Returns: 评价结果，见score_engine.score_columns
+
+    """
+    if isinstance(veh_info, JunctionTrajectory):
+        columns = TrajectoryColumns.from_junction_trajectory(veh_info)
+    else:
+        columns = TrajectoryColumns.from_veh_info(veh_info)
+    return score_columns(index, junction_id, columns)
+
+
+def evaluate_file(index: JunctionIndex, traj_file_path: str) -> dict:
+    """评价轨迹文件，评价失败时返回FAILURE_RESULT"""
+    try:
+        with open(traj_file_path, 'r') as f:
+            veh_info = json.load(f)
+        if is_encoded(veh_info):
+            veh_info = JunctionTrajectory.from_dict(veh_info)
+        sub_name = os.path.splitext(os.path.basename(traj_file_path))[0]
+        junction_id = trajectory_junction(veh_info, index, sub_name)
+        return score_trajectories(index, junction_id, veh_info)
+    except Exception as e:
+        logger.warning(f'failed to evaluate trajectory {traj_file_path}: {e!r}')
+        return dict(FAILURE_RESULT)
+
+
+_worker_index: Optional[JunctionIndex] = None
+
+
+def _init_worker(junction_info_dir: str):
+    global _worker_index
+    _worker_index = get_junction_index(junction_info_dir)
+
+
+def _evaluate_in_worker(traj_file_path: str) -> dict:
+    return evaluate_file(_worker_index, traj_file_path)
+
+
+class EvalService:
+    """评价服务，交叉口索引只读取一次，进程数大于0时使用常驻进程池评价"""
+
+    def __init__(self, junction_info_dir: str, processes: int = 0):
+        """
+
+        Args:
+            junction_info_dir: 交叉口文件夹
+            processes: 常驻进程池的进程数，为0时在当前进程中评价
+        """
+        self.junction_info_dir = junction_info_dir
+        self.processes = processes
+        self.index = get_junction_index(junction_info_dir)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _refresh(self):
+        """交叉口文件变化时重新读取，进程池随之重建"""
+        index = get_junction_index(self.junction_info_dir)
+        if index is not self.index:
+            self.index = index
+            self.close()
+
+    def evaluate_files(self, traj_file_paths: Iterable[str]) -> List[Tuple[str, dict]]:
+        """
+        评价多个轨迹文件
+        Returns: [(轨迹文件路径, 评价结果)]
+
+        """
+        self._refresh()
+        traj_file_paths = list(traj_file_paths)
+        if self.processes <= 0 or len(traj_file_paths) <= 1:
+            return [(fp, evaluate_file(self.index, fp)) for fp in traj_file_paths]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                             initargs=(self.junction_info_dir,))
+        return list(zip(traj_file_paths, self._pool.map(_evaluate_in_worker, traj_file_paths)))
+
+    def evaluate(self, junction_id: str, veh_info: Union[Dict[str, dict], JunctionTrajectory]) -> dict:
+        """在当前进程中评价内存中的轨迹，评价失败时返回FAILURE_RESULT"""
+        self._refresh()
+        try:
+            return score_trajectories(self.index, junction_id, veh_info)
+        except Exception as e:
+            logger.warning(f'failed to evaluate trajectory of junction {junction_id}: {e!r}')
+            return dict(FAILURE_RESULT)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_services: Dict[Tuple[str, int], EvalService] = {}
+
+
+def get_eval_service(junction_info_dir: str, processes: int = 0) -> EvalService:
+    """同一交叉口文件夹和进程数的评价服务在多次评价间复用"""
+    key = (os.path.abspath(junction_info_dir), processes)
+    service = _services.get(key)
+    if service is None:
+        service = _services[key] = EvalService(junction_info_dir, processes)
+    return service
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 21:30
+# @File        : queue_geometry.py
+# @Description : e2检测器与交叉口进口道的对应关系及排队长度计算
+
+"""
+e2检测器几何信息
+
+从路网和检测器文件中为每个e2(laneAreaDetector)检测器计算:
+    junction  检测器下游第一个信控交叉口
+    approach  检测器所在的进口道方向(E/W/N/S)，按进口道起点相对交叉口的方位确定
+    offset    检测器下游端至交叉口停止线的距离 (m)，沿车道直行方向的下游路段累加
+
+检测器的实际排队长度 = 检测器记录的最大排队长度 + offset，各进口道取所有检测器中的最大值。
+计算结果以路网文件和检测器文件内容的哈希值为键缓存到磁盘，同一组文件只需处理一次
+"""
+
+import hashlib
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import sumolib
+
+from simulation.lib.common import logger
+
+APPROACHES = ('E', 'W', 'N', 'S')
+MAX_DOWNSTREAM_EDGES = 100  # 查找下游信控交叉口时最多经过的路段数
+CACHE_PREFIX = 'detector_geometry_'
+
+
+def _approach_of(junction: sumolib.net.node.Node, edge: sumolib.net.edge.Edge) -> str:
+    """进口道方向，即进口道起点相对交叉口的方位"""
+    junction_x, junction_y = junction.getCoord()
+    start_x, start_y = edge.getShape()[0]
+    dx, dy = start_x - junction_x, start_y - junction_y
+    if abs(dx) >= abs(dy):
+        return 'E' if dx > 0 else 'W'
+    return 'N' if dy > 0 else 'S'
+
+
+def _straight_successor(edge: sumolib.net.edge.Edge) -> Optional[sumolib.net.edge.Edge]:
+    """路段下游的直行路段，没有直行连接时取第一个下游路段"""
+    successors = edge.getOutgoing()
+    for successor, connections in successors.items():
+        if any(conn.getDirection() == 's' for conn in connections):
+            return successor
+    return next(iter(successors), None)
+
+
+class DetectorGeometry:
+    """e2检测器的几何信息，按检测器顺序存储为数组"""
+
+    def __init__(self, detector_ids: Sequence[str], junction_ids: Sequence[str], approaches: Sequence[str],
+                 offsets: Sequence[float], source_hash: str = ''):
+        self.detector_ids = np.asarray(detector_ids, dtype=str)
+        self.junction_ids = np.asarray(junction_ids, dtype=str)
+        self.approaches = np.asarray(approaches, dtype=str)
+        self.offsets = np.asarray(offsets, dtype=float)
+        self.source_hash = source_hash
+        self.index: Dict[str, int] = {detector_id: i for i, detector_id in enumerate(self.detector_ids.tolist())}
+        # (交叉口, 进口道)分组，用于按组取最大值
+        groups = [f'{junction_id}/{approach}' for junction_id, approach in
+                  zip(self.junction_ids.tolist(), self.approaches.tolist())]
+        self.group_names, self.group_codes = np.unique(np.asarray(groups, dtype=str), return_inverse=True)
+
+    def __len__(self):
+        return len(self.detector_ids)
+
+    @property
+    def junctions(self) -> List[str]:
+        return sorted(set(self.junction_ids.tolist()))
+
+    def max_queue(self, detector_ids: Sequence[str], jam_lengths: Sequence[float]) -> Dict[str, Dict[str, float]]:
+        """
+        各交叉口各进口道的最大排队长度
+        Args:
+            detector_ids: e2检测器输出中的检测器id，不在几何信息中的检测器被忽略
+            jam_lengths: 对应的最大排队长度maxJamLengthInMeters
+
+        Returns: 交叉口id -> 进口道 -> 排队长度 (m)，没有排队的进口道为0
+
+        """
+        positions = np.fromiter((self.index.get(detector_id, -1) for detector_id in detector_ids), dtype=np.int64,
+                                count=len(detector_ids))
+        jam_lengths = np.asarray(jam_lengths, dtype=float)
+        valid = (positions >= 0) & (jam_lengths > 0)
+        positions = positions[valid]
+        group_max = np.zeros(len(self.group_names))
+        np.maximum.at(group_max, self.group_codes[positions], jam_lengths[valid] + self.offsets[positions])
+
+        res: Dict[str, Dict[str, float]] = {}
+        for group_name, length in zip(self.group_names.tolist(), group_max.tolist()):
+            junction_id, approach = group_name.rsplit('/', 1)
+            res.setdefault(junction_id, {})[approach] = length
+        return res
+
+    def save(self, fp: str):
+        with open(fp, 'wb') as f:
+            np.savez(f, detector_ids=self.detector_ids, junction_ids=self.junction_ids,
+                     approaches=self.approaches, offsets=self.offsets, source_hash=np.asarray(self.source_hash))
+
+    @classmethod
+    def load(cls, fp: str) -> 'DetectorGeometry':
+        with np.load(fp, allow_pickle=False) as data:
+            return cls(data['detector_ids'], data['junction_ids'], data['approaches'], data['offsets'],
+                       str(data['source_hash']))
+
+
+def source_hash(network_fp: str, detector_fp: str) -> str:
+    digest = hashlib.sha1()
+    for fp in (network_fp, detector_fp):
+        with open(fp, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_detector_geometry(network_fp: str, detector_fp: str, net: Optional[sumolib.net.Net] = None,
+                            file_hash: str = '') -> DetectorGeometry:
+    """
+    从路网和检测器文件计算e2检测器的几何信息
+    Args:
+        network_fp: 路网文件路径
+        detector_fp: 检测器文件路径
+        net: 已读取的路网，未提供时读取network_fp
+        file_hash: 记录在几何信息中的文件哈希值
+
+    Returns: 检测器几何信息，下游没有信控交叉口的检测器被忽略
+
+    """
+    if net is None:
+        net = sumolib.net.readNet(network_fp)
+    detector_ids, junction_ids, approaches, offsets = [], [], [], []
+    for detector in sumolib.xml.parse(detector_fp, 'laneAreaDetector'):
+        lane = net.getLane(detector.lane)
+        # 检测器区间为[pos, pos + length]，下游端至车道末端的距离
+        offset = lane.getLength() - float(detector.pos) - float(detector.length)
+        edge = lane.getEdge()
+        for _ in range(MAX_DOWNSTREAM_EDGES):
+            if edge.getToNode().getType().startswith('traffic_light'):
+                break
+            edge = _straight_successor(edge)
+            if edge is None:
+                break
+            offset += edge.getLength()
+        else:
+            edge = None
+        if edge is None:
+            logger.warning(f'no signalized junction found downstream of detector {detector.id}')
+            continue
+        junction = edge.getToNode()
+        detector_ids.append(detector.id)
+        junction_ids.append(junction.getID())
+        approaches.append(_approach_of(junction, edge))
+        offsets.append(max(offset, 0.))
+    return DetectorGeometry(detector_ids, junction_ids, approaches, offsets, file_hash)
+
+
+def load_detector_geometry(network_fp: str, detector_fp: str, cache_dir: Optional[str] = None,
+                           net: Optional[sumolib.net.Net] = None) -> DetectorGeometry:
+    """
+    读取e2检测器的几何信息，优先使用磁盘缓存
+    Args:
+        network_fp: 路网文件路径
+        detector_fp: 检测器文件路径
+        cache_dir: 缓存文件夹，未提供时使用检测器文件所在文件夹
+        net: 已读取的路网，缓存失效时使用
+
+    Returns: 检测器几何信息
+
+    """
+    file_hash = source_hash(network_fp, detector_fp)
+    if cache_dir is None:
+        cache_dir = os.path.dirname(os.path.abspath(detector_fp))
+    cache_fp = os.path.join(cache_dir, f'{CACHE_PREFIX}{file_hash[:16]}.npz')
+    if os.path.exists(cache_fp):
+        try:
+            geometry = DetectorGeometry.load(cache_fp)
+            if geometry.source_hash == file_hash:
+                return geometry
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f'failed to load detector geometry cache {cache_fp}: {e}')
+
+    geometry = build_detector_geometry(network_fp, detector_fp, net, file_hash)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        geometry.save(cache_fp)
+    except OSError as e:
+        logger.warning(f'failed to write detector geometry cache {cache_fp}: {e}')
+    return geometry
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 14:00
+# @File        : result_registry.py
+# @Description : 评测结果的内存登记
+
+"""
+评测结果登记
+
+评价得到的各交叉口结果直接登记在内存中，场景(评测任务)评分与整批测试的综合评分随结果登记增量更新，
+不再在每个场景结束时重新列出并读取评价结果文件夹中的所有文件。每个场景的汇总结果在登记时写入一次磁盘
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+
+def is_eval_failure(result: dict) -> bool:
+    return result['score'] == -1
+
+
+class TaskResults:
+    """单个场景中各交叉口的评价结果，评分之和与失败次数随结果登记增量更新"""
+
+    def __init__(self):
+        self.results: Dict[str, dict] = {}  # 子任务名(docker名_交叉口id) -> 评价结果
+        self.score_sum = 0.
+        self.error_count = 0
+
+    def _accumulate(self, result: dict, sign: int):
+        if is_eval_failure(result):
+            self.error_count += sign
+        else:
+            self.score_sum += sign * result['score']
+
+    def add(self, sub_name: str, result: dict):
+        """登记评价结果，同一子任务重复登记时替换原结果"""
+        previous = self.results.pop(sub_name, None)
+        if previous is not None:
+            self._accumulate(previous, -1)
+        self.results[sub_name] = result
+        self._accumulate(result, 1)
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def mean_score(self) -> float:
+        """所有子任务的平均评分，评价失败的子任务计0分"""
+        return self.score_sum / len(self.results) if self.results else 0.
+
+    def detail_info(self) -> list:
+        return [result['detail'] if is_eval_failure(result) else result for result in self.results.values()]
+
+
+class EvalResultRegistry:
+    """一批测试中各场景的评价结果及汇总"""
+
+    def __init__(self):
+        self.tasks: Dict[str, TaskResults] = {}
+        self.summaries: Dict[str, dict] = {}  # 场景名 -> 场景汇总结果
+        self._score_sum = 0.
+        self._abnormal_count = 0
+
+    def task(self, task_name: str) -> TaskResults:
+        task = self.tasks.get(task_name)
+        if task is None:
+            task = self.tasks[task_name] = TaskResults()
+        return task
+
+    def add(self, task_name: str, sub_name: str, result: dict):
+        """登记场景中单个交叉口的评价结果"""
+        self.task(task_name).add(sub_name, result)
+
+    def _accumulate(self, summary: dict, sign: int):
+        self._score_sum += sign * summary['score']
+        if summary['score'] == 0:
+            self._abnormal_count += sign
+
+    def record(self, task_name: str, summary: dict, output_dir: Optional[str] = None, docker_name: str = 'test'):
+        """
+        登记场景汇总结果
+        Args:
+            task_name: 场景名
+            summary: 场景汇总结果，见handle_score_report_event
+            output_dir: 提供时将汇总结果写入output_dir/docker_name/docker_name_task_name.json
+            docker_name: docker名
+        """
+        previous = self.summaries.pop(task_name, None)
+        if previous is not None:
+            self._accumulate(previous, -1)
+        self.summaries[task_name] = summary
+        self._accumulate(summary, 1)
+        if output_dir is not None:
+            docker_output_dir = os.path.join(output_dir, docker_name)
+            os.makedirs(docker_output_dir, exist_ok=True)
+            with open(os.path.join(docker_output_dir, f'{docker_name}_{task_name}.json'), 'w') as f:
+                json.dump(summary, f, indent=2)
+
+    def __len__(self):
+        return len(self.summaries)
+
+    @property
+    def abnormal_count(self) -> int:
+        """评分为0的场景数"""
+        return self._abnormal_count
+
+    def batch_result(self, docker_name: str) -> dict:
+        """整批测试的综合评分，存在异常场景时为0"""
+        details: List[dict] = [summary['detail'] for summary in self.summaries.values()]
+        return {
+            'score': 0 if self._abnormal_count or not self.summaries else self._score_sum / len(self.summaries),
+            'name': docker_name,
+            'abnormal': self._abnormal_count,
+            'detail': details
+        }
+
+    def clear(self):
+        self.tasks.clear()
+        self.summaries.clear()
+        self._score_sum = 0.
+        self._abnormal_count = 0
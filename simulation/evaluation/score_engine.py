@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 11:20
+# @File        : score_engine.py
+# @Description : 基于列式轨迹的向量化评分
+
+"""
+轨迹评分引擎
+
+轨迹按列存储为TrajectoryColumns(时刻、车辆编码、路段编码、速度数组)，评价指标全部由NumPy数组运算得到，无需逐车逐时刻循环
+
+评价指标(只统计交叉口进口道上的轨迹点):
+    delay       车辆在进口道上的行程时间与按限速行驶的自由流时间之差的平均值 (s)
+    stops       车辆在进口道上由行驶变为停车的平均次数
+    throughput  由进口道驶入交叉口或出口道的车辆数
+评分 = 100 * (DELAY_WEIGHT * 自由流时间 / 实际行程时间 + STOP_WEIGHT / (1 + stops))
+
+外部评价程序(bin/eval.exe)的计算方式未公开，上述公式并非由其得到，compare_with_external确认两者对同一批轨迹的评分一致之前，
+本模块的评分不能与外部评价程序的评分相互比较，评价结果的detail中以'engine'标记评分来源。compare_with_external
+可作为命令行使用: python -m simulation.evaluation.score_engine <轨迹文件夹> <评价结果文件夹>
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+SPEED_RESOLUTION = 0.02  # 轨迹中速度的单位 (m/s)
+STOP_SPEED = 0.1  # 低于该速度视为停车 (m/s)
+DELAY_WEIGHT = 0.6
+STOP_WEIGHT = 0.4
+ENGINE_NAME = 'python'  # 评价结果中的评分来源标记
+
+
+class TrajectoryColumns:
+    """单个交叉口的列式轨迹，每个轨迹点对应各数组中的一个元素"""
+
+    def __init__(self, frame_times: np.ndarray, times: np.ndarray, vehicles: np.ndarray, links: np.ndarray,
+                 speeds: np.ndarray, vehicle_ids: List[str], link_ids: List[str], junction_id: Optional[str] = None):
+        """
+
+        Args:
+            frame_times: 所有记录时刻(包括没有轨迹点的时刻)，升序
+            times: 轨迹点时刻 (s)
+            vehicles: 轨迹点的车辆编码，即vehicle_ids中的序号
+            links: 轨迹点的路段编码，即link_ids中的序号
+            speeds: 轨迹点速度 (m/s)
+            vehicle_ids: 车辆编码 -> ptcId
+            link_ids: 路段编码 -> 路段id，交叉口内部为空字符串
+            junction_id: 轨迹点中记录的交叉口id
+        """
+        self.frame_times = frame_times
+        self.times = times
+        self.vehicles = vehicles
+        self.links = links
+        self.speeds = speeds
+        self.vehicle_ids = vehicle_ids
+        self.link_ids = link_ids
+        self.junction_id = junction_id
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def interval(self) -> float:
+        """记录间隔，取相邻记录时刻之差的最小值"""
+        if len(self.frame_times) < 2:
+            return 1.
+        return float(np.diff(self.frame_times).min())
+
+    @classmethod
+    def from_junction_trajectory(cls, trajectory) -> 'TrajectoryColumns':
+        """
+        由关键帧+增量编码的trajectory_store.JunctionTrajectory直接生成，不逐帧展开轨迹
+        车辆的路段与速度在两次保存之间不变，按保存的次数而非轨迹点数循环，轨迹点由np.repeat按各段持续的帧数展开
+        """
+        vehicle_codes: Dict[str, int] = {}
+        link_codes: Dict[str, int] = {}
+        run_starts, run_lengths, vehicles, links, speeds = [], [], [], [], []
+        junction_id = None
+        for ptc_id, spans, changes in trajectory.iter_tracks():
+            vehicle_code = vehicle_codes.setdefault(ptc_id, len(vehicle_codes))
+            state = {}
+            span_iter = iter(spans)
+            span_end = -1
+            for i, (frame, fields) in enumerate(changes):
+                if frame > span_end:  # 关键帧，进入下一个连续出现的时段
+                    span_end = next(span_iter)[1]
+                    state = fields
+                    if junction_id is None:
+                        junction_id = fields['junction']
+                else:
+                    state = {**state, **fields}
+                next_frame = changes[i + 1][0] if i + 1 < len(changes) else span_end + 1
+                run_starts.append(frame)
+                run_lengths.append(min(next_frame, span_end + 1) - frame)
+                vehicles.append(vehicle_code)
+                links.append(link_codes.setdefault(state['link'], len(link_codes)))
+                speeds.append(state['speed'])
+
+        frame_times = np.fromiter(map(float, trajectory.time_keys), dtype=float, count=len(trajectory.time_keys))
+        run_lengths = np.asarray(run_lengths, dtype=np.int64)
+        run_offsets = np.cumsum(run_lengths) - run_lengths
+        frames = np.arange(int(run_lengths.sum())) - np.repeat(run_offsets - np.asarray(run_starts, dtype=np.int64),
+                                                              run_lengths)
+        return cls(frame_times=np.sort(frame_times),
+                   times=frame_times[frames],
+                   vehicles=np.repeat(np.asarray(vehicles, dtype=np.int64), run_lengths),
+                   links=np.repeat(np.asarray(links, dtype=np.int64), run_lengths),
+                   speeds=np.repeat(np.asarray(speeds, dtype=float), run_lengths) * SPEED_RESOLUTION,
+                   vehicle_ids=list(vehicle_codes),
+                   link_ids=list(link_codes),
+                   junction_id=junction_id)
+
+    @classmethod
+    def from_veh_info(cls, veh_info: Dict[str, dict]) -> 'TrajectoryColumns':
+        """由{时刻: {ptcId: trajectory}}格式的轨迹生成，trajectory见public_data.create_trajectory"""
+        vehicle_codes: Dict[str, int] = {}
+        link_codes: Dict[str, int] = {}
+        times, vehicles, links, speeds = [], [], [], []
+        junction_id = None
+        for time_stamp, trajectories in veh_info.items():
+            t = float(time_stamp)
+            for ptc_id, trajectory in trajectories.items():
+                times.append(t)
+                vehicles.append(vehicle_codes.setdefault(ptc_id, len(vehicle_codes)))
+                links.append(link_codes.setdefault(trajectory['link'], len(link_codes)))
+                speeds.append(trajectory['speed'])
+                if junction_id is None:
+                    junction_id = trajectory['junction']
+        return cls(frame_times=np.sort(np.fromiter(map(float, veh_info), dtype=float, count=len(veh_info))),
+                   times=np.asarray(times, dtype=float),
+                   vehicles=np.asarray(vehicles, dtype=np.int64),
+                   links=np.asarray(links, dtype=np.int64),
+                   speeds=np.asarray(speeds, dtype=float) * SPEED_RESOLUTION,
+                   vehicle_ids=list(vehicle_codes),
+                   link_ids=list(link_codes),
+                   junction_id=junction_id)
+
+
+def score_of(delay_index: float, stops: float) -> float:
+    return round(100 * (DELAY_WEIGHT * delay_index + STOP_WEIGHT / (1 + stops)), 2)
+
+
+def score_columns(index, junction_id: str, columns: TrajectoryColumns) -> dict:
+    """
+    评价单个交叉口的列式轨迹
+    Args:
+        index: 交叉口索引eval_service.JunctionIndex
+        junction_id: 交叉口id
+        columns: 列式轨迹
+
+    Returns: 评价结果 {'score': 评分, 'detail': {'delay', 'stops', 'throughput', 'vehicles', 'engine'}}
+
+    """
+    if junction_id not in index:
+        raise KeyError(f'junction {junction_id} not found in junction info')
+    links = index.links[junction_id]
+    junction_links = [links.get(link_id) for link_id in columns.link_ids]
+    link_is_entry = np.array([link is not None and link.is_entry for link in junction_links], dtype=bool)
+    link_free_flow = np.array([link.free_flow_time if link is not None and link.is_entry else 0.
+                               for link in junction_links], dtype=float)
+    vehicle_count = len(columns.vehicle_ids)
+    link_count = max(len(columns.link_ids), 1)
+
+    # 按车辆、时刻排序
+    order = np.lexsort((columns.times, columns.vehicles))
+    vehicles = columns.vehicles[order]
+    links_code = columns.links[order]
+    times = columns.times[order]
+    on_entry = link_is_entry[links_code]
+    entry_vehicles = vehicles[on_entry]
+
+    # 首次出现在进口道之后出现在其他位置的车辆视为驶离进口道
+    first_entry = np.full(vehicle_count, np.inf)
+    np.minimum.at(first_entry, entry_vehicles, times[on_entry])
+    observed = np.isfinite(first_entry)
+    left = ~on_entry & (times > first_entry[vehicles])
+    passed = np.zeros(vehicle_count, dtype=bool)
+    passed[vehicles[left]] = True
+
+    travel_time = np.bincount(entry_vehicles, minlength=vehicle_count) * columns.interval
+
+    # 进口道轨迹点由行驶变为停车的次数，每辆车第一个进口道轨迹点停车也计一次
+    stopped = columns.speeds[order][on_entry] < STOP_SPEED
+    prev_stopped = np.concatenate(([False], stopped[:-1]))
+    prev_stopped[np.concatenate(([True], entry_vehicles[1:] != entry_vehicles[:-1]))] = False
+    stops = np.bincount(entry_vehicles[stopped & ~prev_stopped], minlength=vehicle_count)
+
+    # 自由流时间按车辆经过的不同进口道累加
+    pairs = np.unique(entry_vehicles * link_count + links_code[on_entry])
+    free_flow_time = np.bincount(pairs // link_count, weights=link_free_flow[pairs % link_count],
+                                 minlength=vehicle_count)
+
+    passed_count = int(passed.sum())
+    total_travel_time = float(travel_time[passed].sum())
+    total_free_flow_time = float(free_flow_time[passed].sum())
+    total_delay = float(np.maximum(travel_time - free_flow_time, 0.)[passed].sum())
+    avg_delay = total_delay / passed_count if passed_count else 0.
+    avg_stops = float(stops[passed].sum()) / passed_count if passed_count else 0.
+    delay_index = min(total_free_flow_time / total_travel_time, 1.) if total_travel_time > 0 else 1.
+    return {
+        'score': score_of(delay_index, avg_stops),
+        'detail': {'delay': round(avg_delay, 2), 'stops': round(avg_stops, 3), 'throughput': passed_count,
+                   'vehicles': int(observed.sum()), 'engine': ENGINE_NAME}
+    }
+
+
+class ParityRecord(NamedTuple):
+    """同一轨迹文件本模块与外部评价程序的评分"""
+    file: str
+    score: float
+    external_score: float
+
+    @property
+    def difference(self) -> float:
+        return self.score - self.external_score
+
+
+def compare_with_external(traj_dir: str, eval_dir: str,
+                          junction_info_dir: str = '../data/junction') -> List[ParityRecord]:
+    """
+    比较本模块与外部评价程序的评分
+    Args:
+        traj_dir: 轨迹文件夹，即traj_record_dir/docker_name
+        eval_dir: 外部评价程序输出的评价结果文件夹，与轨迹文件同名
+        junction_info_dir: 交叉口文件夹
+
+    Returns: 两者都评价成功的轨迹文件的评分，按文件名排序
+
+    """
+    from simulation.evaluation.eval_service import get_junction_index, evaluate_file
+
+    index = get_junction_index(junction_info_dir)
+    records = []
+    for file in sorted(os.listdir(traj_dir)):
+        eval_fp = os.path.join(eval_dir, file)
+        if not os.path.exists(eval_fp):
+            continue
+        with open(eval_fp, 'r') as f:
+            external_score = float(json.load(f)['score'])
+        score = evaluate_file(index, os.path.join(traj_dir, file))['score']
+        if external_score == -1 or score == -1:
+            continue
+        records.append(ParityRecord(file, score, external_score))
+    return records
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='compare scores with the external evaluation program')
+    parser.add_argument('traj_dir', help='trajectory directory of one docker')
+    parser.add_argument('eval_dir', help='evaluation results of the external program for the same trajectories')
+    parser.add_argument('--junction-info-dir', default='../data/junction')
+    parser.add_argument('--tolerance', type=float, default=0.01, help='maximum allowed score difference')
+    args = parser.parse_args(argv)
+
+    records = compare_with_external(args.traj_dir, args.eval_dir, args.junction_info_dir)
+    for record in records:
+        print(f'{record.file}\t{record.score:.2f}\t{record.external_score:.2f}\t{record.difference:+.2f}')
+    mismatched = [record for record in records if abs(record.difference) > args.tolerance]
+    print(f'{len(records)} files compared, {len(mismatched)} differ by more than {args.tolerance}')
+    return 1 if mismatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
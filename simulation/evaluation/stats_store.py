@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 20:50
+# @File        : stats_store.py
+# @Description : 跨测评运行的统计指标存储
+
+"""
+统计指标存储
+
+每个(运行次数, 场景, 算法)的statistics/tripinfo/e1/e2输出文件只解析一次，结果连同输出文件的哈希值写入outputFilePath下
+的SQLite数据库。再次读取时输出文件未变化则直接使用数据库中的结果，可按算法、场景、运行次数查询和比较各项指标而无需重新读取xml。
+outputFilePath下以运行次数命名的目录存放每次运行的输出文件，下一次运行的编号由next_run_index按已有的运行目录确定，
+数据库文件等其他文件不影响编号
+
+表结构(算法名称为空字符串表示未指定算法):
+    scene_stats(run_index, scene_name, algorithm, file_hash, delay, stop_times, throughput, ingested_at)
+    max_queue(run_index, scene_name, algorithm, approach, length)
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple, Iterable, Any
+
+from simulation.evaluation import data_process
+
+STATS_DB_NAME = 'stats.db'
+SCHEMA_VERSION = 2  # 表结构变化时递增，旧版本的数据库只是输出文件解析结果的缓存，直接重建
+OUTPUT_SUFFIXES = ('_statistics.xml', '_tripinfo.xml', '_e1detectorinfo.xml', '_e2detectorinfo.xml')
+SCALAR_METRICS = ('delay', 'stop_times', 'throughput')
+METRICS = SCALAR_METRICS + ('max_queue',)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scene_stats (
+    run_index INTEGER NOT NULL,
+    scene_name TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    delay REAL,
+    stop_times INTEGER,
+    throughput INTEGER,
+    ingested_at REAL,
+    PRIMARY KEY (run_index, scene_name, algorithm)
+);
+CREATE INDEX IF NOT EXISTS scene_stats_algorithm ON scene_stats (algorithm, scene_name);
+CREATE TABLE IF NOT EXISTS max_queue (
+    run_index INTEGER NOT NULL,
+    scene_name TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    approach TEXT NOT NULL,
+    length REAL,
+    PRIMARY KEY (run_index, scene_name, algorithm, approach)
+);
+"""
+
+
+def next_run_index(output_dir: str) -> int:
+    """下一次运行的编号，只统计output_dir下以数字命名的运行目录"""
+    run_indexes = [int(name) for name in os.listdir(output_dir)
+                   if name.isdigit() and os.path.isdir(os.path.join(output_dir, name))]
+    return max(run_indexes, default=0) + 1
+
+
+def output_file_hash(index, scene_name: str, chunk_size: int = 1 << 20, geometry=None) -> str:
+    """场景所有输出文件内容的哈希值，提供e2检测器几何信息时一并计入其来源文件的哈希值"""
+    digest = hashlib.sha1()
+    if geometry is not None:
+        digest.update(geometry.source_hash.encode())
+    for suffix in OUTPUT_SUFFIXES:
+        with open(data_process._output_filepath(index, scene_name, suffix), 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StatsStore:
+    """基于SQLite的统计指标存储"""
+
+    def __init__(self, db_fp: str):
+        """
+
+        Args:
+            db_fp: 数据库文件路径，一般为outputFilePath下的STATS_DB_NAME
+        """
+        self.db_fp = db_fp
+        self._conn = sqlite3.connect(db_fp)
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            with self._conn:
+                self._conn.executescript('DROP TABLE IF EXISTS scene_stats; DROP TABLE IF EXISTS max_queue;')
+                self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self._conn.executescript(_SCHEMA)
+
+    def _stored_hash(self, index, scene_name: str, algorithm: str) -> Optional[str]:
+        row = self._conn.execute('SELECT file_hash FROM scene_stats WHERE run_index = ? AND scene_name = ? '
+                                 'AND algorithm = ?', (int(index), scene_name, algorithm)).fetchone()
+        return None if row is None else row[0]
+
+    def _save(self, index, scene_name: str, algorithm: str, file_hash: str, stats: dict):
+        key = (int(index), scene_name, algorithm)
+        with self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO scene_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                               key + (file_hash, stats['delay'], stats['stop_times'], stats['throughput'],
+                                      time.time()))
+            self._conn.execute('DELETE FROM max_queue WHERE run_index = ? AND scene_name = ? AND algorithm = ?', key)
+            self._conn.executemany('INSERT INTO max_queue VALUES (?, ?, ?, ?, ?)',
+                                   [key + (approach, length) for approach, length in stats['max_queue'].items()])
+
+    def ingest(self, index, scene_name_list: list, algorithm: Optional[str] = None,
+               processes: Optional[int] = None, geometry=None) -> Dict[str, dict]:
+        """
+        读取场景的统计指标，输出文件与上次写入时一致的场景直接使用存储的结果，其余场景解析输出文件后写入存储
+        Args:
+            index: 运行次数
+            scene_name_list: 场景名称
+            algorithm: 该次运行测评的算法名称，同一运行次数中不同算法的指标分别存储，为None时记为未指定算法
+            processes: 解析输出文件的进程数，见data_process.collect_stats
+            geometry: e2检测器几何信息，见data_process.parse_e2detector
+
+        Returns: 场景名称 -> 指标
+
+        """
+        algorithm = algorithm or ''
+        file_hashes = {scene_name: output_file_hash(index, scene_name, geometry=geometry)
+                       for scene_name in scene_name_list}
+        changed_scenes = [scene_name for scene_name in scene_name_list
+                          if self._stored_hash(index, scene_name, algorithm) != file_hashes[scene_name]]
+        parsed_stats = {}
+        if changed_scenes:
+            parsed_stats = data_process.collect_stats(index, changed_scenes, processes, geometry)
+        for scene_name, stats in parsed_stats.items():
+            self._save(index, scene_name, algorithm, file_hashes[scene_name], stats)
+        return {scene_name: parsed_stats[scene_name] if scene_name in parsed_stats
+                else self.get(index, scene_name, algorithm) for scene_name in scene_name_list}
+
+    def _max_queue(self, index, scene_name: str, algorithm: str) -> Dict[str, float]:
+        rows = self._conn.execute('SELECT approach, length FROM max_queue WHERE run_index = ? AND scene_name = ? '
+                                  'AND algorithm = ?', (int(index), scene_name, algorithm))
+        return dict(rows.fetchall())
+
+    def get(self, index, scene_name: str, algorithm: Optional[str] = None) -> Optional[dict]:
+        """单个场景某一算法存储的指标，algorithm为None时为未指定算法的指标，未存储时返回None"""
+        algorithm = algorithm or ''
+        row = self._conn.execute('SELECT delay, stop_times, throughput FROM scene_stats '
+                                 'WHERE run_index = ? AND scene_name = ? AND algorithm = ?',
+                                 (int(index), scene_name, algorithm)).fetchone()
+        if row is None:
+            return None
+        return {'delay': row[0], 'stop_times': row[1], 'max_queue': self._max_queue(index, scene_name, algorithm),
+                'throughput': row[2]}
+
+    def query(self, metric: str, algorithms: Optional[Iterable[str]] = None,
+              scene_names: Optional[Iterable[str]] = None,
+              run_indexes: Optional[Iterable[int]] = None) -> List[Tuple[Optional[str], int, str, Any]]:
+        """
+        查询指标
+        Args:
+            metric: delay, stop_times, throughput或max_queue
+            algorithms: 筛选的算法名称，None表示不筛选，下同
+            scene_names: 筛选的场景名称
+            run_indexes: 筛选的运行次数
+
+        Returns: [(算法名称, 运行次数, 场景名称, 指标值)]，按运行次数、场景名称和算法名称排序，未指定算法时算法名称为None，
+                 max_queue的指标值为各进口道的排队长度
+
+        """
+        if metric not in METRICS:
+            raise ValueError(f'unknown metric {metric}, should be one of {METRICS}')
+        conditions, params = [], []
+        for column, values in (('algorithm', algorithms), ('scene_name', scene_names), ('run_index', run_indexes)):
+            if values is not None:
+                values = list(values)
+                conditions.append(f's.{column} IN ({", ".join("?" * len(values))})')
+                params.extend(values)
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+
+        if metric in SCALAR_METRICS:
+            sql = f'SELECT s.algorithm, s.run_index, s.scene_name, s.{metric} FROM scene_stats s{where} ' \
+                  f'ORDER BY s.run_index, s.scene_name, s.algorithm'
+            return [(algorithm or None,) + tuple(row) for algorithm, *row in self._conn.execute(sql, params)]
+
+        sql = f'SELECT s.algorithm, s.run_index, s.scene_name, q.approach, q.length FROM scene_stats s ' \
+              f'JOIN max_queue q ON q.run_index = s.run_index AND q.scene_name = s.scene_name ' \
+              f'AND q.algorithm = s.algorithm{where} ORDER BY s.run_index, s.scene_name, s.algorithm'
+        res: Dict[Tuple[Optional[str], int, str], Dict[str, float]] = {}
+        for algorithm, run_index, scene_name, approach, length in self._conn.execute(sql, params):
+            res.setdefault((algorithm or None, run_index, scene_name), {})[approach] = length
+        return [key + (value,) for key, value in res.items()]
+
+    def compare(self, metric: str, scene_names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        比较各算法的指标，同一算法同一场景有多次运行时取最近一次
+        Returns: 算法名称 -> 场景名称 -> 指标值
+
+        """
+        res: Dict[str, Dict[str, Any]] = {}
+        for algorithm, _, scene_name, value in self.query(metric, scene_names=scene_names):
+            if algorithm is not None:
+                res.setdefault(algorithm, {})[scene_name] = value  # 按运行次数升序，后写入的覆盖先写入的
+        return res
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
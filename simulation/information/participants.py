@@ -5,17 +5,18 @@
 
 import string
 from dataclasses import dataclass
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, ValuesView
 
 import traci
 import traci.constants as tc
-import sumolib
 
 from simulation.lib.public_data import (create_SafetyMessage, create_RoadsideSafetyMessage, create_ParticipantData,
                                         create_NodeReferenceID,
-                                        create_trajectory, SimStatus, veh_name_from_flow_decimal,
+                                        create_trajectory, SimStatus,
                                         signalized_intersection_name_decimal)
 from simulation.lib.public_conn_data import DataMsg, PubMsgLabel
+from simulation.lib.net_cache import CompiledNet
+from simulation.lib.veh_registry import vehicle_ids
 
 
 # Jia Zuoning
@@ -226,8 +227,9 @@ def get_vehicle_class(veh_class: str):
     return class_mapping.get(veh_class, 'unknownVehicleClass')
 
 
-@dataclass(frozen=True)
+@dataclass
 class VehInfo:
+    """交叉口范围内的车辆信息，车辆在范围内时由JunctionVehContainer原地更新"""
     ptcId: int
     lat: float
     lon: float
@@ -256,13 +258,16 @@ class JunctionVehContainer:
 
     def __init__(self, junction_id: str):
         self.junction_id = junction_id
-        self.central_x, self.central_y = self._net.getNode(junction_id).getCoord()
-        self.central_lon, self.central_lat = self._net.convertXY2LonLat(self.central_x, self.central_y)
-        self.vehs_info: List[VehInfo] = []
+        junction = self._net.get_junction(junction_id)
+        if junction.lon is None:
+            raise RuntimeError('network does not provide geo-projection')
+        self.central_x, self.central_y = junction.x, junction.y
+        self.central_lon, self.central_lat = junction.lon, junction.lat
+        self.vehicles: Dict[str, VehInfo] = {}  # SUMO车辆id -> 车辆信息
         self.node_info = create_NodeReferenceID(signalized_intersection_name_decimal(self.junction_id))
 
     @classmethod
-    def load_net(cls, net: sumolib.net.Net):
+    def load_net(cls, net: CompiledNet):
         """加载JunctionVehContainer的路网"""
         cls._net = net
 
@@ -271,33 +276,65 @@ class JunctionVehContainer:
                     tc.VAR_HEIGHT, tc.VAR_VEHICLECLASS, tc.VAR_ROAD_ID, tc.VAR_LANE_ID, tc.VAR_LANE_INDEX]
         traci.junction.subscribeContext(self.junction_id, tc.CMD_GET_VEHICLE_VARIABLE, region_dis, sub_vars)
 
+    @property
+    def vehs_info(self) -> ValuesView[VehInfo]:
+        """交叉口范围内的车辆，按进入范围的先后排列"""
+        return self.vehicles.values()
+
+    @staticmethod
+    def _edge_id(road_id: str) -> str:
+        # 交叉口内部的edge_id为空
+        return '' if 'point' in road_id or road_id.startswith('J') else road_id
+
+    def _create_veh_info(self, veh_id: str, sub_veh_info: dict) -> VehInfo:
+        """车辆进入范围时生成车辆信息，车辆尺寸及类型在范围内不再更新"""
+        local_x, local_y = sub_veh_info[tc.VAR_POSITION]
+        lon, lat = self._net.xy_to_lon_lat(local_x, local_y)
+        return VehInfo(ptcId=vehicle_ids.get(veh_id),
+                       lat=lat,
+                       lon=lon,
+                       local_x=local_x,
+                       local_y=local_y,
+                       lane_ref_id=sub_veh_info[tc.VAR_LANE_INDEX],
+                       speed=sub_veh_info[tc.VAR_SPEED],
+                       direction=sub_veh_info[tc.VAR_ANGLE],
+                       width=sub_veh_info[tc.VAR_WIDTH],
+                       length=sub_veh_info[tc.VAR_LENGTH],
+                       acceleration=sub_veh_info[tc.VAR_ACCELERATION],
+                       classification=get_vehicle_class(sub_veh_info[tc.VAR_VEHICLECLASS]),
+                       edge_id=self._edge_id(sub_veh_info[tc.VAR_ROAD_ID]),
+                       lane_id=sub_veh_info[tc.VAR_LANE_ID])
+
+    def _update_veh_info(self, veh_info: VehInfo, sub_veh_info: dict):
+        """原地更新范围内车辆的状态，位置不变(停车)时不重新计算经纬度"""
+        local_x, local_y = sub_veh_info[tc.VAR_POSITION]
+        if local_x != veh_info.local_x or local_y != veh_info.local_y:
+            veh_info.lon, veh_info.lat = self._net.xy_to_lon_lat(local_x, local_y)
+            veh_info.local_x, veh_info.local_y = local_x, local_y
+        veh_info.lane_ref_id = sub_veh_info[tc.VAR_LANE_INDEX]
+        veh_info.speed = sub_veh_info[tc.VAR_SPEED]
+        veh_info.direction = sub_veh_info[tc.VAR_ANGLE]
+        veh_info.acceleration = sub_veh_info[tc.VAR_ACCELERATION]
+        veh_info.edge_id = self._edge_id(sub_veh_info[tc.VAR_ROAD_ID])
+        veh_info.lane_id = sub_veh_info[tc.VAR_LANE_ID]
+
     def update_vehicle_info(self) -> None:
-        """更新交叉口范围内车辆信息，用于后续构造消息或记录轨迹"""
-        self.vehs_info = []  # 重置当前的vehicle数据
+        """
+        更新交叉口范围内车辆信息，用于后续构造消息或记录轨迹
+        车辆表只在车辆进入范围时插入、离开范围(包括到达)时删除，范围内的车辆原地更新
+        """
         sub_res = traci.junction.getContextSubscriptionResults(self.junction_id)
+        vehicles = self.vehicles
         for veh_id, sub_veh_info in sub_res.items():
-            veh_id_num = veh_name_from_flow_decimal(veh_id)
-            local_x, local_y = sub_veh_info[tc.VAR_POSITION]
-            lon, lat = self._net.convertXY2LonLat(local_x, local_y)
-
-            edge_id = '' if 'point' in sub_veh_info[tc.VAR_ROAD_ID] or sub_veh_info[tc.VAR_ROAD_ID].startswith('J') \
-                else sub_veh_info[tc.VAR_ROAD_ID]  # 交叉口内部的edge_id为空
+            veh_info = vehicles.get(veh_id)
+            if veh_info is None:
+                vehicles[veh_id] = self._create_veh_info(veh_id, sub_veh_info)
+            else:
+                self._update_veh_info(veh_info, sub_veh_info)
 
-            veh_info = VehInfo(ptcId=veh_id_num,
-                               lat=lat,
-                               lon=lon,
-                               local_x=local_x,
-                               local_y=local_y,
-                               lane_ref_id=sub_veh_info[tc.VAR_LANE_INDEX],
-                               speed=sub_veh_info[tc.VAR_SPEED],
-                               direction=sub_veh_info[tc.VAR_ANGLE],
-                               width=sub_veh_info[tc.VAR_WIDTH],
-                               length=sub_veh_info[tc.VAR_LENGTH],
-                               acceleration=sub_veh_info[tc.VAR_ACCELERATION],
-                               classification=get_vehicle_class(sub_veh_info[tc.VAR_VEHICLECLASS]),
-                               edge_id=edge_id,
-                               lane_id=sub_veh_info[tc.VAR_LANE_ID])
-            self.vehs_info.append(veh_info)
+        if len(vehicles) > len(sub_res):
+            for veh_id in [veh_id for veh_id in vehicles if veh_id not in sub_res]:
+                del vehicles[veh_id]
 
     def get_trajectories(self) -> Dict[str, dict]:
         trajectories = {}
@@ -326,8 +363,8 @@ class JunctionVehContainer:
 
         sm_msgs = [
             create_SafetyMessage(ptcId=veh_info.ptcId,
-                                 moy=SimStatus.current_moy(),
-                                 secMark=SimStatus.current_timestamp_in_minute(),
+                                 moy=SimStatus.moy,
+                                 secMark=SimStatus.timestamp_in_minute,
                                  lat=veh_info.lat,
                                  lon=veh_info.lon,
                                  x=veh_info.local_x,
@@ -355,8 +392,8 @@ class JunctionVehContainer:
     def get_rsm(self) -> dict:
         participants = [
             create_ParticipantData(ptc_id=veh_info.ptcId,
-                                   moy=SimStatus.current_moy(),
-                                   secMark=SimStatus.current_timestamp_in_minute(),
+                                   moy=SimStatus.moy,
+                                   secMark=SimStatus.timestamp_in_minute,
                                    lat=veh_info.lat - self.central_lat,  # lat和lon均表示为中心偏移量
                                    lon=veh_info.lon - self.central_lon,
                                    x=veh_info.local_x - self.central_x,
@@ -384,4 +421,4 @@ class JunctionVehContainer:
         return True, PubMsgLabel(newly_rsm, DataMsg.RoadsideSafetyMessage, convert_method='flatbuffers')
 
     def reset(self):
-        self.vehs_info = []
+        self.vehicles.clear()
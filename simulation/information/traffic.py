@@ -4,14 +4,14 @@
 # @Description : 交通流数据的存储，更新，读取
 import math
 from dataclasses import dataclass
-from typing import Tuple, Dict, List, Optional
+from typing import Tuple, Dict, List, Optional, Collection
 
-import sumolib
 
 from simulation.lib.public_data import (create_TrafficFlowStat, create_TrafficFlow, create_NodeReferenceID, SimStatus,
                                         signalized_intersection_name_decimal)
 from simulation.lib.public_conn_data import PubMsgLabel, DataMsg
 from simulation.information.participants import VehInfo
+from simulation.lib.net_cache import CompiledNet
 
 
 # class FlowCounter:
@@ -164,95 +164,71 @@ class FlowStopLine:
     def __init__(self, node_id):
         self.node_id = node_id
         self.record_start_time = -1
-        self.vehicle_cache: Dict[int, VehInfo] = {}
-        self.lane_sorted_vehicle_cache: Dict[str, List[VehInfo]] = {}
+        self.vehicle_lanes: Dict[int, str] = {}  # 上一步范围内的车辆 -> 所在车道，位于交叉口内部时为空字符串
+        self.vehicles: Collection[VehInfo] = ()  # 当前范围内的车辆，即JunctionVehContainer.vehs_info
+        self.lane_sorted_vehicle_cache: Dict[str, List[VehInfo]] = {}  # 计算排队时按车道分组
         self.lane_flow_counter: Dict[str, int] = self.initialize_counter()
         self._successive_lane_attach()
 
     @classmethod
-    def load_net(cls, net: sumolib.net.Net):
+    def load_net(cls, net: CompiledNet):
         """加载JunctionVehContainer的路网"""
         cls._net = net
 
     def initialize_counter(self):
         """初始化车辆计数检测器"""
-        lane_flow_counter = {}
-        for edge in self._net.getNode(self.node_id).getIncoming():
-            for lane in edge.getLanes():
-                lane_id = lane.getID()
-                lane_flow_counter[lane_id] = 0
-        return lane_flow_counter
+        return {lane_id: 0 for lane_id in self._net.get_junction(self.node_id).incoming_lanes}
 
     def _successive_lane_attach(self):
+        """从编译路网读取各进口车道的上游连续车道，见net_cache.successive_lane_chains"""
+        if self._net.detection_radius != self.detection_radius:
+            raise ValueError(f'network compiled with detection radius {self._net.detection_radius}, '
+                             f'but {self.detection_radius} is required')
         successive_lanes = {}
-        for edge in self._net.getNode(self.node_id).getIncoming():
-            total_length = 0
-            edge: sumolib.net.edge.Edge
-            first_section_lanes: Dict[int, AttachedLane] = {}
-            lane_init_flag = False
-            valid_lane_index = set()
-            while total_length < self.detection_radius:
-                lanes = edge.getLanes()
-                total_lane = len(lanes)
-                this_section_valid_lane_index = set()
-                for lane in lanes:
-                    lane: sumolib.net.lane.Lane
-                    lane_id = lane.getID()
-                    right_index = lane.getIndex()  # right most from 0
-                    left_index = total_lane - right_index  # start from 1
-                    if not lane_init_flag:
-                        valid_lane_index.add(left_index)
-                        stop_line_pos = lane.getShape()[-1]
-                        first_section_lanes[left_index] = AttachedLane(lane_id, [], stop_line_pos)
-
-                    this_section_valid_lane_index.add(left_index)
-                    if left_index in valid_lane_index:
-                        first_section_lanes[left_index].successive_lanes.append(lane_id)
-                        self.lane_sorted_vehicle_cache[lane_id] = []
-                valid_lane_index = this_section_valid_lane_index.intersection(valid_lane_index)
-                lane_init_flag = True
-                total_length += edge.getLength()
-                edge = next(iter(edge.getIncoming().keys()))  # TODO: 到达上一交叉口
-            successive_lanes.update(
-                {attached_lane.first_lane_id: attached_lane for attached_lane in first_section_lanes.values()}
-            )
+        for first_lane_id, (lane_chain, stop_line_pos) in self._net.get_junction(self.node_id).successive_lanes.items():
+            successive_lanes[first_lane_id] = AttachedLane(first_lane_id, list(lane_chain), stop_line_pos)
+            for lane_id in lane_chain:
+                self.lane_sorted_vehicle_cache[lane_id] = []
         self.successive_lanes: Dict[str, AttachedLane] = successive_lanes
 
-    def update_vehicle_cache(self, curr_vehicles: List[VehInfo]):
+    def update_vehicle_cache(self, curr_vehicles: Collection[VehInfo]):
+        """
+        统计通过停止线的车辆，只记录每辆车上一步所在的车道，按车道分组在计算排队时进行
+        Args:
+            curr_vehicles: 当前范围内的车辆，车辆信息由JunctionVehContainer原地更新
+
+        Returns:
+
+        """
         if self.record_start_time < 0:
             self.record_start_time = SimStatus.sim_time_stamp
 
+        vehicle_lanes = self.vehicle_lanes
         for veh_info in curr_vehicles:
-            veh_id = veh_info.ptcId
-            last_step_veh_info = self.vehicle_cache.get(veh_id)
-            if last_step_veh_info is None:
-                continue
+            last_lane = vehicle_lanes.get(veh_info.ptcId)
+            # 当前edge_id为''表示进入交叉口内部，上一步位于车道上，组合判断车辆通过停止线
+            if last_lane and not veh_info.edge_id:
+                self.lane_flow_counter[last_lane] += 1
+            vehicle_lanes[veh_info.ptcId] = veh_info.lane_id if veh_info.edge_id else ''
 
-            if self.enter_intersection(veh_info, last_step_veh_info):
-                through_lane = last_step_veh_info.lane_id  # 增加counter
-                self.lane_flow_counter[through_lane] += 1
+        if len(vehicle_lanes) > len(curr_vehicles):
+            curr_ids = {veh_info.ptcId for veh_info in curr_vehicles}
+            for veh_id in [veh_id for veh_id in vehicle_lanes if veh_id not in curr_ids]:
+                del vehicle_lanes[veh_id]
+        self.vehicles = curr_vehicles
 
-        self.vehicle_cache = {}
+    def _sort_vehicles_by_lane(self):
         for lane_cache in self.lane_sorted_vehicle_cache.values():
             lane_cache.clear()
-
-        for veh in curr_vehicles:
-            self.vehicle_cache[veh.ptcId] = veh
+        for veh in self.vehicles:
             if veh.edge_id and veh.lane_id in self.lane_sorted_vehicle_cache:
                 self.lane_sorted_vehicle_cache[veh.lane_id].append(veh)
 
-    @staticmethod
-    def enter_intersection(curr_status: VehInfo, last_status: VehInfo):
-        # 当前状态下edge_id为''表示进入交叉口内部，上一状态不为空表示在进口道，组合判断车辆通过停止线
-        if not curr_status.edge_id and last_status.edge_id:
-            return True
-        else:
-            return False
-
     def get_queue_length(self) -> Dict[str, Tuple[int, float]]:
         def _cal_pos(x1, y1, x2, y2):
             return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
 
+        self._sort_vehicles_by_lane()
         queue_res = {}
         for first_lane_id, attached_lane in self.successive_lanes.items():
             lane_queue_num, lane_queue_len = 0, 0
@@ -297,7 +273,7 @@ class FlowStopLine:
         node = create_NodeReferenceID(signalized_intersection_name_decimal(self.node_id))
 
         traffic_flow = create_TrafficFlow(node=node,
-                                          gen_time=SimStatus.current_real_timestamp(),
+                                          gen_time=SimStatus.real_unix_timestamp,
                                           stat_type=stat_type,
                                           stat_type_type="DE_TrafficFlowStatByInterval",
                                           stats=tf_stats)
@@ -314,6 +290,7 @@ class FlowStopLine:
         self.record_start_time = -1
         for lane_id in self.lane_flow_counter.keys():
             self.lane_flow_counter[lane_id] = 0
-        self.vehicle_cache.clear()
+        self.vehicle_lanes.clear()
+        self.vehicles = ()
         for lane_cache in self.lane_sorted_vehicle_cache.values():
             lane_cache.clear()
\ No newline at end of file
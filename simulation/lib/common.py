@@ -103,10 +103,30 @@ def typeassert(*ty_args, **ty_kwargs):
     return decorate
 
 
+_type_assert_enabled = True  # 关闭后alltypeassert装饰的函数不再做参数类型检查
+
+
+def set_type_assert(enabled: bool) -> None:
+    """开启或关闭alltypeassert的参数类型检查，生产环境下可关闭以减少构造消息的开销"""
+    global _type_assert_enabled
+    _type_assert_enabled = enabled
+
+
+def type_assert_enabled() -> bool:
+    """alltypeassert的参数类型检查当前是否开启"""
+    return _type_assert_enabled
+
+
 def alltypeassert(func):
-    """强制参数类型检查的装饰器，一般用于构造标准数据结构的字典防止输入类型错误，无法与typing配合使用"""
-    # if not __debug__:
-    #     return func
+    """
+    强制参数类型检查的装饰器，一般用于构造标准数据结构的字典防止输入类型错误，无法与typing配合使用
+
+    Notes:
+        参数类型在装饰时一次性解析，调用时只对实际传入的参数逐一做isinstance检查，不再调用Signature.bind;
+        以python -O运行时直接返回原函数，运行中可通过set_type_assert关闭检查
+    """
+    if not __debug__:
+        return func
 
     # Map function argument names to supplied types
     sig = signature(func)
@@ -120,21 +140,37 @@ def alltypeassert(func):
         else:
             annotation_type = para.annotation
         bound_types[para_name] = annotation_type
-    # bound_types = sig.parameters  # {name: para.annotation for name, para in sig.parameters.items()}
+    positional_types = tuple(bound_types.items())  # 按参数顺序排列，用于匹配位置参数
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        bound_values = sig.bind(*args, **kwargs)
-        # Enforce type assertions across supplied arguments
-        for name, value in bound_values.arguments.items():
-            if name in bound_types:
+        if _type_assert_enabled:
+            # Enforce type assertions across supplied arguments
+            for (name, annotation_type), value in zip(positional_types, args):
+                # noinspection PyTypeHints
+                if not isinstance(value, annotation_type):
+                    raise TypeError(f'Argument {name} must be {annotation_type}, while {type(value)} is given')
+            for name, value in kwargs.items():
+                annotation_type = bound_types.get(name)
                 # noinspection PyTypeHints
-                if not isinstance(value, bound_types[name]):
-                    raise TypeError(f'Argument {name} must be {bound_types[name]}, while {type(value)} is given')
+                if annotation_type is not None and not isinstance(value, annotation_type):
+                    raise TypeError(f'Argument {name} must be {annotation_type}, while {type(value)} is given')
         return func(*args, **kwargs)
     return wrapper
 
 
+class FrozenDict(dict):
+    """不可修改的字典，用于在多条消息之间共享的静态子结构，可直接被json序列化"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f'{self.__class__.__name__} is immutable')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+
 def common_docs(docstrings: str):
     """为装饰的对象添加相同的docstring内容"""
     def wrapper(func):
@@ -150,10 +186,10 @@ def timer(func):
     """函数运行计时装饰器"""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.clock()
+        start = time.perf_counter()
         res = func(*args, **kwargs)
-        end = time.clock()
-        print(f'函数{func.__name__}运行用时{end-start}秒')
+        end = time.perf_counter()
+        logger.debug(f'函数{func.__name__}运行用时{end - start:.6f}秒')
         return res
     return wrapper
 
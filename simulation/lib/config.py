@@ -6,7 +6,10 @@
 import json
 import os
 from collections import namedtuple
-from typing import Optional, List
+from typing import Optional, List, Dict
+
+from simulation.lib.common import set_type_assert
+from simulation.lib.profiler import profiler
 
 # 与配置JSON文件中消息类型的名字对应
 CONFIG_MSG_NAME = {
@@ -30,6 +33,9 @@ class SetupConfig:
     test_name: str = None
     arterial_mode: bool = True
     await_start_cmd: bool = False
+    eval_mode: str = 'exe'  # exe: 外部评价程序，python: evaluation/eval_service.py
+    eval_workers: int = 0  # python评价服务常驻进程池的进程数，为0时在主进程中评价
+    python_score_report: bool = False  # python评价模式下是否上报未经外部评价程序校准的评分
 
     @classmethod
     def is_route_directory(cls):
@@ -39,7 +45,8 @@ class SetupConfig:
         return True
 
 
-_MsgCfg = namedtuple('_MsgCfg', ['name', 'frequency'])
+# batch_max_bytes为None时不开启批量推送
+_MsgCfg = namedtuple('_MsgCfg', ['name', 'frequency', 'batch_max_bytes', 'batch_window'], defaults=(None, 0.))
 
 
 class SimulationConfig:
@@ -49,6 +56,11 @@ class SimulationConfig:
     sim_time_step: float = 1
     sim_time_limit: Optional[float] = None
     warm_up_time: int = 0
+    info_task_workers: int = 0  # 并行执行信息任务的线程数，为0时串行执行
+    record_subscription: bool = False  # 是否录制订阅数据用于离线回放
+    trajectory_tolerance: Dict[str, float] = {}  # 轨迹增量编码的容差，见trajectory_store.TrajectoryTolerance.from_config
+    trajectory_file_format: str = 'full'  # 轨迹文件格式 full: 逐时刻展开, delta: 关键帧+增量编码
+    trajectory_record: Dict[str, dict] = {}  # 各交叉口的轨迹记录策略，见trajectory_store.load_record_policies
 
 
 class ConnectionConfig:
@@ -78,7 +90,8 @@ def load_config_json(cfg_path):
     simulation_para = cfg['simulation']
     for key, value in simulation_para['pub_msg'].items():
         if value['frequency'] > 0:
-            SimulationConfig.pub_msgs.append(_MsgCfg(key, value['frequency']))
+            SimulationConfig.pub_msgs.append(_MsgCfg(key, value['frequency'], value.get('batch_max_bytes'),
+                                                     value.get('batch_window', 0.)))
 
     junction_scenarios = simulation_para['junction_region']  # 长度为0时表示场景覆盖路网所有交叉口
     if len(junction_scenarios):
@@ -87,6 +100,7 @@ def load_config_json(cfg_path):
     SimulationConfig.sim_time_step = simulation_para['sim_time_step']
     SimulationConfig.sim_time_limit = simulation_para['sim_time_limit'] if simulation_para['sim_time_limit'] > 0 else None
     SimulationConfig.warm_up_time = simulation_para['warm_up_time']
+    SimulationConfig.info_task_workers = simulation_para.get('info_task_workers', 0)
 
     # 通信连接参数
     conn_para = cfg.get('connection')
@@ -118,12 +132,16 @@ def load_config(cfg_path):
     SetupConfig.test_name = setup_para.get('testName', 'No test name')
     SetupConfig.arterial_mode = setup_para.get('arterialMode', True)
     SetupConfig.await_start_cmd = setup_para.get('awaitStartCmd', False)
+    SetupConfig.eval_mode = setup_para.get('evalMode', 'exe')
+    SetupConfig.eval_workers = setup_para.get('evalWorkers', 0)
+    SetupConfig.python_score_report = setup_para.get('pythonScoreReport', False)
 
     # 仿真运行时设置参数
     simulation_para = cfg['simulation']
     for pub_msg in simulation_para['pubMsg']:
         if pub_msg['frequency'] > 0:
-            SimulationConfig.pub_msgs.append(_MsgCfg(pub_msg['name'], pub_msg['frequency']))
+            SimulationConfig.pub_msgs.append(_MsgCfg(pub_msg['name'], pub_msg['frequency'],
+                                                     pub_msg.get('batchMaxBytes'), pub_msg.get('batchWindow', 0.)))
 
     junction_scenarios = simulation_para['junctionRegion']  # 长度为0时表示场景覆盖路网所有交叉口
     if len(junction_scenarios):
@@ -132,6 +150,13 @@ def load_config(cfg_path):
     SimulationConfig.sim_time_step = simulation_para['simTimeStep']
     SimulationConfig.sim_time_limit = simulation_para['simTimeLimit'] if simulation_para['simTimeLimit'] > 0 else None
     SimulationConfig.warm_up_time = simulation_para['warmUpTime']
+    SimulationConfig.info_task_workers = simulation_para.get('infoTaskWorkers', 0)
+    SimulationConfig.record_subscription = simulation_para.get('recordSubscription', False)
+    SimulationConfig.trajectory_tolerance = simulation_para.get('trajectoryTolerance') or {}
+    SimulationConfig.trajectory_file_format = simulation_para.get('trajectoryFileFormat', 'full')
+    SimulationConfig.trajectory_record = simulation_para.get('trajectoryRecord') or {}
+    set_type_assert(simulation_para.get('typeAssert', True))  # 构造消息时是否检查参数类型
+    profiler.enabled = simulation_para.get('profile', True)  # 是否统计仿真各环节用时
 
     # 通信连接参数
     conn_para = cfg.get('connection')
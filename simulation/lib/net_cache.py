@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 22:10
+# @File        : net_cache.py
+# @Description : 路网静态信息的预处理与磁盘缓存
+
+"""
+编译路网
+
+仿真初始化时各存储单元只使用路网中信控交叉口的少量静态信息:
+    SignalController      信号灯id、connection与movement的映射(JunctionConns)
+    FlowStopLine          进口车道、上游连续车道及停止线位置
+    JunctionVehContainer  交叉口中心坐标及经纬度、平面坐标转经纬度的投影参数
+
+CompiledNet从sumolib路网中提取上述信息，以路网文件内容的哈希值为键pickle缓存到磁盘，
+再次启动时直接读取缓存而无需sumolib.net.readNet解析整个路网
+"""
+
+import hashlib
+import os
+import pickle
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Optional, Union
+
+import sumolib
+
+from simulation.lib.common import logger
+from simulation.lib.net_tool import JunctionConns, entry_movement_sorted
+
+CACHE_VERSION = 1  # 缓存内容变化时递增，使旧的缓存失效
+CACHE_PREFIX = 'compiled_net_'
+
+SuccessiveLanes = Dict[str, Tuple[List[str], Tuple[float, float]]]  # 进口车道id -> (上游连续车道id, 停止线位置)
+
+
+class LonLatConverter:
+    """路网平面坐标转经纬度，与sumolib.net.Net.convertXY2LonLat结果一致，投影对象只创建一次"""
+
+    def __init__(self, proj_parameter: str, net_offset: Tuple[float, float]):
+        self.proj_parameter = proj_parameter
+        self.x_offset, self.y_offset = net_offset
+        self._proj = None
+
+    def _get_proj(self):
+        if self.proj_parameter == '!':
+            raise RuntimeError('network does not provide geo-projection')
+        import pyproj
+        self._proj = pyproj.Proj(projparams=self.proj_parameter)
+        return self._proj
+
+    def __call__(self, x: float, y: float) -> Tuple[float, float]:
+        proj = self._proj if self._proj is not None else self._get_proj()
+        return proj(x - self.x_offset, y - self.y_offset, inverse=True)
+
+    def __getstate__(self):
+        return {'proj_parameter': self.proj_parameter, 'x_offset': self.x_offset, 'y_offset': self.y_offset,
+                '_proj': None}
+
+
+@dataclass
+class JunctionStatic:
+    """单个信控交叉口的静态信息"""
+    junction_id: str
+    x: float
+    y: float
+    lon: Optional[float]
+    lat: Optional[float]
+    tls_id: str
+    conn_info: JunctionConns
+    incoming_lanes: List[str]
+    successive_lanes: SuccessiveLanes = field(default_factory=dict)
+
+
+@dataclass
+class CompiledNet:
+    """路网中所有信控交叉口的静态信息"""
+    source_hash: str
+    detection_radius: float
+    junctions: Dict[str, JunctionStatic]
+    xy_to_lon_lat: LonLatConverter
+    version: int = CACHE_VERSION
+
+    def get_junction(self, junction_id: str) -> JunctionStatic:
+        junction = self.junctions.get(junction_id)
+        if junction is None:
+            raise KeyError(f'{junction_id} is not a signalized junction in the compiled network')
+        return junction
+
+    @property
+    def signalized_junctions(self) -> List[str]:
+        return list(self.junctions)
+
+
+def successive_lane_chains(node: sumolib.net.node.Node, detection_radius: float) -> SuccessiveLanes:
+    """
+    交叉口各进口车道在检测范围内的上游连续车道，按车道从左侧起的序号与上游路段对应
+
+    Args:
+        node: 交叉口
+        detection_radius: 检测范围 (m)
+
+    Returns: 进口车道id -> (上游连续车道id，包括进口车道本身, 停止线位置)
+
+    """
+    successive_lanes = {}
+    for edge in node.getIncoming():
+        total_length = 0
+        edge: sumolib.net.edge.Edge
+        first_section_lanes: Dict[int, Tuple[str, List[str], Tuple[float, float]]] = {}
+        lane_init_flag = False
+        valid_lane_index = set()
+        while total_length < detection_radius:
+            lanes = edge.getLanes()
+            total_lane = len(lanes)
+            this_section_valid_lane_index = set()
+            for lane in lanes:
+                lane: sumolib.net.lane.Lane
+                lane_id = lane.getID()
+                right_index = lane.getIndex()  # right most from 0
+                left_index = total_lane - right_index  # start from 1
+                if not lane_init_flag:
+                    valid_lane_index.add(left_index)
+                    stop_line_pos = lane.getShape()[-1]
+                    first_section_lanes[left_index] = (lane_id, [], stop_line_pos)
+
+                this_section_valid_lane_index.add(left_index)
+                if left_index in valid_lane_index:
+                    first_section_lanes[left_index][1].append(lane_id)
+            valid_lane_index = this_section_valid_lane_index.intersection(valid_lane_index)
+            lane_init_flag = True
+            total_length += edge.getLength()
+            edge = next(iter(edge.getIncoming().keys()))  # TODO: 到达上一交叉口
+        successive_lanes.update({first_lane_id: (lane_chain, stop_line_pos)
+                                 for first_lane_id, lane_chain, stop_line_pos in first_section_lanes.values()})
+    return successive_lanes
+
+
+def compile_net(net: sumolib.net.Net, detection_radius: float, source_hash: str = '') -> CompiledNet:
+    """
+    提取路网中所有信控交叉口的静态信息
+    Args:
+        net: 路网
+        detection_radius: FlowStopLine统计上游连续车道的检测范围 (m)
+        source_hash: 路网文件的哈希值
+
+    Returns: 编译路网
+
+    """
+    location = getattr(net, '_location', {})
+    net_offset = tuple(map(float, location.get('netOffset', '0,0').split(',')))
+    xy_to_lon_lat = LonLatConverter(location.get('projParameter', '!'), net_offset)
+
+    junctions = {}
+    for node in net.getNodes():
+        if node.getType() != 'traffic_light':
+            continue
+        junction_id = node.getID()
+        connections: List[sumolib.net.Connection] = node.getConnections()
+        if not connections:
+            logger.warning(f'signalized junction {junction_id} has no connection')
+            continue
+        x, y = node.getCoord()
+        try:
+            lon, lat = xy_to_lon_lat(x, y)
+        except RuntimeError:
+            lon, lat = None, None
+        junctions[junction_id] = JunctionStatic(
+            junction_id=junction_id,
+            x=x,
+            y=y,
+            lon=lon,
+            lat=lat,
+            tls_id=connections[0].getTLSID(),
+            conn_info=entry_movement_sorted(connections, node),
+            incoming_lanes=[lane.getID() for edge in node.getIncoming() for lane in edge.getLanes()],
+            successive_lanes=successive_lane_chains(node, detection_radius))
+    return CompiledNet(source_hash, detection_radius, junctions, xy_to_lon_lat)
+
+
+def file_hash(fp: str) -> str:
+    digest = hashlib.sha1()
+    with open(fp, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_compiled_net(network_fp: str, detection_radius: float, cache_dir: Optional[str] = None) -> CompiledNet:
+    """
+    读取编译路网，缓存不存在或失效时读取路网文件重新编译并写入缓存
+    Args:
+        network_fp: 路网文件路径
+        detection_radius: FlowStopLine统计上游连续车道的检测范围 (m)
+        cache_dir: 缓存文件夹，未提供时使用路网文件所在文件夹
+
+    Returns: 编译路网
+
+    """
+    source_hash = file_hash(network_fp)
+    if cache_dir is None:
+        cache_dir = os.path.dirname(os.path.abspath(network_fp))
+    cache_fp = os.path.join(cache_dir, f'{CACHE_PREFIX}{source_hash[:16]}_{detection_radius:g}.pkl')
+    if os.path.exists(cache_fp):
+        try:
+            with open(cache_fp, 'rb') as f:
+                compiled_net = pickle.load(f)
+            if isinstance(compiled_net, CompiledNet) and compiled_net.version == CACHE_VERSION and \
+                    compiled_net.source_hash == source_hash and compiled_net.detection_radius == detection_radius:
+                return compiled_net
+        except (OSError, pickle.UnpicklingError, AttributeError, EOFError) as e:
+            logger.warning(f'failed to load compiled network cache {cache_fp}: {e}')
+
+    compiled_net = compile_net(sumolib.net.readNet(network_fp), detection_radius, source_hash)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_fp, 'wb') as f:
+            pickle.dump(compiled_net, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logger.warning(f'failed to write compiled network cache {cache_fp}: {e}')
+    return compiled_net
+
+
+_compiled_nets = weakref.WeakKeyDictionary()  # 已读取的sumolib路网 -> 编译路网
+
+
+def as_compiled_net(net: Union[sumolib.net.Net, CompiledNet], detection_radius: float) -> CompiledNet:
+    """将sumolib路网转换为编译路网，同一路网对象只编译一次"""
+    if isinstance(net, CompiledNet):
+        if net.detection_radius != detection_radius:
+            raise ValueError(f'compiled network detection radius {net.detection_radius} != {detection_radius}')
+        return net
+    compiled_net = _compiled_nets.get(net)
+    if compiled_net is None or compiled_net.detection_radius != detection_radius:
+        compiled_net = _compiled_nets[net] = compile_net(net, detection_radius)
+    return compiled_net
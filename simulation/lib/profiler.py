@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 17:30
+# @File        : profiler.py
+# @Description : 仿真单步各环节的用时统计
+
+import csv
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, Deque, List, Optional
+
+ROLLING_WINDOW = 2048  # 计算分位数时保留的最近样本数
+PERCENTILES = (50, 95, 99)
+
+
+class PhaseStat:
+    """单个环节的用时统计，总次数、总用时和最大值覆盖全部样本，分位数基于最近ROLLING_WINDOW个样本"""
+
+    __slots__ = ('count', 'total_time', 'max_time', 'samples')
+
+    def __init__(self, window: int = ROLLING_WINDOW):
+        self.count = 0
+        self.total_time = 0.
+        self.max_time = 0.
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        self.samples.append(elapsed)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def to_dict(self) -> dict:
+        res = {'count': self.count,
+               'total_ms': round(self.total_time * 1000, 3),
+               'mean_ms': round(self.total_time / self.count * 1000, 3) if self.count else 0.,
+               'max_ms': round(self.max_time * 1000, 3)}
+        for q in PERCENTILES:
+            res[f'p{q}_ms'] = round(self.percentile(q) * 1000, 3)
+        return res
+
+
+class _PhaseTimer:
+    """环节计时的上下文管理器，按环节名称复用，仅用于主线程且不可嵌套同名环节"""
+
+    __slots__ = ('stat', 'start')
+
+    def __init__(self, stat: PhaseStat):
+        self.stat = stat
+        self.start = 0.
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stat.record(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_null_timer = _NullTimer()
+
+
+class Profiler:
+    """
+    仿真各环节用时统计
+
+    Notes:
+        环节名称使用'/'分级，例如sumo_step, update_storage/vehicle_info, task/SPAT, encode, publish。
+        单次记录的开销为两次perf_counter调用和一次deque追加，可在正式运行中保持开启
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stats: Dict[str, PhaseStat] = {}
+        self._timers: Dict[str, _PhaseTimer] = {}
+
+    def _get_stat(self, name: str) -> PhaseStat:
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = PhaseStat()
+        return stat
+
+    def phase(self, name: str):
+        """
+        对with语句块计时
+        Args:
+            name: 环节名称
+
+        Returns: 上下文管理器
+
+        """
+        if not self.enabled:
+            return _null_timer
+        phase_timer = self._timers.get(name)
+        if phase_timer is None:
+            phase_timer = self._timers[name] = _PhaseTimer(self._get_stat(name))
+        return phase_timer
+
+    def record(self, name: str, elapsed: float):
+        """记录自行计时得到的用时 (s)"""
+        if self.enabled:
+            self._get_stat(name).record(elapsed)
+
+    def report(self) -> Dict[str, dict]:
+        return {name: self.stats[name].to_dict() for name in sorted(self.stats)}
+
+    def dump(self, output_dir: str, scenario_name: str) -> Optional[List[str]]:
+        """
+        将统计结果写入{scenario_name}_profile.csv和{scenario_name}_profile.json
+        Returns: 写入的文件路径，未开启统计时返回None
+        """
+        if not self.enabled:
+            return None
+        report = self.report()
+        csv_fp = os.path.join(output_dir, f'{scenario_name}_profile.csv')
+        json_fp = os.path.join(output_dir, f'{scenario_name}_profile.json')
+        with open(json_fp, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        with open(csv_fp, 'w', newline='', encoding='utf-8') as f:
+            fieldnames = ['phase', 'count', 'total_ms', 'mean_ms', 'max_ms'] + [f'p{q}_ms' for q in PERCENTILES]
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for name, row in report.items():
+                writer.writerow({'phase': name, **row})
+        return [csv_fp, json_fp]
+
+    def reset(self):
+        self.stats.clear()
+        self._timers.clear()
+
+
+profiler = Profiler()
@@ -36,9 +36,18 @@ class SpecialDataMsg(MsgType):
     SERequirement = auto()
 
 
+# 配置文件中推送消息名称对应的消息类型
+CONFIG_PUB_MSG_TYPE = {
+    'basicSafetyMessage': DataMsg.SafetyMessage,
+    'roadsideSafetyMessage': DataMsg.RoadsideSafetyMessage,
+    'signalPhaseAndTiming': DataMsg.SignalPhaseAndTiming,
+    'trafficFlow': DataMsg.TrafficFlow,
+    'signalExecution': DataMsg.SignalExecution
+}
+
 DetailMsgType = TypeVar('DetailMsgType', bound=MsgType)  # MsgType的所有子类，用于类型注解
 
-CONVERT_METHOD = ['json', 'flatbuffers', 'raw']
+CONVERT_METHOD = ['json', 'flatbuffers', 'flatbuffers_native', 'raw']  # flatbuffers_native见connection/fb_builder.py
 
 
 class PubMsgLabel:
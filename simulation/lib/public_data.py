@@ -6,13 +6,15 @@
 import re
 import time
 import weakref
+from concurrent.futures import Executor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Tuple, List, Dict, Callable, Any, Optional, Union
 
 from pydantic import BaseModel, field_validator, Field, PositiveInt, FieldValidationInfo, NonNegativeInt
 
-from simulation.lib.common import alltypeassert
-from simulation.lib.public_conn_data import PubMsgLabel
+from simulation.lib.common import alltypeassert, FrozenDict
+from simulation.lib.public_conn_data import PubMsgLabel, DetailMsgType
 
 """标准数据结构中默认的常量"""
 REGION = 1
@@ -77,6 +79,65 @@ class InfoTask(BaseTask):
         return success, res
 
 
+def _call(func: Callable):
+    return func()
+
+
+class InfoTaskGroup(InfoTask):
+    """
+    同一消息类型的信息任务组，一次执行中依次调用所有成员(例如各交叉口)的消息生成方法，
+    并将结果合并为一条包含多条消息的推送标记，便于统一编码与批量推送
+
+    Notes:
+        提供executor时各成员在线程池中并行执行，合并结果时仍按成员顺序排列。
+        成员只能读取当前步已更新的storage和traci订阅结果，不能调用traci的查询或控制接口(traci连接非线程安全)
+    """
+
+    def __init__(self, member_funcs: List[Callable[[], Tuple[bool, Optional[PubMsgLabel]]]],
+                 msg_type: DetailMsgType,
+                 exec_time: Optional[float] = None, cycle_time: Optional[float] = None, task_name: str = None,
+                 executor: Optional[Executor] = None):
+        """
+
+        Args:
+            member_funcs: 各成员的消息生成方法，返回值与InfoTask的执行函数相同
+            msg_type: 成员生成消息的类型
+            exec_time: 达到此时间才在仿真中执行函数，None表示立即执行
+            cycle_time: 执行周期
+            task_name: 任务名称
+            executor: 并行执行成员的线程池，None表示串行执行
+        """
+        super().__init__(exec_func=self._execute_members, exec_time=exec_time, cycle_time=cycle_time,
+                         task_name=task_name)
+        self.member_funcs = member_funcs
+        self.msg_type = msg_type
+        self.executor = executor
+
+    def _execute_members(self) -> Tuple[bool, Optional[PubMsgLabel]]:
+        if self.executor is not None and len(self.member_funcs) > 1:
+            results = self.executor.map(_call, self.member_funcs)  # 结果顺序与成员顺序一致
+        else:
+            results = map(_call, self.member_funcs)
+
+        msgs = []
+        convert_method = None
+        for success, msg_label in results:
+            if not success or msg_label is None:
+                continue
+            if convert_method is None:
+                convert_method = msg_label.convert_method
+            elif msg_label.convert_method != convert_method:
+                raise ValueError(f'members of task group {self.task_name} use different convert methods')
+            if msg_label.multiple:
+                msgs.extend(msg_label.raw_msg)
+            else:
+                msgs.append(msg_label.raw_msg)
+
+        if not msgs:
+            return False, None
+        return True, PubMsgLabel(msgs, self.msg_type, convert_method=convert_method, multiple=True)
+
+
 class EvalTask(BaseTask):
     pass
 
@@ -86,24 +147,31 @@ class SimStatus:
     sim_time_stamp: Optional[float] = None  # 仿真运行的内部时间
     start_real_datetime: Optional[datetime] = None  # 仿真开始时运行对应真实世界的时间
 
-    _dynamic_attributes = []  # 记录动态定义的内部使用状态属性(避免污染公共类属性而不去显式声明)
+    # 以下时间字段在time_rolling中每一仿真步计算一次，生成消息时直接读取
+    moy: Optional[int] = None  # 当前真实时间对应的年内分钟数
+    timestamp_in_minute: Optional[float] = None  # 当前真实时间所在分钟里的秒数
+    real_unix_timestamp: Optional[float] = None  # 当前真实时间的时间戳
+    start_unix_timestamp: Optional[float] = None  # 仿真开始时真实时间的时间戳(精确到秒)
+
+    _start_seconds_in_year: Optional[float] = None  # 仿真开始时真实时间距所在年份第一天的秒数
+    _start_real_timestamp: Optional[float] = None  # 仿真开始时真实时间的时间戳
 
     @classmethod
     def reset(cls):
         """重置仿真的状态"""
         cls.sim_time_stamp = None
         cls.start_real_datetime = None
-
-        # 清除动态添加的属性
-        for d_attr in cls._dynamic_attributes:
-            delattr(cls, d_attr)
-
-        cls._dynamic_attributes.clear()
+        cls.moy = None
+        cls.timestamp_in_minute = None
+        cls.real_unix_timestamp = None
+        cls.start_unix_timestamp = None
+        cls._start_seconds_in_year = None
+        cls._start_real_timestamp = None
 
     @classmethod
     def time_rolling(cls, curr_timestamp: float):
         """
-        更新仿真内部和真实时间
+        更新仿真内部和真实时间，并计算当前步的moy、分钟内秒数及时间戳
         Args:
             curr_timestamp: 仿真当前的时间
 
@@ -111,9 +179,22 @@ class SimStatus:
 
         """
         if cls.start_real_datetime is None:
-            cls.start_real_datetime = datetime.now()
+            cls._set_start_real_datetime(datetime.now())
 
         cls.sim_time_stamp = curr_timestamp
+        seconds_in_year = cls._start_seconds_in_year + curr_timestamp
+        cls.moy = int(seconds_in_year // 60)
+        cls.timestamp_in_minute = seconds_in_year % 60
+        cls.real_unix_timestamp = cls._start_real_timestamp + curr_timestamp
+
+    @classmethod
+    def _set_start_real_datetime(cls, start_real_datetime: datetime):
+        """记录仿真开始的真实时间，并计算各时间字段的基准值"""
+        cls.start_real_datetime = start_real_datetime
+        year_begin = datetime(start_real_datetime.year, 1, 1)
+        cls._start_seconds_in_year = (start_real_datetime - year_begin).total_seconds()
+        cls._start_real_timestamp = start_real_datetime.timestamp()
+        cls.start_unix_timestamp = time.mktime(start_real_datetime.timetuple())
 
     @classmethod
     def running_check(cls) -> None:
@@ -130,48 +211,31 @@ class SimStatus:
     @classmethod
     def current_moy(cls) -> int:
         """获取当前moy"""
-        real_time = cls.current_real_time()
-        time_diff = (real_time - cls.real_time_year_begin())
-        moy = time_diff.days * 24 * 60 + time_diff.seconds // 60
-        return moy
+        cls.running_check()
+        return cls.moy
 
     @classmethod
     def current_timestamp_in_minute(cls) -> float:
         """获取当前所在分钟里的秒数"""
-        real_time = cls.current_real_time()
-        return real_time.second + real_time.microsecond / 1000_000
+        cls.running_check()
+        return cls.timestamp_in_minute
 
     @classmethod
     def real_time_year_begin(cls) -> datetime:
-        """获得所在年份的第一天，动态添加属性到类避免datetime的重复实例化"""
-        attr_name = '_real_time_year_begin'
+        """获得所在年份的第一天"""
         cls.running_check()
-        res = getattr(cls, attr_name, None)
-        if res is None:
-            this_year = datetime(cls.start_real_datetime.year, 1, 1)
-            setattr(cls, attr_name, this_year)
-            cls._dynamic_attributes.append(attr_name)
-            res = this_year
-        return res
+        return datetime(cls.start_real_datetime.year, 1, 1)
 
     @classmethod
     def start_real_unix_timestamp(cls):
         cls.running_check()
-        attr_name = '_start_real_unix_timestamp'
-        res = getattr(cls, attr_name, None)
-        if res is None:
-            ts = time.mktime(cls.start_real_datetime.timetuple())
-            setattr(cls, attr_name, ts)
-            cls._dynamic_attributes.append(attr_name)
-            res = ts
-        return res
+        return cls.start_unix_timestamp
 
     @classmethod
     def current_real_timestamp(cls):
         """获取当前真实时间的时间戳"""
         cls.running_check()
-        real_time = cls.current_real_time()
-        return real_time.timestamp()
+        return cls.real_unix_timestamp
 
     @classmethod
     def cache_property(cls, func):
@@ -201,6 +265,16 @@ class SimStatus:
 """标准数据格式构造, 传入参数的数据取现实标准单位"""
 Num = Union[int, float]
 
+# 各条消息中取值固定的子结构，所有消息共享同一个不可修改的实例
+POSITION_ACCURACY = FrozenDict({'pos': 'a2m'})
+MOTION_CONFIDENCE = FrozenDict({'speedCfd': 'prec1ms', 'headingCfd': 'prec0_01deg'})
+
+
+@lru_cache(maxsize=None)
+def vehicle_class_template(classification: str) -> FrozenDict:
+    """按车辆类型获取共享的vehicleClass子结构"""
+    return FrozenDict({'classification': classification})
+
 
 @alltypeassert
 def create_NodeReferenceID(node_id: int,
@@ -532,16 +606,11 @@ def create_SafetyMessage(ptcId: int,
         },
         'nodeId': node,
         'laneId': lane_ref_id,
-        'accuracy': {
-            'pos': 'a2m'
-        },
+        'accuracy': POSITION_ACCURACY,
         'transmission': 'unavailable',
         'speed': int(speed / 0.02),
         'heading': int(direction / 0.0125),
-        'motionCfd': {
-            'speedCfd': 'prec1ms',
-            'headingCfd': 'prec0_01deg'
-        },
+        'motionCfd': MOTION_CONFIDENCE,
         'accelSet': {
             'lon': int(acceleration / 0.01),  # 沿车辆前进方向
             'lat': 0,
@@ -552,9 +621,7 @@ def create_SafetyMessage(ptcId: int,
             'width': int(width * 100),
             'length': int(length * 100)
         },
-        'vehicleClass': {
-            'classification': classification
-        },
+        'vehicleClass': vehicle_class_template(classification),
         'section_ext_id': edge_id,
         'lane_ext_id': lane_id
     }
@@ -613,16 +680,11 @@ def create_ParticipantData(ptc_id: int,
                 'lon': int(lon * 1e7)
             }
         },
-        'posConfidence': {
-            'pos': 'a2m'
-        },
+        'posConfidence': POSITION_ACCURACY,
         'transmission': 'unavailable',
         'speed': int(speed / 0.02),
         'heading': int(heading / 0.0125),
-        'motionCfd': {
-            'speedCfd': 'prec1ms',
-            'headingCfd': 'prec0_01deg'
-        },
+        'motionCfd': MOTION_CONFIDENCE,
         'accelSet': {
             'lon': int(acceleration / 0.01),  # 沿车辆前进方向
             'lat': 0,
@@ -633,9 +695,7 @@ def create_ParticipantData(ptc_id: int,
             'width': int(width * 100),
             'length': int(length * 100)
         },
-        'vehicleClass': {
-            'classification': classification
-        },
+        'vehicleClass': vehicle_class_template(classification),
         'referPos': {
             'positionX': int(x * 100),
             'positionY': int(y * 100)
@@ -788,27 +848,3 @@ def signalized_intersection_name_str(ints: int) -> str:
     """
     attach_char = '-' if ints // 1000 else 'point'  # 编号小于1000则是信控交叉口，使用point作为前缀
     return attach_char + str(ints)
-
-
-FLOW_VEH_PAT = re.compile(r'flow(\d+).(\d+)')
-
-
-def veh_name_from_flow_decimal(veh_id: str) -> int:
-    """
-    从以Flow作为输入的车辆名称字符串提取数字部分
-    Args:
-        veh_id: 从SUMO提取的车辆id字符串
-
-    Returns: 车辆数字ID
-
-    Raises: ValueError(数字过大，超过65535)
-
-    Warnings: Flow的id不能超过65, 输入的车辆总数不宜超过1000(500对于Flow65)
-    """
-    match_res = FLOW_VEH_PAT.match(veh_id)
-    flow_id = match_res.group(1)
-    veh_in_flow_id = match_res.group(2)
-    numeric_veh_id = int(flow_id) * 1000 + int(veh_in_flow_id)
-    if numeric_veh_id > 65535:
-        raise ValueError('vehicle id exceeds 65535, invalid number')
-    return numeric_veh_id
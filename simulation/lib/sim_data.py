@@ -4,13 +4,17 @@
 # @Description : 存放仿真运行环节需要记录的数据
 
 from dataclasses import dataclass
-from typing import Tuple, Dict, Callable, Optional, List, Iterable
+from typing import Tuple, Dict, Callable, Optional, List, Iterable, Union
 
 import sumolib
 import traci
 
 from simulation.lib.common import logger, timer
+from simulation.lib.net_cache import CompiledNet, as_compiled_net
+from simulation.lib.profiler import profiler
 from simulation.lib.public_data import ImplementTask, InfoTask, signalized_intersection_name_str, SimStatus
+from simulation.lib.trajectory_store import JunctionTrajectory, TrajectoryTolerance, RecordPolicy
+from simulation.lib.veh_registry import vehicle_ids
 from simulation.information.traffic import FlowStopLine
 from simulation.information.participants import JunctionVehContainer
 from simulation.application.signal_control import SignalController
@@ -22,6 +26,18 @@ from simulation.application.vehicle_control import VehicleController
 CONTROL_NODE_ID = 920
 REGION_DETECTION_RADIUS = 150
 
+def _on_interval(time_stamp: float, interval: float, eps: float = 1e-6) -> bool:
+    """仿真时刻是否为记录间隔的整数倍，按倍数判断，避免浮点取余在间隔无法精确表示(如0.2、0.3)时漏记"""
+    multiple = time_stamp / interval
+    return abs(multiple - round(multiple)) < eps
+
+
+def _time_key(time_stamp: float) -> str:
+    """轨迹记录时刻，整数秒时与原格式一致"""
+    time_stamp = round(time_stamp, 6)
+    return str(int(time_stamp)) if time_stamp.is_integer() else repr(time_stamp)
+
+
 @dataclass
 class TransitionIntersection:
     intersection_id: str
@@ -58,9 +74,10 @@ class SimInfoStorage:
         self.signal_controllers: Optional[Dict[str, SignalController]] = None  # 信号转换计划
         self.junction_veh_cons: Optional[Dict[str, JunctionVehContainer]] = None  # 交叉口范围车辆管理器
         self.vehicle_controller = VehicleController()  # 车辆控制实例
-        self.trajectory_info = {}
+        self.trajectory_info: Dict[str, JunctionTrajectory] = {}  # 交叉口id -> 稀疏轨迹
+        self.record_policies: Dict[str, RecordPolicy] = {}  # 交叉口id -> 轨迹记录策略，未设置的交叉口使用默认策略
 
-        self.update_module_method: List[Callable[[], None]] = []
+        self.update_module_method: List[Tuple[str, Callable[[], None]]] = []  # (用时统计的环节名称, 更新方法)
 
     # def initialize_sc(self, net: sumolib.net.Net, junction_list: Iterable[str] = None):
     #     """
@@ -106,7 +123,7 @@ class SimInfoStorage:
     #         junction_veh_cons[junction] = junction_veh_con
     #     self.junction_veh_cons = junction_veh_cons
 
-    def _initialize_storage_unit(self, unit_type_str: str, net: sumolib.net.Net, junction_list: Iterable[str] = None):
+    def _initialize_storage_unit(self, unit_type_str: str, net: CompiledNet, junction_list: Iterable[str] = None):
         factory = {
             'sc': SignalController,
             'tf': FlowStopLine,
@@ -122,42 +139,54 @@ class SimInfoStorage:
         flow_containers = {node_id: unit_type(node_id) for node_id in junction_list}
         return flow_containers
 
-    def initialize_signal_controller(self, net: sumolib.net.Net, junction_list: Iterable[str] = None):
+    def initialize_signal_controller(self, net: Union[sumolib.net.Net, CompiledNet],
+                                     junction_list: Iterable[str] = None):
+        net = as_compiled_net(net, REGION_DETECTION_RADIUS)
         SignalController.load_net(net)
         self.signal_controllers = self._initialize_storage_unit('sc', net, junction_list)
 
-    def initialize_traffic_flow(self, net: sumolib.net.Net, junction_list: Iterable[str] = None):
+    def initialize_traffic_flow(self, net: Union[sumolib.net.Net, CompiledNet], junction_list: Iterable[str] = None):
+        net = as_compiled_net(net, REGION_DETECTION_RADIUS)
         FlowStopLine.load_net(net)
         FlowStopLine.detection_radius = REGION_DETECTION_RADIUS
         self.flow_cons = self._initialize_storage_unit('tf', net, junction_list)
 
-    def initialize_participant(self, net: sumolib.net.Net, junction_list: Iterable[str] = None):
+    def initialize_participant(self, net: Union[sumolib.net.Net, CompiledNet], junction_list: Iterable[str] = None):
+        net = as_compiled_net(net, REGION_DETECTION_RADIUS)
         JunctionVehContainer.load_net(net)
         self.junction_veh_cons = self._initialize_storage_unit('ptc', net, junction_list)
 
     def initialize_update_execute(self,
                                   trajectory_update: bool = True,
-                                  traffic_flow_update: bool = False):
+                                  traffic_flow_update: bool = False,
+                                  trajectory_tolerance: TrajectoryTolerance = TrajectoryTolerance(),
+                                  record_policies: Optional[Dict[str, RecordPolicy]] = None):
         """
         快速初始化每一步对sim_data数据更新需要执行的函数
         Args:
             trajectory_update: 执行车辆轨迹更新
             traffic_flow_update: 执行TrafficFlow更新
+            trajectory_tolerance: 轨迹增量编码的容差
+            record_policies: 各交叉口的轨迹记录策略，同时决定车辆订阅范围
 
 
         Returns:
 
         """
+        if record_policies is not None:
+            self.record_policies = record_policies
         # 如果需要发送TrafficFlow，添加更新TF方法
         if traffic_flow_update:
             # self.flow_status.initialize_counter(net, set(nodes))
             # self.update_module_method.append(self.flow_status.flow_update_task())
-            self.update_module_method.append(self.traffic_flow_update_task())
+            self.update_module_method.append(('update_storage/traffic_flow', self.traffic_flow_update_task()))
         # 添加更新车辆信息方法，用于发送BSM/RSM或记录轨迹信息
         if trajectory_update:
+            self.update_module_method.append(('update_storage/vehicle_ids', vehicle_ids.update_from_subscription))
             for container in self.junction_veh_cons.values():
-                self.update_module_method.append(container.update_vehicle_info)
-            self.update_module_method.append(self.record_trajectories_update_task())
+                self.update_module_method.append(('update_storage/vehicle_info', container.update_vehicle_info))
+            self.update_module_method.append(
+                ('update_storage/trajectory_record', self.record_trajectories_update_task(trajectory_tolerance)))
 
     def initialize_subscribe_after_start(self):
         """调用start建立traci连接后为traffic_light添加订阅"""
@@ -166,8 +195,22 @@ class SimInfoStorage:
                 sc.subscribe_info()
 
         if self.junction_veh_cons is not None:
-            for jun_veh in self.junction_veh_cons.values():
-                jun_veh.subscribe_info(region_dis=REGION_DETECTION_RADIUS)
+            vehicle_ids.subscribe_info()  # 车辆出发与到达，用于分配和释放车辆编号
+            for junction_id, jun_veh in self.junction_veh_cons.items():
+                jun_veh.subscribe_info(region_dis=self.subscription_radius(junction_id))
+
+    def record_policy(self, junction_id: str) -> RecordPolicy:
+        policy = self.record_policies.get(junction_id)
+        return RecordPolicy() if policy is None else policy
+
+    def subscription_radius(self, junction_id: str) -> float:
+        """交叉口车辆订阅范围，由记录策略决定，统计TrafficFlow时不小于FlowStopLine的检测范围"""
+        radius = self.record_policy(junction_id).radius
+        if radius is None:
+            return REGION_DETECTION_RADIUS
+        if self.flow_cons is not None and junction_id in self.flow_cons:
+            return max(radius, FlowStopLine.detection_radius)
+        return radius
 
     def create_signal_scheme_update_task(self,
                                          signal_scheme: dict,
@@ -266,18 +309,26 @@ class SimInfoStorage:
 
             return _task
 
-    def record_trajectories_update_task(self, interval: float = 1.) -> Callable[[], None]:
-        """创建轨迹字典记录的更新任务"""
+    def record_trajectories_update_task(self,
+                                        tolerance: TrajectoryTolerance = TrajectoryTolerance()) -> Callable[[], None]:
+        """
+        创建轨迹记录的更新任务，各交叉口的轨迹按关键帧+增量记录，见trajectory_store.JunctionTrajectory
+        记录间隔、是否记录及记录的路段由各交叉口的记录策略决定
+        """
 
         def _wrapper():
-            # 只有到整数时记录数据
-            if SimStatus.sim_time_stamp % interval:
-                return None
             for junction_id, veh_container in self.junction_veh_cons.items():
-                trajectories = veh_container.get_trajectories()
-
-                # 记录数据，无轨迹点返回空列表
-                self.trajectory_info.setdefault(junction_id, dict())[str(int(SimStatus.sim_time_stamp))] = trajectories
+                policy = self.record_policy(junction_id)
+                # 只有到记录间隔的整数倍时记录数据
+                if not policy.enabled or not _on_interval(SimStatus.sim_time_stamp, policy.interval):
+                    continue
+                trajectories = policy.filter(veh_container.get_trajectories())
+
+                # 记录数据，无轨迹点时记录空时刻
+                junction_trajectory = self.trajectory_info.get(junction_id)
+                if junction_trajectory is None:
+                    junction_trajectory = self.trajectory_info[junction_id] = JunctionTrajectory(tolerance)
+                junction_trajectory.record(_time_key(SimStatus.sim_time_stamp), trajectories)
 
         return _wrapper
 
@@ -298,8 +349,9 @@ class SimInfoStorage:
 
     def update_storage(self):
         """执行数据模块中需要执行的更新操作"""
-        for update_func in self.update_module_method:
-            update_func()
+        for module_name, update_func in self.update_module_method:
+            with profiler.phase(module_name):
+                update_func()
 
     def _reset_storage_unit(self, *units):
         for unit in units:
@@ -315,10 +367,11 @@ class SimInfoStorage:
         self._reset_storage_unit(self.flow_cons, self.signal_controllers, self.junction_veh_cons)
         self.vehicle_controller.clear_speedguide_info()
         self.trajectory_info = {}
+        vehicle_ids.reset()
 
     @staticmethod
-    def _get_all_signalized_junction(net: sumolib.net.Net):
-        return (node.getID() for node in net.getNodes() if node.getType() == 'traffic_light')
+    def _get_all_signalized_junction(net: CompiledNet):
+        return net.signalized_junctions
 
 
 class ArterialSimInfoStorage(SimInfoStorage):
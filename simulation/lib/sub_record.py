@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 19:30
+# @File        : sub_record.py
+# @Description : SUMO订阅数据的录制与回放
+
+"""
+订阅数据录制文件格式(追加写入):
+
+    file  = MAGIC + frame_1 + frame_2 + ... + frame_n
+    frame = length (4字节, 大端无符号整数) + body (length字节)
+    body  = zlib压缩(可选)的pickle数据: (仿真时间, 交叉口车辆订阅结果, 信号灯订阅结果, 车辆出发与到达的订阅结果)
+
+信号灯订阅结果中的TL_COMPLETE_DEFINITION_RYG(完整配时方案)只在发生变化时写入，回放时沿用上一次的方案。
+仿真异常中断时文件末尾可能存在不完整的帧，读取时忽略
+"""
+
+import pickle
+import struct
+import zlib
+from typing import Dict, Iterator, Optional, Tuple, BinaryIO
+
+import traci
+import traci.constants as tc
+
+from simulation.lib.common import logger
+from simulation.lib.traci_stand_in import TraciStandIn, SubResult
+
+MAGIC = b'SIMSUB1\n'
+FRAME_HEADER = struct.Struct('>I')
+FLAG_COMPRESSED = 0x80000000  # 长度字段最高位表示帧数据经过zlib压缩
+
+StepFrame = Tuple[float, Dict[str, Dict[str, SubResult]], Dict[str, SubResult], SubResult]
+
+
+class SubscriptionRecorder:
+    """在Simulation.run中逐步录制storage所用到的订阅数据"""
+
+    def __init__(self, record_fp: str, compress: bool = True):
+        """
+
+        Args:
+            record_fp: 录制文件路径
+            compress: 是否使用zlib压缩每一帧
+        """
+        self.record_fp = record_fp
+        self.compress = compress
+        self._file: Optional[BinaryIO] = open(record_fp, 'wb')
+        self._file.write(MAGIC)
+        self._last_definitions: Dict[str, bytes] = {}  # 信号灯id -> 上一次写入的完整配时方案
+        self.frame_count = 0
+
+    def record_step(self, sim_time: float, storage) -> None:
+        """
+        录制当前步的订阅数据
+        Args:
+            sim_time: 仿真时间
+            storage: SimInfoStorage，录制其中各交叉口车辆、各信号灯及车辆出发与到达的订阅结果
+        """
+        junction_context = {}
+        simulation = {}
+        if storage.junction_veh_cons is not None:
+            for junction_id in storage.junction_veh_cons:
+                junction_context[junction_id] = traci.junction.getContextSubscriptionResults(junction_id)
+            simulation = {var: veh_ids for var, veh_ids in traci.simulation.getSubscriptionResults().items() if veh_ids}
+
+        trafficlight = {}
+        if storage.signal_controllers is not None:
+            for sc in storage.signal_controllers.values():
+                sub_res = dict(traci.trafficlight.getSubscriptionResults(sc.tls_id))
+                definition = sub_res.get(tc.TL_COMPLETE_DEFINITION_RYG)
+                if definition is not None:
+                    definition_bytes = pickle.dumps(definition, protocol=pickle.HIGHEST_PROTOCOL)
+                    if self._last_definitions.get(sc.tls_id) == definition_bytes:
+                        del sub_res[tc.TL_COMPLETE_DEFINITION_RYG]
+                    else:
+                        self._last_definitions[sc.tls_id] = definition_bytes
+                trafficlight[sc.tls_id] = sub_res
+
+        self.write_frame((sim_time, junction_context, trafficlight, simulation))
+
+    def write_frame(self, frame: StepFrame) -> None:
+        if self._file is None:
+            raise RuntimeError(f'subscription recorder {self.record_fp} has been closed')
+        body = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+        length_field = len(body)
+        if self.compress:
+            body = zlib.compress(body, 1)
+            length_field = len(body) | FLAG_COMPRESSED
+        self._file.write(FRAME_HEADER.pack(length_field))
+        self._file.write(body)
+        self.frame_count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(f'recorded {self.frame_count} steps of subscription data to {self.record_fp}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+def read_frames(record_fp: str) -> Iterator[StepFrame]:
+    """
+    依次读取录制文件中每一步的订阅数据，信号灯完整配时方案已按上一次写入的结果补全
+    Raises: ValueError(文件格式错误)
+    """
+    definitions: Dict[str, object] = {}
+    with open(record_fp, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{record_fp} is not a subscription record file')
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                break
+            length_field, = FRAME_HEADER.unpack(header)
+            body_len = length_field & ~FLAG_COMPRESSED
+            body = f.read(body_len)
+            if len(body) < body_len:
+                logger.warning(f'incomplete frame at the end of {record_fp} is ignored')
+                break
+            if length_field & FLAG_COMPRESSED:
+                body = zlib.decompress(body)
+            sim_time, junction_context, trafficlight, simulation = pickle.loads(body)
+
+            for tls_id, sub_res in trafficlight.items():
+                definition = sub_res.get(tc.TL_COMPLETE_DEFINITION_RYG)
+                if definition is None:
+                    sub_res[tc.TL_COMPLETE_DEFINITION_RYG] = definitions[tls_id]
+                else:
+                    definitions[tls_id] = definition
+            yield sim_time, junction_context, trafficlight, simulation
+
+
+class SubscriptionReplay(TraciStandIn):
+    """
+    回放录制的订阅数据，替换traci的仿真推进接口后可直接调用Simulation.run
+
+    Notes:
+        回放是开环的: 控制类任务(信号方案、车速引导)调用的traci设置接口被忽略，不会改变回放的车辆和信号灯状态
+    """
+
+    CONTROL_COMMANDS = {
+        'trafficlight': ('setProgramLogic', 'setProgram', 'setRedYellowGreenState', 'setPhase'),
+        'vehicle': ('setSpeed', 'setMaxSpeed')
+    }
+
+    def __init__(self, record_fp: str):
+        super().__init__()
+        self.record_fp = record_fp
+        self._frames: Optional[Iterator[StepFrame]] = None
+        self._next_frame: Optional[StepFrame] = None
+
+    def _advance_frame(self):
+        self._next_frame = next(self._frames, None)
+
+    def _simulation_step(self, step: float = 0.):
+        if self._next_frame is None:
+            raise RuntimeError(f'no more recorded steps in {self.record_fp}')
+        self.set_step(*self._next_frame)
+        self._advance_frame()
+
+    def _get_min_expected_number(self) -> int:
+        return 0 if self._next_frame is not None else -1  # 为负数时Simulation.run结束
+
+    def install(self) -> 'SubscriptionReplay':
+        super().install()
+        self._frames = read_frames(self.record_fp)
+        self._advance_frame()
+        self._patch(traci, 'simulationStep', self._simulation_step)
+        self._patch(traci.simulation, 'getMinExpectedNumber', self._get_min_expected_number)
+        for domain_name, commands in self.CONTROL_COMMANDS.items():
+            domain = getattr(traci, domain_name)
+            for command in commands:
+                self._patch(domain, command, self._ignore)
+        return self
+
+    def uninstall(self):
+        super().uninstall()
+        self._frames = None
+        self._next_frame = None
+
+
+def replay_simulation(sim, connection, record_fp: str) -> int:
+    """
+    不启动SUMO，使用录制的订阅数据运行仿真
+    Args:
+        sim: 已调用initialize_storage的Simulation
+        connection: 推送消息的MQTTConnection
+        record_fp: 录制文件路径
+
+    Returns: Simulation.run的返回状态
+
+    """
+    with SubscriptionReplay(record_fp):
+        sim.storage.initialize_subscribe_after_start()
+        return sim.run(connection)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 16:10
+# @File        : timing_wheel.py
+# @Description : 按仿真步离散时间的哈希时间轮
+
+import math
+from typing import List, Dict, Tuple, TypeVar, Generic, Iterator
+
+T = TypeVar('T')
+
+TICK_ROUND_DIGITS = 6  # 仿真时间换算为步数时保留的小数位数，用于消除浮点数运算误差
+
+
+class TimingWheel(Generic[T]):
+    """
+    哈希时间轮，以仿真步(tick)为最小时间单位存放定时执行的对象
+
+    Notes:
+        时间轮由slot_count个槽组成，第tick步到期的对象存放在第tick % slot_count个槽中以tick为键的桶内，
+        同一步到期的对象(例如相同推送周期的各交叉口SPAT任务)共享同一个桶，插入和到期取出均为O(1)。
+        到期判断使用整数步数精确匹配，不再比较浮点数时间
+    """
+
+    def __init__(self, tick_length: float, slot_count: int = 512):
+        """
+
+        Args:
+            tick_length: 单步时长 (s)，与仿真步长一致
+            slot_count: 时间轮槽数
+        """
+        if tick_length <= 0:
+            raise ValueError(f'tick length must be greater than 0, got {tick_length}')
+        if slot_count <= 0:
+            raise ValueError(f'slot count must be greater than 0, got {slot_count}')
+        self.tick_length = tick_length
+        self.slot_count = slot_count
+        self._slots: List[Dict[int, List[T]]] = [{} for _ in range(slot_count)]
+        self._current_tick = -1  # 最近一次推进到的步数
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def current_tick(self) -> int:
+        return self._current_tick
+
+    def to_tick(self, time_point: float) -> int:
+        """将仿真时间换算为步数，不在整数步上的时间归入其后的第一步"""
+        return math.ceil(round(time_point / self.tick_length, TICK_ROUND_DIGITS))
+
+    def to_time(self, tick: int) -> float:
+        """将步数换算为仿真时间"""
+        return round(tick * self.tick_length, TICK_ROUND_DIGITS)
+
+    def add(self, tick: int, item: T) -> int:
+        """
+        添加在第tick步到期的对象
+        Args:
+            tick: 到期步数，不晚于已推进到的步数时放入下一步
+            item: 到期对象
+
+        Returns: 实际到期的步数
+
+        """
+        if tick <= self._current_tick:
+            tick = self._current_tick + 1
+        self._slots[tick % self.slot_count].setdefault(tick, []).append(item)
+        self._size += 1
+        return tick
+
+    def advance(self, tick: int) -> List[Tuple[int, T]]:
+        """
+        推进时间轮到第tick步，取出所有不晚于该步到期的对象
+        Args:
+            tick: 当前步数
+
+        Returns: 按到期步数先后排列的(到期步数, 对象)，同一步到期的对象保持添加顺序
+
+        """
+        if tick <= self._current_tick:
+            return []
+
+        expired = []
+        if self._size:
+            if tick - self._current_tick >= self.slot_count:
+                # 跳过的步数超过一圈(例如预热期间未推进)，直接遍历所有槽
+                expired_ticks = sorted(expire_tick for slot in self._slots for expire_tick in slot
+                                       if expire_tick <= tick)
+                for expire_tick in expired_ticks:
+                    for item in self._slots[expire_tick % self.slot_count].pop(expire_tick):
+                        expired.append((expire_tick, item))
+            else:
+                for expire_tick in range(self._current_tick + 1, tick + 1):
+                    bucket = self._slots[expire_tick % self.slot_count].pop(expire_tick, None)
+                    if bucket is not None:
+                        expired.extend((expire_tick, item) for item in bucket)
+            self._size -= len(expired)
+
+        self._current_tick = tick
+        return expired
+
+    def items(self) -> Iterator[Tuple[int, T]]:
+        """遍历时间轮中的所有(到期步数, 对象)"""
+        for slot in self._slots:
+            for expire_tick, bucket in slot.items():
+                for item in bucket:
+                    yield expire_tick, item
+
+    def clear(self):
+        for slot in self._slots:
+            slot.clear()
+        self._size = 0
+        self._current_tick = -1
+
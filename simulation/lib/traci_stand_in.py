@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 18:20
+# @File        : traci_stand_in.py
+# @Description : 不启动SUMO时按仿真步提供订阅结果的traci替身
+
+"""
+traci替身
+
+仿真每一步中storage的更新和消息生成只通过订阅结果读取SUMO的状态:
+    traci.junction.getContextSubscriptionResults  车辆(JunctionVehContainer)
+    traci.trafficlight.getSubscriptionResults     信号灯(SignalController)
+    traci.simulation.getSubscriptionResults       车辆出发与到达(veh_registry.VehicleIdRegistry)
+    traci.simulation.getTime                      仿真时间
+
+TraciStandIn在with语句块内将traci中的上述接口及subscribe接口替换为读取内存中的订阅结果，
+订阅结果可以是合成的车辆(benchmark/hot_path.py)或录制的SUMO订阅数据(lib/sub_record.py)。
+只需安装traci和sumolib的python包，无需安装SUMO程序
+"""
+
+import random
+from typing import Dict, Any, Optional, List, Tuple
+
+import sumolib
+import traci
+import traci.constants as tc
+
+SubResult = Dict[int, Any]  # 单个订阅对象的订阅结果，键为traci.constants中的变量编号
+
+_MISSING = object()
+
+
+class TraciStandIn:
+    """按仿真步替换traci订阅结果的替身"""
+
+    def __init__(self):
+        self.time = 0.
+        self.junction_context: Dict[str, Dict[str, SubResult]] = {}  # 交叉口id -> 车辆id -> 订阅结果
+        self.trafficlight: Dict[str, SubResult] = {}  # 信号灯id -> 订阅结果
+        self.simulation: SubResult = {}  # 本步出发与到达的车辆
+        self._patched: List[Tuple[Any, str, Any]] = []
+
+    def set_step(self, time: float, junction_context: Dict[str, Dict[str, SubResult]] = None,
+                 trafficlight: Dict[str, SubResult] = None, simulation: SubResult = None):
+        """
+        设置当前步的订阅结果
+        Args:
+            time: 仿真时间
+            junction_context: 各交叉口范围内车辆的订阅结果，None表示保持不变
+            trafficlight: 各信号灯的订阅结果，None表示保持不变
+            simulation: 本步出发与到达的车辆，None表示没有车辆出发或到达，未出发的车辆在首次出现时分配编号
+        """
+        self.time = time
+        self.simulation = simulation or {}
+        if junction_context is not None:
+            self.junction_context = junction_context
+        if trafficlight is not None:
+            self.trafficlight = trafficlight
+
+    def _get_context_subscription_results(self, object_id: str) -> Dict[str, SubResult]:
+        return self.junction_context.get(object_id, {})
+
+    def _get_subscription_results(self, object_id: str) -> SubResult:
+        return self.trafficlight.get(object_id, {})
+
+    def _get_simulation_subscription_results(self) -> SubResult:
+        return self.simulation
+
+    def _get_time(self) -> float:
+        return self.time
+
+    @staticmethod
+    def _ignore(*args, **kwargs):
+        return None
+
+    def _patch(self, domain, name: str, func):
+        self._patched.append((domain, name, vars(domain).get(name, _MISSING)))
+        setattr(domain, name, func)
+
+    def install(self) -> 'TraciStandIn':
+        """替换traci的订阅相关接口"""
+        if self._patched:
+            raise RuntimeError('traci stand-in has already been installed')
+        self._patch(traci.junction, 'getContextSubscriptionResults', self._get_context_subscription_results)
+        self._patch(traci.junction, 'subscribeContext', self._ignore)
+        self._patch(traci.trafficlight, 'getSubscriptionResults', self._get_subscription_results)
+        self._patch(traci.trafficlight, 'subscribe', self._ignore)
+        self._patch(traci.simulation, 'getSubscriptionResults', self._get_simulation_subscription_results)
+        self._patch(traci.simulation, 'subscribe', self._ignore)
+        self._patch(traci.simulation, 'getTime', self._get_time)
+        return self
+
+    def uninstall(self):
+        """恢复traci的原始接口"""
+        while self._patched:
+            domain, name, original = self._patched.pop()
+            if original is _MISSING:
+                delattr(domain, name)
+            else:
+                setattr(domain, name, original)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.uninstall()
+        return False
+
+
+def static_trafficlight_results(net: sumolib.net.Net, tls_id: str, time: float,
+                                program_id: Optional[str] = None) -> SubResult:
+    """
+    按路网中的静态配时方案计算信号灯在time时刻的订阅结果
+    Args:
+        net: 路网，需使用withPrograms或withLatestPrograms读取
+        tls_id: 信号灯id
+        time: 仿真时间
+        program_id: 配时方案id，未提供时使用第一个方案
+
+    Returns: 与SignalController.subscribe_info订阅变量一致的结果
+
+    """
+    programs = net.getTLS(tls_id).getPrograms()
+    if not programs:
+        raise ValueError(f'no signal program for traffic light {tls_id} in net')
+    if program_id is None:
+        program_id = next(iter(programs))
+    phases = [traci.trafficlight.Phase(phase.duration, phase.state) for phase in programs[program_id].getPhases()]
+    cycle_length = sum(phase.duration for phase in phases)
+
+    time_in_cycle = time % cycle_length
+    phase_index, phase_end = 0, 0.
+    for phase_index, phase in enumerate(phases):
+        phase_end += phase.duration
+        if time_in_cycle < phase_end:
+            break
+    logic = traci.trafficlight.Logic(program_id, 0, phase_index, phases=phases)
+    return {tc.TL_CURRENT_PROGRAM: program_id,
+            tc.TL_CURRENT_PHASE: phase_index,
+            tc.TL_NEXT_SWITCH: time - time_in_cycle + phase_end,
+            tc.TL_COMPLETE_DEFINITION_RYG: (logic,)}
+
+
+class SyntheticPopulation:
+    """
+    交叉口进口道上的合成车辆，车辆沿车道匀速行驶，越过停止线后在交叉口内部停留一步再回到车道起点，
+    用于在不运行SUMO时产生规模可控的车辆订阅结果
+    """
+
+    def __init__(self, net: sumolib.net.Net, junction_id: str, count: int, seed: int = 0,
+                 stopped_ratio: float = 0.2):
+        """
+
+        Args:
+            net: 路网
+            junction_id: 交叉口id
+            count: 车辆数，车辆id按flow{i}.{j}的形式生成
+            seed: 随机数种子
+            stopped_ratio: 速度为0的车辆比例，用于产生排队
+        """
+        self.junction_id = junction_id
+        self.internal_edge = f':{junction_id}_0'
+        self._rng = random.Random(seed)
+        self._lanes = [(lane.getID(), edge.getID(), lane.getIndex(), lane.getShape(), lane.getLength())
+                       for edge in net.getNode(junction_id).getIncoming() for lane in edge.getLanes()]
+        if not self._lanes:
+            raise ValueError(f'junction {junction_id} has no incoming lanes')
+        self._vehicles = []  # [车辆id, 车道序号, 车道位置, 速度]
+        for index in range(count):
+            veh_id = f'flow{index // 1000}.{index % 1000}'
+            lane_index = self._rng.randrange(len(self._lanes))
+            offset = self._rng.uniform(0, self._lanes[lane_index][4])
+            speed = 0. if self._rng.random() < stopped_ratio else self._rng.uniform(2, 15)
+            self._vehicles.append([veh_id, lane_index, offset, speed])
+
+    def __len__(self):
+        return len(self._vehicles)
+
+    def step(self, step_length: float) -> Dict[str, SubResult]:
+        """车辆前进一步并返回交叉口范围内车辆的订阅结果"""
+        results = {}
+        for vehicle in self._vehicles:
+            veh_id, lane_index, offset, speed = vehicle
+            lane_id, edge_id, lane_pos_index, shape, length = self._lanes[lane_index]
+            if offset > length:
+                vehicle[2] = 0.  # 通过交叉口后回到车道起点
+                road_id, lane_id, x_y = self.internal_edge, f'{self.internal_edge}_0', shape[-1]
+            else:
+                vehicle[2] = offset + speed * step_length
+                road_id, x_y = edge_id, sumolib.geomhelper.positionAtShapeOffset(shape, offset)
+            results[veh_id] = {tc.VAR_POSITION: x_y,
+                               tc.VAR_SPEED: speed,
+                               tc.VAR_ACCELERATION: 0.,
+                               tc.VAR_ANGLE: 90.,
+                               tc.VAR_LENGTH: 5.,
+                               tc.VAR_WIDTH: 1.8,
+                               tc.VAR_HEIGHT: 1.5,
+                               tc.VAR_VEHICLECLASS: 'passenger',
+                               tc.VAR_ROAD_ID: road_id,
+                               tc.VAR_LANE_ID: lane_id,
+                               tc.VAR_LANE_INDEX: lane_pos_index}
+        return results
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 16:10
+# @File        : trajectory_store.py
+# @Description : 关键帧+增量编码的轨迹记录
+
+"""
+稀疏轨迹记录
+
+逐秒记录时每个时刻都为每辆车保存完整的轨迹点，红灯前停车的车辆状态不变仍重复保存。JunctionTrajectory按车辆保存
+关键帧(车辆出现时的完整轨迹点)与增量(相对上一次保存的状态发生变化的字段)，状态变化不超过容差时不保存，
+展开时沿用上一次保存的状态，因此还原的轨迹与原轨迹的误差不超过容差，容差为0时无损
+
+展开后的格式与逐秒记录一致: {时刻: {ptcId: trajectory}}，trajectory见public_data.create_trajectory
+"""
+
+import json
+from typing import Dict, List, NamedTuple, Tuple, Iterator, Optional, Any, TextIO, FrozenSet, Iterable
+
+ENCODING_FORMAT = 'delta'
+
+METER_PER_DEGREE = 111320.  # 纬度方向每度的距离 (m)，经度方向每米对应的度数更大，换算出的容差偏保守
+POSITION_RESOLUTION = 1e-7  # 轨迹中经纬度的单位 (度)
+SPEED_RESOLUTION = 0.02  # 轨迹中速度的单位 (m/s)
+HEADING_RESOLUTION = 0.0125  # 轨迹中航向角的单位 (度)
+ACCELERATION_RESOLUTION = 0.01  # 轨迹中加速度的单位 (m/s^2)
+
+
+class TrajectoryTolerance(NamedTuple):
+    """增量编码的容差，单位与轨迹中的整数编码一致，全部为0时无损"""
+    position: int = 0  # 经纬度 (1e-7度)
+    speed: int = 0  # 速度 (0.02m/s)
+    heading: int = 0  # 航向角 (0.0125度)
+    acceleration: int = 0  # 加速度 (0.01m/s^2)
+
+    @classmethod
+    def from_config(cls, para: Optional[Dict[str, float]]) -> 'TrajectoryTolerance':
+        """
+        由物理单位的容差生成
+        Args:
+            para: {'position': 位置 (m), 'speed': 速度 (m/s), 'heading': 航向角 (度), 'acceleration': 加速度 (m/s^2)}，
+                  缺省的项容差为0
+
+        Returns:
+
+        """
+        para = para or {}
+        return cls(position=int(para.get('position', 0) / METER_PER_DEGREE / POSITION_RESOLUTION),
+                   speed=int(para.get('speed', 0) / SPEED_RESOLUTION),
+                   heading=int(para.get('heading', 0) / HEADING_RESOLUTION),
+                   acceleration=int(para.get('acceleration', 0) / ACCELERATION_RESOLUTION))
+
+    @property
+    def lossless(self) -> bool:
+        return not any(self)
+
+
+def _heading_difference(prev: int, curr: int) -> int:
+    """航向角之差，考虑0度与360度相邻"""
+    diff = abs(curr - prev)
+    full_circle = int(360 / HEADING_RESOLUTION)
+    return min(diff, full_circle - diff % full_circle)
+
+
+def trajectory_delta(prev: Dict[str, Any], curr: Dict[str, Any],
+                     tolerance: TrajectoryTolerance = TrajectoryTolerance()) -> Dict[str, Any]:
+    """
+    轨迹点相对上一次保存的状态变化的字段
+    Args:
+        prev: 上一次保存的状态
+        curr: 当前轨迹点
+        tolerance: 容差
+
+    Returns: 变化超过容差的字段 {字段名: 当前值}，嵌套字段(pos, accelSet)整体保存
+
+    """
+    delta = {}
+    for key, value in curr.items():
+        prev_value = prev.get(key)
+        if value == prev_value:
+            continue
+        if prev_value is not None:
+            if key == 'pos':
+                if (abs(value['lat'] - prev_value['lat']) <= tolerance.position and
+                        abs(value['lon'] - prev_value['lon']) <= tolerance.position):
+                    continue
+            elif key == 'speed':
+                if abs(value - prev_value) <= tolerance.speed:
+                    continue
+            elif key == 'heading':
+                if _heading_difference(prev_value, value) <= tolerance.heading:
+                    continue
+            elif key == 'accelSet':
+                if (abs(value['lon'] - prev_value['lon']) <= tolerance.acceleration and
+                        abs(value['lat'] - prev_value['lat']) <= tolerance.acceleration):
+                    continue
+        delta[key] = value
+    return delta
+
+
+class _VehicleTrack:
+    """单辆车的轨迹，连续出现的时段内第一条为关键帧，其余为增量"""
+    __slots__ = ('spans', 'changes', 'state')
+
+    def __init__(self):
+        self.spans: List[List[int]] = []  # 连续出现的时段 [起始帧序号, 结束帧序号]
+        self.changes: List[Tuple[int, Dict[str, Any]]] = []  # (帧序号, 关键帧或增量)
+        self.state: Optional[Dict[str, Any]] = None  # 最后一次保存的状态，即展开时该车当前的轨迹点
+
+
+class JunctionTrajectory:
+    """
+    单个交叉口的稀疏轨迹
+
+    可按{时刻: {ptcId: trajectory}}迭代(iter、len、items、values)，展开后的各时刻轨迹点逐帧生成，不会一次展开全部轨迹
+    """
+
+    def __init__(self, tolerance: TrajectoryTolerance = TrajectoryTolerance()):
+        self.tolerance = tolerance
+        self.time_keys: List[str] = []  # 所有记录时刻，包括没有轨迹点的时刻
+        self._tracks: Dict[str, _VehicleTrack] = {}
+
+    def record(self, time_key: str, trajectories: Dict[str, Dict[str, Any]]):
+        """
+        记录一个时刻的轨迹
+        Args:
+            time_key: 时刻
+            trajectories: {ptcId: trajectory}，见JunctionVehContainer.get_trajectories
+
+        Returns:
+
+        """
+        frame = len(self.time_keys)
+        self.time_keys.append(time_key)
+        for ptc_id, trajectory in trajectories.items():
+            track = self._tracks.get(ptc_id)
+            if track is None:
+                track = self._tracks[ptc_id] = _VehicleTrack()
+            if track.spans and track.spans[-1][1] == frame - 1:
+                track.spans[-1][1] = frame
+                delta = trajectory_delta(track.state, trajectory, self.tolerance)
+                if delta:
+                    track.changes.append((frame, delta))
+                    track.state = {**track.state, **delta}
+            else:
+                # 首次出现或离开后重新出现，保存关键帧
+                track.spans.append([frame, frame])
+                track.changes.append((frame, trajectory))
+                track.state = trajectory
+
+    @property
+    def stored_points(self) -> int:
+        """保存的关键帧与增量数"""
+        return sum(len(track.changes) for track in self._tracks.values())
+
+    @property
+    def expanded_points(self) -> int:
+        """展开后的轨迹点数"""
+        return sum(end - start + 1 for track in self._tracks.values() for start, end in track.spans)
+
+    def iter_frames(self) -> Iterator[Tuple[str, Dict[str, Dict[str, Any]]]]:
+        """
+        逐帧展开，生成(时刻, {ptcId: trajectory})，状态未变化的车辆在相邻时刻共用同一轨迹点字典
+
+        Notes:
+            每个时刻中车辆按本次连续出现的先后排列，与记录时的顺序可能不同
+        """
+        changes_at: Dict[int, List[Tuple[str, Dict[str, Any]]]] = {}
+        leaves_at: Dict[int, List[str]] = {}
+        for ptc_id, track in self._tracks.items():
+            for frame, fields in track.changes:
+                changes_at.setdefault(frame, []).append((ptc_id, fields))
+            for _, end in track.spans:
+                leaves_at.setdefault(end + 1, []).append(ptc_id)
+
+        active: Dict[str, Dict[str, Any]] = {}
+        for frame, time_key in enumerate(self.time_keys):
+            for ptc_id in leaves_at.get(frame, ()):
+                del active[ptc_id]
+            for ptc_id, fields in changes_at.get(frame, ()):
+                prev = active.get(ptc_id)
+                active[ptc_id] = fields if prev is None else {**prev, **fields}
+            yield time_key, dict(active)
+
+    def expand(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """展开为逐时刻的轨迹 {时刻: {ptcId: trajectory}}"""
+        return dict(self.iter_frames())
+
+    def __len__(self):
+        return len(self.time_keys)
+
+    def __iter__(self):
+        return iter(self.time_keys)
+
+    def items(self):
+        return self.iter_frames()
+
+    def values(self):
+        return (trajectories for _, trajectories in self.iter_frames())
+
+    def dump(self, f: TextIO):
+        """逐帧写入展开后的轨迹，与json.dump(self.expand(), f, indent=2)的结果一致"""
+        if not self.time_keys:
+            f.write('{}')
+            return None
+        f.write('{')
+        for i, (time_key, trajectories) in enumerate(self.iter_frames()):
+            body = json.dumps(trajectories, indent=2).replace('\n', '\n  ')
+            f.write(f'{"," if i else ""}\n  {json.dumps(time_key)}: {body}')
+        f.write('\n}')
+
+    def iter_tracks(self) -> Iterator[Tuple[str, List[List[int]], List[Tuple[int, Dict[str, Any]]]]]:
+        """按车辆生成(ptcId, 连续出现的时段, [(帧序号, 关键帧或增量)])，供不展开轨迹的按列计算使用"""
+        for ptc_id, track in self._tracks.items():
+            yield ptc_id, track.spans, track.changes
+
+    def to_dict(self) -> Dict[str, Any]:
+        """编码后的轨迹，可直接保存为json"""
+        return {
+            'format': ENCODING_FORMAT,
+            'timeKeys': self.time_keys,
+            'tolerance': self.tolerance._asdict(),
+            'vehicles': {ptc_id: {'spans': track.spans, 'changes': track.changes}
+                         for ptc_id, track in self._tracks.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'JunctionTrajectory':
+        """由to_dict的结果还原，还原后的轨迹只用于展开"""
+        trajectory = cls(TrajectoryTolerance(**data.get('tolerance', {})))
+        trajectory.time_keys = list(data['timeKeys'])
+        for ptc_id, vehicle in data['vehicles'].items():
+            track = trajectory._tracks[ptc_id] = _VehicleTrack()
+            track.spans = [list(span) for span in vehicle['spans']]
+            track.changes = [(frame, fields) for frame, fields in vehicle['changes']]
+        return trajectory
+
+
+class RecordPolicy(NamedTuple):
+    """单个交叉口的轨迹记录策略"""
+    enabled: bool = True  # 是否记录轨迹
+    interval: float = 1.  # 记录间隔 (s)
+    radius: Optional[float] = None  # 车辆订阅范围 (m)，为None时使用默认范围
+    links: Optional[FrozenSet[str]] = None  # 只记录位于这些路段的轨迹点，为None时不限制，交叉口内部的路段为空字符串
+    exclude_links: FrozenSet[str] = frozenset()  # 不记录位于这些路段的轨迹点
+
+    @classmethod
+    def from_config(cls, para: Optional[Dict[str, Any]], base: 'RecordPolicy' = None) -> 'RecordPolicy':
+        """
+        由配置生成
+        Args:
+            para: {'enabled', 'interval', 'radius', 'links', 'excludeLinks'}，缺省的项与base一致
+            base: 默认策略
+
+        Returns:
+
+        """
+        base = base or cls()
+        para = para or {}
+        links = para.get('links', base.links)
+        return cls(enabled=para.get('enabled', base.enabled),
+                   interval=float(para.get('interval', base.interval)),
+                   radius=para.get('radius', base.radius),
+                   links=None if links is None else frozenset(links),
+                   exclude_links=frozenset(para.get('excludeLinks', base.exclude_links)))
+
+    @property
+    def filtered(self) -> bool:
+        return self.links is not None or bool(self.exclude_links)
+
+    def filter(self, trajectories: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """按路段筛选需要记录的轨迹点"""
+        if not self.filtered:
+            return trajectories
+        return {ptc_id: trajectory for ptc_id, trajectory in trajectories.items()
+                if (self.links is None or trajectory['link'] in self.links) and
+                trajectory['link'] not in self.exclude_links}
+
+
+def load_record_policies(para: Optional[Dict[str, Dict[str, Any]]],
+                         junction_ids: Iterable[str]) -> Dict[str, RecordPolicy]:
+    """
+    生成各交叉口的轨迹记录策略
+    Args:
+        para: {'default': 默认策略, 交叉口id: 该交叉口的策略}，交叉口策略中缺省的项与默认策略一致
+        junction_ids: 场景中的交叉口
+
+    Returns: 交叉口id -> 记录策略
+
+    """
+    para = para or {}
+    default = RecordPolicy.from_config(para.get('default'))
+    return {junction_id: RecordPolicy.from_config(para.get(junction_id), default) for junction_id in junction_ids}
+
+
+def is_encoded(data: Any) -> bool:
+    """判断json读取的轨迹是否为JunctionTrajectory.to_dict编码的格式"""
+    return isinstance(data, dict) and data.get('format') == ENCODING_FORMAT
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 18:30
+# @File        : veh_registry.py
+# @Description : 车辆id与整数编号的登记
+
+"""
+车辆编号登记
+
+消息和轨迹中的车辆编号(ptcId)为不超过MAX_VEHICLE_ID的整数。VehicleIdRegistry在车辆出发(traci.simulation订阅的
+VAR_DEPARTED_VEHICLES_IDS)或首次出现时分配编号，车辆到达(VAR_ARRIVED_VEHICLES_IDS)后释放，编号与SUMO中的车辆id格式无关。
+编号按顺序分配，用完后才按释放的先后重新使用，同一场景中车辆数不超过MAX_VEHICLE_ID + 1时编号不会重复
+"""
+
+from collections import deque
+from typing import Dict, Deque, Optional, Iterable
+
+import traci
+import traci.constants as tc
+
+MAX_VEHICLE_ID = 65535
+
+
+class VehicleIdRegistry:
+    """SUMO车辆id -> 整数编号"""
+
+    def __init__(self, max_id: int = MAX_VEHICLE_ID):
+        self.max_id = max_id
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._next_id = 0
+        self._released: Deque[int] = deque()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, veh_id: str) -> bool:
+        return veh_id in self._ids
+
+    def get(self, veh_id: str) -> int:
+        """车辆编号，未登记的车辆在首次出现时分配"""
+        numeric_id = self._ids.get(veh_id)
+        if numeric_id is None:
+            numeric_id = self._assign(veh_id)
+        return numeric_id
+
+    def _assign(self, veh_id: str) -> int:
+        if self._next_id <= self.max_id:
+            numeric_id = self._next_id
+            self._next_id += 1
+        elif self._released:
+            numeric_id = self._released.popleft()
+        else:
+            raise ValueError(f'more than {self.max_id + 1} vehicles in the network at the same time')
+        self._ids[veh_id] = numeric_id
+        self._names[numeric_id] = veh_id
+        return numeric_id
+
+    def release(self, veh_id: str):
+        """车辆到达后释放编号"""
+        numeric_id = self._ids.pop(veh_id, None)
+        if numeric_id is not None:
+            del self._names[numeric_id]
+            self._released.append(numeric_id)
+
+    def name(self, numeric_id: int) -> Optional[str]:
+        """编号对应的SUMO车辆id，车辆未登记或已到达时返回None"""
+        return self._names.get(numeric_id)
+
+    def update(self, departed: Iterable[str] = (), arrived: Iterable[str] = ()):
+        """按上一仿真步出发和到达的车辆更新登记"""
+        for veh_id in departed:
+            self.get(veh_id)
+        for veh_id in arrived:
+            self.release(veh_id)
+
+    @staticmethod
+    def subscribe_info():
+        traci.simulation.subscribe([tc.VAR_DEPARTED_VEHICLES_IDS, tc.VAR_ARRIVED_VEHICLES_IDS])
+
+    def update_from_subscription(self):
+        """读取traci.simulation的订阅结果更新登记"""
+        sub_res = traci.simulation.getSubscriptionResults()
+        self.update(sub_res.get(tc.VAR_DEPARTED_VEHICLES_IDS, ()), sub_res.get(tc.VAR_ARRIVED_VEHICLES_IDS, ()))
+
+    def reset(self):
+        self._ids.clear()
+        self._names.clear()
+        self._next_id = 0
+        self._released.clear()
+
+
+vehicle_ids = VehicleIdRegistry()  # 所有交叉口共用，车辆经过多个交叉口时编号不变
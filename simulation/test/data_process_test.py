@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 20:20
+# @File        : data_process_test.py
+# @Description : SUMO输出统计测试
+
+import os
+import tempfile
+import unittest
+
+from simulation.evaluation import data_process
+
+STATISTICS = '<statistics><vehicles loaded="3"/><vehicleTripStatistics count="3" timeLoss="12.50"/></statistics>'
+TRIPINFO = ('<tripinfos><!-- comment --><tripinfo id="a" waitingCount="2"/>'
+            '<tripinfo id="b" waitingCount="0"/><tripinfo id="c" waitingCount="3"/></tripinfos>')
+E1 = '<detector><interval id="e1_0" nVehContrib="4"/><interval id="e1_1" nVehContrib="6"/></detector>'
+E2 = ('<detector><interval id="e2_E00" maxJamLengthInMeters="15.0"/><interval id="e2_E11" maxJamLengthInMeters="40.0"/>'
+      '<interval id="e2_W10" maxJamLengthInMeters="20.0"/><interval id="e2_N00" maxJamLengthInMeters="0"/>'
+      '<interval id="e2_N10" maxJamLengthInMeters="5.0"/><interval id="e2_S20" maxJamLengthInMeters="8.0"/></detector>')
+
+
+class DataProcessTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.original_path = data_process.PATH
+        data_process.PATH = self.tmp_dir.name
+        os.mkdir(os.path.join(self.tmp_dir.name, '1'))
+        for scene_name in ('low', 'high'):
+            for suffix, content in (('_statistics.xml', STATISTICS), ('_tripinfo.xml', TRIPINFO),
+                                    ('_e1detectorinfo.xml', E1), ('_e2detectorinfo.xml', E2)):
+                with open(os.path.join(self.tmp_dir.name, '1', scene_name + suffix), 'w') as f:
+                    f.write(content)
+
+    def tearDown(self) -> None:
+        data_process.PATH = self.original_path
+        self.tmp_dir.cleanup()
+
+    def test_scene_stats(self):
+        stats = data_process.get_scene_stats(1, 'low')
+        self.assertEqual(stats['delay'], 12.5)
+        self.assertEqual(stats['stop_times'], 5)
+        self.assertEqual(stats['throughput'], 10)
+        self.assertEqual(stats['max_queue'], {'E': 15.0 + 223.83, 'W': 20.0 + 256.25, 'N': 5.0, 'S': 8.0})
+
+    def test_collect_in_process_pool(self):
+        stats = data_process.collect_stats(1, ['low', 'high'], processes=2)
+        self.assertEqual(list(stats), ['low', 'high'])
+        self.assertEqual(stats['high'], data_process.get_scene_stats(1, 'high'))
+        self.assertEqual(data_process.get_total_stops(1, ['low']), {'low': 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
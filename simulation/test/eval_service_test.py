@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 10:10
+# @File        : eval_service_test.py
+# @Description : 交叉口轨迹评价服务测试
+
+import json
+import os
+import tempfile
+import unittest
+
+from simulation.evaluation.eval_service import get_junction_index, score_trajectories, EvalService, FAILURE_RESULT
+from simulation.evaluation.score_engine import SPEED_RESOLUTION
+
+JUNCTION_INFO_DIR = '../data/junction'
+JUNCTION = 'point920'
+ENTRY_LINK = '-HK3TRJVTf7.294.0683777000'  # length 20.04, speed 13.89
+
+
+def _trajectory(ptc_id: str, link: str, speed: float) -> dict:
+    return {'ptcType': '3', 'ptcId': ptc_id, 'pos': {'lat': 0, 'lon': 0}, 'speed': int(speed / SPEED_RESOLUTION),
+            'heading': 0, 'accelSet': {'lon': 0, 'lat': 0}, 'junction': JUNCTION, 'link': link}
+
+
+def _veh_info() -> dict:
+    veh_info = {}
+    for t, speed in enumerate([5, 0, 0, 3, 0, 5, 5, 5, 5, 5]):
+        veh_info[str(t)] = {'1': _trajectory('1', ENTRY_LINK, speed), '2': _trajectory('2', ENTRY_LINK, 5)}
+    veh_info['10'] = {'1': _trajectory('1', '', 5), '2': _trajectory('2', ENTRY_LINK, 5)}
+    return veh_info
+
+
+class EvalServiceTest(unittest.TestCase):
+    def test_junction_index(self):
+        index = get_junction_index(JUNCTION_INFO_DIR)
+        self.assertIs(get_junction_index(JUNCTION_INFO_DIR), index)
+        self.assertEqual(len(index.junctions), len([f for f in os.listdir(JUNCTION_INFO_DIR) if f.endswith('.json')]))
+        link = index.link(JUNCTION, ENTRY_LINK)
+        self.assertTrue(link.is_entry)
+        self.assertEqual((link.length, link.speed), (20.04, 13.89))
+        self.assertIn(link, index.entry_links(JUNCTION))
+
+    def test_score(self):
+        res = score_trajectories(get_junction_index(JUNCTION_INFO_DIR), JUNCTION, _veh_info())
+        free_flow_time = 20.04 / 13.89
+        self.assertEqual(res['detail'], {'delay': round(10 - free_flow_time, 2), 'stops': 2, 'throughput': 1,
+                                         'vehicles': 2, 'engine': 'python'})
+        self.assertEqual(res['score'], round(100 * (0.6 * free_flow_time / 10 + 0.4 / 3), 2))
+
+    def test_evaluate_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            traj_fp = os.path.join(tmp_dir, f'test_{JUNCTION}.json')
+            with open(traj_fp, 'w') as f:
+                json.dump(_veh_info(), f)
+            broken_fp = os.path.join(tmp_dir, 'test_broken.json')
+            with open(broken_fp, 'w') as f:
+                f.write('{')
+            expected = score_trajectories(get_junction_index(JUNCTION_INFO_DIR), JUNCTION, _veh_info())
+            for processes in (0, 2):
+                service = EvalService(JUNCTION_INFO_DIR, processes)
+                try:
+                    res = dict(service.evaluate_files([traj_fp, broken_fp]))
+                finally:
+                    service.close()
+                self.assertEqual(res[traj_fp], expected)
+                self.assertEqual(res[broken_fp], FAILURE_RESULT)
+
+
+if __name__ == '__main__':
+    unittest.main()
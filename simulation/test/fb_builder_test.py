@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 16:40
+# @File        : fb_builder_test.py
+# @Description : 原生Flatbuffers构造与json转换路径的一致性测试
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from simulation.connection.fb_builder import (FBSchema, NativeFBBuilder, SCHEMA_FILE, NATIVE_ROOT_TABLES,
+                                              check_native_parity, flatbuffers)
+from simulation.lib.public_conn_data import DataMsg
+from simulation.lib.public_data import (create_SafetyMessage, create_ParticipantData, create_RoadsideSafetyMessage,
+                                        create_NodeReferenceID, create_TimeCountingDown, create_PhaseState,
+                                        create_Phase, create_DF_IntersectionState, create_SignalPhaseAndTiming,
+                                        create_TrafficFlowStat, create_TrafficFlow)
+
+FLATC = shutil.which('flatc')
+FB_CODES = {DataMsg.SafetyMessage: 0x17, DataMsg.RoadsideSafetyMessage: 0x1c,
+            DataMsg.SignalPhaseAndTiming: 0x18, DataMsg.TrafficFlow: 0x25}  # 与mqtt.MSG_TYPE_INFO一致
+
+
+def sample_messages() -> dict:
+    """仿真中推送的四类消息，覆盖enum名称、union、可选vector及默认值字段"""
+    node = create_NodeReferenceID(920)
+    safety_message = create_SafetyMessage(
+        ptcId=1, moy=1, secMark=1.5, lat=31.29, lon=121.18, x=10.5, y=-20.5, node=node, lane_ref_id=1, speed=10.,
+        direction=90., acceleration=-0.5, width=1.8, length=5., classification='passenger_Vehicle_TypeUnknown',
+        edge_id='edge', lane_id='edge_0')
+    participants = [
+        create_ParticipantData(ptc_id=ptc_id, moy=1, secMark=0., lat=31.29, lon=121.18, x=10.5, y=-20.5, speed=0.,
+                               heading=90., acceleration=0.5, width=1.8, length=5., classification='truck_axleCnt2',
+                               node=node, edge_id='edge', lane_id='edge_0',
+                               general_id=[ptc_id] * 8 if ptc_id % 2 else None)
+        for ptc_id in range(3)
+    ]
+    timing = create_TimeCountingDown(start_time=0, min_end_time=20, max_end_time=20, likely_end_time=20,
+                                     time_confidence=0, next_start_time=104, next_duration=20)
+    phases = [create_Phase(phase_id=phase_id, phase_states=[create_PhaseState(light=light, timing=timing)])
+              for phase_id, light in ((1, 3), (2, 6))]
+    intersection = create_DF_IntersectionState(intersection_id=node, status={'status': 5}, moy=1, timestamp=1.,
+                                               time_confidence=0, phases=phases)
+    stats = [create_TrafficFlowStat(f'edge_{lane}', 1, 'passenger_Vehicle_TypeUnknown', 12.5, 8.1, 20.4, 3)
+             for lane in range(3)]
+    return {
+        DataMsg.SafetyMessage: safety_message,
+        DataMsg.RoadsideSafetyMessage: create_RoadsideSafetyMessage(node_id=920, lat=31.29, lon=121.18,
+                                                                    participants=participants),
+        DataMsg.SignalPhaseAndTiming: create_SignalPhaseAndTiming(moy=1, timestamp=1., name='920',
+                                                                  intersections=[intersection]),
+        DataMsg.TrafficFlow: create_TrafficFlow(node, 1700000000000, {'interval': 60},
+                                                'DE_TrafficFlowStatByInterval', stats),
+    }
+
+
+@unittest.skipIf(flatbuffers is None, 'flatbuffers package is not installed')
+class NativeFBBuilderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.schema = FBSchema.from_file(SCHEMA_FILE)
+        cls.builder = NativeFBBuilder(cls.schema)
+
+    def test_schema_slots(self):
+        pos_fields = self.schema.tables['DF_PositionOffsetLLV']
+        self.assertEqual([(name, field.slot) for name, field in pos_fields.items()],
+                         [('offsetLL_type', 0), ('offsetLL', 1), ('offsetV_type', 2), ('offsetV', 3)])
+        self.assertTrue(pos_fields['offsetLL'].required)
+        stat_fields = self.schema.tables['DF_TrafficFlowStat']
+        self.assertEqual(stat_fields['veh_type'].default, 0)  # unknownVehicleClass
+        self.assertEqual(stat_fields['volume'].default, 2 ** 64 - 1)
+        self.assertEqual(self.schema.unions['DE_TrafficFlowStatType'].index('DE_TrafficFlowStatByInterval'), 0)
+
+    def test_invalid_message(self):
+        msg = sample_messages()[DataMsg.SignalPhaseAndTiming]
+        with self.assertRaisesRegex(ValueError, 'required'):
+            self.builder.build('MSG_SignalPhaseAndTiming', {k: v for k, v in msg.items() if k != 'intersections'})
+        with self.assertRaisesRegex(ValueError, 'unknown field'):
+            self.builder.build('MSG_SignalPhaseAndTiming', dict(msg, timestamp=1))
+        with self.assertRaises(ValueError):
+            self.builder.build('MSG_SignalPhaseAndTiming', dict(msg, timeStamp=70000))  # ushort越界
+        with self.assertRaisesRegex(ValueError, 'enum'):
+            self.builder.build('MSG_SafetyMessage', dict(sample_messages()[DataMsg.SafetyMessage],
+                                                         transmission='reverse'))
+
+    @unittest.skipIf(FLATC is None, 'flatc is not on PATH')
+    def test_flatc_parity(self):
+        """flatc与FBConverter.json2fb使用同一json解析器，解码flatc和原生构造的消息应得到相同的json"""
+        for msg_type, msg in sample_messages().items():
+            root_type = 'MECData.' + NATIVE_ROOT_TABLES[msg_type]
+            with self.subTest(msg_type=msg_type), tempfile.TemporaryDirectory() as temp_dir:
+                json_file = os.path.join(temp_dir, 'reference.json')
+                with open(json_file, 'w') as f:
+                    json.dump(msg, f, separators=(',', ':'))
+                self._flatc(temp_dir, '--binary', '--root-type', root_type, SCHEMA_FILE, json_file)
+                with open(os.path.join(temp_dir, 'native.bin'), 'wb') as f:
+                    f.write(self.builder.build(NATIVE_ROOT_TABLES[msg_type], msg))
+
+                decoded = []
+                for name in ('reference', 'native'):
+                    self._flatc(temp_dir, '--json', '--strict-json', '--raw-binary', '--root-type', root_type,
+                                SCHEMA_FILE, '--', os.path.join(temp_dir, name + '.bin'))
+                    with open(os.path.join(temp_dir, name + '.json')) as f:
+                        decoded.append(f.read())
+                self.assertEqual(decoded[0], decoded[1])
+
+    @staticmethod
+    def _flatc(output_dir: str, *args: str):
+        subprocess.run([FLATC, '-o', output_dir, *args], check=True, capture_output=True)
+
+    def test_json2fb_parity(self):
+        try:
+            from simulation.connection.python_fbconv.fbconv import FBConverter
+            converter = FBConverter(102400)
+        except OSError as e:
+            self.skipTest(f'fbconv library cannot be loaded: {e}')
+        for msg_type, msg in sample_messages().items():
+            with self.subTest(msg_type=msg_type):
+                same, json_decoded, native_decoded = check_native_parity(converter, FB_CODES[msg_type], msg_type, msg)
+                self.assertTrue(same, f'{json_decoded} != {native_decoded}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 11:05
+# @File        : loopback_test.py
+# @Description : 回环通信测试
+
+import json
+import unittest
+
+from simulation.connection.fb_builder import get_native_builder
+from simulation.connection.loopback import LoopbackBroker, LoopbackClient
+from simulation.connection.msg_batch import decode_batch
+from simulation.connection.mqtt import MQTTConnection, MSG_TYPE_INFO
+from simulation.lib.public_conn_data import OrderMsg, DataMsg, PubMsgLabel
+
+
+class LoopbackTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.broker = LoopbackBroker()
+        self.connection = MQTTConnection()
+        self.connection.connect_loopback(self.broker)
+        self.external_client = LoopbackClient(self.broker, client_id='external')
+
+    def tearDown(self) -> None:
+        list(self.connection.loading_msg(OrderMsg))  # 清空类共享的消息队列
+
+    def test_receive_subscribed_topic(self):
+        self.external_client.publish(MSG_TYPE_INFO[OrderMsg.Start].topic_name, json.dumps({'docker': 'algo/t|'}))
+        recv_msgs = list(self.connection.loading_msg(OrderMsg))
+        self.assertEqual(recv_msgs, [(OrderMsg.Start, {'docker': 'algo/t|'})])
+
+    def test_publish_to_subscriber(self):
+        received = []
+        topic = MSG_TYPE_INFO[OrderMsg.ScoreReport].topic_name
+        self.external_client.on_message = lambda client, user_data, msg: received.append(msg.payload)
+        self.external_client.subscribe(topic)
+
+        self.connection.publish(PubMsgLabel({'score': 1}, OrderMsg.ScoreReport, 'json'))
+        self.assertEqual(received, [b'{"score": 1}'])
+        self.assertEqual(self.broker.publish_count[topic], 1)
+
+    def test_batch_publish(self):
+        received = []
+        topic = MSG_TYPE_INFO[DataMsg.SafetyMessage].topic_name
+        self.external_client.on_message = lambda client, user_data, msg: received.append(msg.payload)
+        self.external_client.subscribe(topic)
+        self.connection.set_batch_policy(DataMsg.SafetyMessage, max_bytes=1024, window=0)
+
+        self.connection.publish(PubMsgLabel([{'ptcId': 1}, {'ptcId': 2}], DataMsg.SafetyMessage, 'json', multiple=True))
+        self.assertEqual(received, [])
+        self.connection.flush()
+        self.assertEqual(len(received), 1)
+        self.assertEqual(decode_batch(received[0]), [b'{"ptcId": 1}', b'{"ptcId": 2}'])
+
+    def test_native_flatbuffers_publish(self):
+        native_builder = get_native_builder(DataMsg.TrafficFlow)
+        if native_builder is None:
+            self.skipTest('flatbuffers package is not installed')
+        received = []
+        topic = MSG_TYPE_INFO[DataMsg.TrafficFlow].topic_name
+        self.external_client.on_message = lambda client, user_data, msg: received.append(msg.payload)
+        self.external_client.subscribe(topic)
+
+        traffic_flow = {'stat_type_type': 'DE_TrafficFlowStatByInterval', 'stat_type': {'interval': 60}}
+        self.connection.publish(PubMsgLabel(traffic_flow, DataMsg.TrafficFlow, 'flatbuffers_native'))
+        self.connection.publish(PubMsgLabel({'gen_time': 1}, DataMsg.TrafficFlow, 'flatbuffers_native'))  # 缺少stat_type
+        self.assertEqual(received, [native_builder(traffic_flow)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 13:50
+# @File        : msg_batch_test.py
+# @Description : 批量推送分帧测试
+
+import unittest
+
+from simulation.connection.msg_batch import BatchBuffer, encode_batch, decode_batch
+
+
+class MsgBatchTest(unittest.TestCase):
+    def test_round_trip(self):
+        bodies = [b'\x00\x01', b'', b'flatbuffers' * 10]
+        self.assertEqual(decode_batch(encode_batch(bodies)), bodies)
+
+    def test_truncated_payload(self):
+        payload = encode_batch([b'abcdef'])
+        with self.assertRaises(ValueError):
+            decode_batch(payload[:-1])
+
+    def test_buffer_max_bytes(self):
+        batch_buffer = BatchBuffer(max_bytes=24, window=10)
+        self.assertIsNone(batch_buffer.append(b'a' * 8))
+        self.assertIsNone(batch_buffer.append(b'b' * 8))
+        ready_payload = batch_buffer.append(b'c' * 8)  # 超过24字节，推送前两条
+        self.assertEqual(decode_batch(ready_payload), [b'a' * 8, b'b' * 8])
+        self.assertFalse(batch_buffer.is_due())
+        self.assertEqual(decode_batch(batch_buffer.pop()), [b'c' * 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 22:40
+# @File        : net_cache_test.py
+# @Description : 编译路网缓存测试
+
+import os
+import tempfile
+import unittest
+
+import sumolib
+
+from simulation.lib.net_cache import load_compiled_net, compile_net, CACHE_PREFIX
+
+NETWORK = '../data/network/yutanglu1207.net.xml'
+JUNCTION = 'point920'
+RADIUS = 150
+
+
+class CompiledNetTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.net = sumolib.net.readNet(NETWORK)
+        cls.cache_dir = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.cache_dir.cleanup()
+
+    def test_junction_static(self):
+        compiled_net = compile_net(self.net, RADIUS)
+        self.assertEqual(compiled_net.signalized_junctions, [JUNCTION])
+        junction = compiled_net.get_junction(JUNCTION)
+        node = self.net.getNode(JUNCTION)
+        self.assertEqual(junction.tls_id, node.getConnections()[0].getTLSID())
+        self.assertEqual((junction.lon, junction.lat), self.net.convertXY2LonLat(*node.getCoord()))
+        self.assertEqual(len(junction.conn_info), len(node.getConnections()))
+        for first_lane_id, (lane_chain, stop_line_pos) in junction.successive_lanes.items():
+            self.assertIn(first_lane_id, junction.incoming_lanes)
+            self.assertEqual(lane_chain[0], first_lane_id)
+            self.assertEqual(stop_line_pos, self.net.getLane(first_lane_id).getShape()[-1])
+
+    def test_lon_lat_parity(self):
+        compiled_net = compile_net(self.net, RADIUS)
+        for x, y in ((0., 0.), (362.5, 208.8), (725.03, 417.58)):
+            self.assertEqual(compiled_net.xy_to_lon_lat(x, y), self.net.convertXY2LonLat(x, y))
+
+    def test_cache(self):
+        compiled_net = load_compiled_net(NETWORK, RADIUS, cache_dir=self.cache_dir.name)
+        cache_files = [f for f in os.listdir(self.cache_dir.name) if f.startswith(CACHE_PREFIX)]
+        self.assertEqual(len(cache_files), 1)
+        cached = load_compiled_net(NETWORK, RADIUS, cache_dir=self.cache_dir.name)
+        self.assertEqual(cached.source_hash, compiled_net.source_hash)
+        self.assertEqual(cached.get_junction(JUNCTION).successive_lanes,
+                         compiled_net.get_junction(JUNCTION).successive_lanes)
+        self.assertEqual(cached.get_junction(JUNCTION).conn_info.movement_of_connection,
+                         compiled_net.get_junction(JUNCTION).conn_info.movement_of_connection)
+        self.assertEqual(cached.xy_to_lon_lat(100., 100.), self.net.convertXY2LonLat(100., 100.))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 17:55
+# @File        : profiler_test.py
+# @Description : 用时统计测试
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from simulation.lib.profiler import Profiler
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_phase_and_record(self):
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.phase('sumo_step'):
+                pass
+        profiler.record('task/SPAT', 0.002)
+        profiler.record('task/SPAT', 0.004)
+
+        report = profiler.report()
+        self.assertEqual(report['sumo_step']['count'], 3)
+        self.assertEqual(report['task/SPAT']['max_ms'], 4.)
+        self.assertEqual(report['task/SPAT']['p50_ms'], 4.)
+
+    def test_disabled(self):
+        profiler = Profiler(enabled=False)
+        with profiler.phase('sumo_step'):
+            pass
+        profiler.record('encode', 0.1)
+        self.assertEqual(profiler.report(), {})
+        self.assertIsNone(profiler.dump(tempfile.gettempdir(), 'disabled'))
+
+    def test_dump(self):
+        profiler = Profiler()
+        profiler.record('publish', 0.001)
+        with tempfile.TemporaryDirectory() as output_dir:
+            csv_fp, json_fp = profiler.dump(output_dir, 'sce')
+            self.assertEqual(os.path.basename(csv_fp), 'sce_profile.csv')
+            with open(json_fp) as f:
+                self.assertEqual(json.load(f)['publish']['count'], 1)
+            with open(csv_fp, newline='') as f:
+                self.assertEqual([row['phase'] for row in csv.DictReader(f)], ['publish'])
+
+
+if __name__ == '__main__':
+    unittest.main()
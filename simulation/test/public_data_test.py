@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 14:50
+# @File        : public_data_test.py
+# @Description : 标准消息构造测试
+
+import json
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from simulation.lib.common import set_type_assert
+from simulation.lib.public_data import (create_NodeReferenceID, create_TimeCountingDown, MOTION_CONFIDENCE,
+                                        SimStatus, InfoTaskGroup)
+from simulation.lib.public_conn_data import DataMsg, PubMsgLabel
+
+
+class TypeAssertTest(unittest.TestCase):
+    def test_wrong_argument_type(self):
+        with self.assertRaises(TypeError):
+            create_NodeReferenceID('920')
+        with self.assertRaises(TypeError):
+            create_NodeReferenceID(node_id=920, region='1')
+
+    def test_union_argument(self):
+        timing = create_TimeCountingDown(1, 2., 3, 4, 0, 5, 6)
+        self.assertEqual(timing['minEndTime'], 20)
+
+    def test_switch_off(self):
+        set_type_assert(False)
+        try:
+            self.assertEqual(create_NodeReferenceID('920')['id'], '920')
+        finally:
+            set_type_assert(True)
+
+
+class TemplateTest(unittest.TestCase):
+    def test_immutable_template(self):
+        with self.assertRaises(TypeError):
+            MOTION_CONFIDENCE['speedCfd'] = 'unavailable'
+        self.assertEqual(json.loads(json.dumps({'motionCfd': MOTION_CONFIDENCE}))['motionCfd'],
+                         {'speedCfd': 'prec1ms', 'headingCfd': 'prec0_01deg'})
+
+
+class SimStatusTest(unittest.TestCase):
+    def tearDown(self) -> None:
+        SimStatus.reset()
+
+    def test_time_fields(self):
+        start = datetime(2022, 11, 20, 20, 1, 59, 500_000)
+        SimStatus._set_start_real_datetime(start)
+        SimStatus.time_rolling(0.7)
+
+        real_time = start + timedelta(seconds=0.7)
+        time_diff = real_time - datetime(2022, 1, 1)
+        self.assertEqual(SimStatus.moy, time_diff.days * 24 * 60 + time_diff.seconds // 60)
+        self.assertAlmostEqual(SimStatus.timestamp_in_minute, real_time.second + real_time.microsecond / 1000_000)
+        self.assertAlmostEqual(SimStatus.real_unix_timestamp, real_time.timestamp())
+        self.assertEqual(SimStatus.start_unix_timestamp, datetime(2022, 11, 20, 20, 1, 59).timestamp())
+
+
+class InfoTaskGroupTest(unittest.TestCase):
+    def test_merge_member_labels(self):
+        members = [
+            lambda: (True, PubMsgLabel({'id': 1}, DataMsg.SafetyMessage, 'flatbuffers')),
+            lambda: (False, None),
+            lambda: (True, PubMsgLabel([{'id': 2}, {'id': 3}], DataMsg.SafetyMessage, 'flatbuffers', multiple=True))
+        ]
+        success, msg_label = InfoTaskGroup(members, DataMsg.SafetyMessage, cycle_time=0.1).execute()
+        self.assertTrue(success)
+        self.assertTrue(msg_label.multiple)
+        self.assertEqual(msg_label.raw_msg, [{'id': 1}, {'id': 2}, {'id': 3}])
+
+    def test_parallel_members_keep_order(self):
+        def member(index):
+            time.sleep(0.01 * (5 - index))  # 靠后的成员先完成
+            return True, PubMsgLabel({'id': index}, DataMsg.SignalPhaseAndTiming, 'flatbuffers')
+
+        members = [lambda index=index: member(index) for index in range(5)]
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            _, msg_label = InfoTaskGroup(members, DataMsg.SignalPhaseAndTiming, executor=executor).execute()
+        self.assertEqual(msg_label.raw_msg, [{'id': index} for index in range(5)])
+
+    def test_empty_group(self):
+        self.assertEqual(InfoTaskGroup([lambda: (False, None)], DataMsg.TrafficFlow).execute(), (False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
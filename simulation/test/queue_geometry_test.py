@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 21:50
+# @File        : queue_geometry_test.py
+# @Description : e2检测器几何信息测试
+
+import os
+import tempfile
+import unittest
+
+from simulation.evaluation import data_process
+from simulation.evaluation.queue_geometry import load_detector_geometry, CACHE_PREFIX
+
+NETWORK = '../data/network/yutanglu1207.net.xml'
+DETECTORS = '../data/network/detectors.add.xml'
+
+
+class DetectorGeometryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.cache_dir = tempfile.TemporaryDirectory()
+        cls.geometry = load_detector_geometry(NETWORK, DETECTORS, cache_dir=cls.cache_dir.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.cache_dir.cleanup()
+
+    def test_detector_mapping(self):
+        self.assertEqual(len(self.geometry), 34)
+        self.assertEqual(self.geometry.junctions, ['point920'])
+        # 检测器id中的进口道方向与按路网计算的方向一致
+        for detector_id, approach in zip(self.geometry.detector_ids.tolist(), self.geometry.approaches.tolist()):
+            self.assertEqual(detector_id.split('_')[1][0], approach)
+
+    def test_offsets_close_to_measured(self):
+        """按路网计算的距离与人工量测的ADD_LENGTH相差不超过4m"""
+        for detector_id, offset in zip(self.geometry.detector_ids.tolist(), self.geometry.offsets.tolist()):
+            approach, sector = detector_id.split('_')[1][0], int(detector_id.split('_')[1][1])
+            self.assertAlmostEqual(offset, data_process.ADD_LENGTH[approach][sector], delta=4)
+
+    def test_cache(self):
+        cache_files = [f for f in os.listdir(self.cache_dir.name) if f.startswith(CACHE_PREFIX)]
+        self.assertEqual(len(cache_files), 1)
+        cached = load_detector_geometry(NETWORK, DETECTORS, cache_dir=self.cache_dir.name)
+        self.assertEqual(cached.detector_ids.tolist(), self.geometry.detector_ids.tolist())
+        self.assertEqual(cached.offsets.tolist(), self.geometry.offsets.tolist())
+        self.assertEqual(cached.source_hash, self.geometry.source_hash)
+
+    def test_max_queue(self):
+        offsets = dict(zip(self.geometry.detector_ids.tolist(), self.geometry.offsets.tolist()))
+        queue = self.geometry.max_queue(['e2_E01', 'e2_E31', 'e2_W11', 'e2_N11', 'unknown'],
+                                        [10., 30., 0., 4., 50.])
+        self.assertEqual(queue, {'point920': {'E': offsets['e2_E01'] + 10., 'W': 0.,
+                                              'N': offsets['e2_N11'] + 4., 'S': 0.}})
+
+
+if __name__ == '__main__':
+    unittest.main()
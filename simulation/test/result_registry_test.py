@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 14:40
+# @File        : result_registry_test.py
+# @Description : 评测结果登记测试
+
+import json
+import os
+import tempfile
+import unittest
+
+from simulation.evaluation.result_registry import EvalResultRegistry, TaskResults
+
+FAILURE = {'score': -1, 'detail': 'evaluation faliure'}
+
+
+class ResultRegistryTest(unittest.TestCase):
+    def test_task_results(self):
+        task = TaskResults()
+        task.add('test_a', {'score': 80, 'detail': {}})
+        task.add('test_b', FAILURE)
+        task.add('test_c', {'score': 60, 'detail': {}})
+        self.assertEqual((task.score_sum, task.error_count), (140, 1))
+        self.assertAlmostEqual(task.mean_score, 140 / 3)
+        self.assertEqual(task.detail_info(), [{'score': 80, 'detail': {}}, 'evaluation faliure',
+                                              {'score': 60, 'detail': {}}])
+
+        # 重复登记时替换原结果
+        task.add('test_b', {'score': 70, 'detail': {}})
+        self.assertEqual((task.score_sum, task.error_count, len(task)), (210, 0, 3))
+        self.assertEqual(TaskResults().mean_score, 0.)
+
+    def test_registry(self):
+        registry = EvalResultRegistry()
+        self.assertFalse(registry)
+        with tempfile.TemporaryDirectory() as output_dir:
+            registry.record('1', {'score': 80, 'detail': 'a'}, output_dir, 'docker')
+            registry.record('2', {'score': 60, 'detail': 'b'}, output_dir, 'docker')
+            self.assertEqual(sorted(os.listdir(os.path.join(output_dir, 'docker'))),
+                             ['docker_1.json', 'docker_2.json'])
+            with open(os.path.join(output_dir, 'docker', 'docker_2.json')) as f:
+                self.assertEqual(json.load(f), {'score': 60, 'detail': 'b'})
+        self.assertEqual(registry.batch_result('docker'),
+                         {'score': 70, 'name': 'docker', 'abnormal': 0, 'detail': ['a', 'b']})
+
+        registry.record('3', {'score': 0, 'detail': 'c'})
+        self.assertEqual(registry.batch_result('docker')['score'], 0)
+        registry.record('3', {'score': 90, 'detail': 'c'})
+        self.assertEqual(registry.abnormal_count, 0)
+        self.assertAlmostEqual(registry.batch_result('docker')['score'], 230 / 3)
+
+        registry.add('1', 'docker_point920', {'score': 50, 'detail': {}})
+        registry.clear()
+        self.assertEqual((len(registry), registry.tasks), (0, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 12:00
+# @File        : score_engine_test.py
+# @Description : 向量化评分及与外部评价程序对比测试
+
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from simulation.evaluation.eval_service import get_junction_index, score_trajectories
+from simulation.evaluation.score_engine import (TrajectoryColumns, compare_with_external, score_of, SPEED_RESOLUTION,
+                                                STOP_SPEED, ENGINE_NAME)
+from simulation.lib.trajectory_store import JunctionTrajectory, TrajectoryTolerance
+
+JUNCTION_INFO_DIR = '../data/junction'
+JUNCTION = 'point920'
+
+
+def reference_score(index, junction_id: str, veh_info: dict) -> dict:
+    """逐车逐时刻计算的评分，用于校验向量化实现"""
+    links = index.links[junction_id]
+    time_stamps = sorted(veh_info, key=float)
+    interval = min((float(t2) - float(t1) for t1, t2 in zip(time_stamps, time_stamps[1:])), default=1.)
+    vehicles = {}
+    for time_stamp in time_stamps:
+        for ptc_id, trajectory in veh_info[time_stamp].items():
+            link = links.get(trajectory['link'])
+            record = vehicles.get(ptc_id)
+            if link is not None and link.is_entry:
+                if record is None:
+                    record = vehicles[ptc_id] = [0., set(), 0, False, False]
+                stopped = trajectory['speed'] * SPEED_RESOLUTION < STOP_SPEED
+                record[0] += interval
+                record[1].add(link)
+                if stopped and not record[3]:
+                    record[2] += 1
+                record[3] = stopped
+            elif record is not None:
+                record[4] = True
+    passed = [record for record in vehicles.values() if record[4]]
+    travel_time = sum(record[0] for record in passed)
+    free_flow_time = sum(sum(link.free_flow_time for link in record[1]) for record in passed)
+    delay = sum(max(record[0] - sum(link.free_flow_time for link in record[1]), 0.) for record in passed)
+    count = len(passed)
+    avg_stops = sum(record[2] for record in passed) / count if count else 0.
+    delay_index = min(free_flow_time / travel_time, 1.) if travel_time > 0 else 1.
+    return {'score': score_of(delay_index, avg_stops),
+            'detail': {'delay': round(delay / count if count else 0., 2), 'stops': round(avg_stops, 3),
+                       'throughput': count, 'vehicles': len(vehicles), 'engine': ENGINE_NAME}}
+
+
+def random_veh_info(seed: int, link_ids: list) -> dict:
+    rng = random.Random(seed)
+    veh_info = {str(t): {} for t in range(120)}
+    for ptc_id in range(60):
+        start = rng.randrange(100)
+        for t in range(start, min(start + rng.randrange(5, 40), 120)):
+            veh_info[str(t)][str(ptc_id)] = {'ptcId': str(ptc_id), 'junction': JUNCTION,
+                                             'link': rng.choice(link_ids),
+                                             'speed': rng.choice([0, 1, 3, 250, 500])}
+    return veh_info
+
+
+class ScoreEngineTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.index = get_junction_index(JUNCTION_INFO_DIR)
+        cls.link_ids = list(cls.index.links[JUNCTION]) + ['', 'unknown']
+
+    def test_columns(self):
+        veh_info = random_veh_info(0, self.link_ids)
+        columns = TrajectoryColumns.from_veh_info(veh_info)
+        self.assertEqual(len(columns), sum(len(trajectories) for trajectories in veh_info.values()))
+        self.assertEqual(columns.interval, 1.)
+        self.assertEqual(columns.junction_id, JUNCTION)
+
+    def test_reference_parity(self):
+        for seed in range(20):
+            veh_info = random_veh_info(seed, self.link_ids)
+            res = score_trajectories(self.index, JUNCTION, veh_info)
+            expected = reference_score(self.index, JUNCTION, veh_info)
+            self.assertEqual(res['detail'], expected['detail'])
+            self.assertAlmostEqual(res['score'], expected['score'], delta=0.011)
+
+    def test_junction_trajectory_columns(self):
+        for seed, tolerance in ((0, TrajectoryTolerance()), (1, TrajectoryTolerance(speed=100))):
+            veh_info = random_veh_info(seed, self.link_ids)
+            for t in range(0, 120, 7):
+                veh_info[str(t)] = dict(list(veh_info[str(t)].items())[1:])  # 部分车辆离开后重新出现
+            trajectory = JunctionTrajectory(tolerance)
+            for time_key, trajectories in veh_info.items():
+                trajectory.record(time_key, trajectories)
+            columns = TrajectoryColumns.from_junction_trajectory(trajectory)
+            expanded = TrajectoryColumns.from_veh_info(trajectory.expand())
+            self.assertEqual(len(columns), trajectory.expanded_points)
+            self.assertEqual(sorted(zip(columns.times, map(columns.vehicle_ids.__getitem__, columns.vehicles),
+                                        map(columns.link_ids.__getitem__, columns.links), columns.speeds)),
+                             sorted(zip(expanded.times, map(expanded.vehicle_ids.__getitem__, expanded.vehicles),
+                                        map(expanded.link_ids.__getitem__, expanded.links), expanded.speeds)))
+            self.assertEqual(score_trajectories(self.index, JUNCTION, trajectory),
+                             score_trajectories(self.index, JUNCTION, trajectory.expand()))
+
+    def test_empty(self):
+        res = score_trajectories(self.index, JUNCTION, {'0': {}, '1': {}})
+        self.assertEqual(res['detail'], {'delay': 0., 'stops': 0., 'throughput': 0, 'vehicles': 0,
+                                         'engine': 'python'})
+
+    def test_compare_with_external(self):
+        with tempfile.TemporaryDirectory() as traj_dir, tempfile.TemporaryDirectory() as eval_dir:
+            for seed in range(3):
+                file = f'test_{JUNCTION}_{seed}.json'
+                veh_info = random_veh_info(seed, self.link_ids)
+                with open(os.path.join(traj_dir, file), 'w') as f:
+                    json.dump(veh_info, f)
+                external_score = -1 if seed == 2 else score_trajectories(self.index, JUNCTION, veh_info)['score'] + seed
+                with open(os.path.join(eval_dir, file), 'w') as f:
+                    json.dump({'score': external_score, 'detail': {}}, f)
+            records = compare_with_external(traj_dir, eval_dir, JUNCTION_INFO_DIR)
+        self.assertEqual([record.file for record in records], [f'test_{JUNCTION}_0.json', f'test_{JUNCTION}_1.json'])
+        self.assertEqual([round(record.difference, 6) for record in records], [0, -1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 21:10
+# @File        : stats_store_test.py
+# @Description : 统计指标存储测试
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from simulation.evaluation import data_process
+from simulation.evaluation.stats_store import StatsStore, STATS_DB_NAME, next_run_index
+from simulation.test.data_process_test import STATISTICS, TRIPINFO, E1, E2
+
+
+class StatsStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.original_path = data_process.PATH
+        data_process.PATH = self.tmp_dir.name
+        for run_index in (1, 2):
+            os.mkdir(os.path.join(self.tmp_dir.name, str(run_index)))
+            for scene_name in ('low', 'high'):
+                self.write_outputs(run_index, scene_name, STATISTICS)
+        self.store = StatsStore(os.path.join(self.tmp_dir.name, STATS_DB_NAME))
+
+    def write_outputs(self, run_index, scene_name, statistics):
+        for suffix, content in (('_statistics.xml', statistics), ('_tripinfo.xml', TRIPINFO),
+                                ('_e1detectorinfo.xml', E1), ('_e2detectorinfo.xml', E2)):
+            with open(os.path.join(self.tmp_dir.name, str(run_index), scene_name + suffix), 'w') as f:
+                f.write(content)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        data_process.PATH = self.original_path
+        self.tmp_dir.cleanup()
+
+    def test_ingest_once(self):
+        stats = self.store.ingest(1, ['low', 'high'], 'algo_a', processes=1)
+        self.assertEqual(stats['low'], data_process.get_scene_stats(1, 'low'))
+        with mock.patch.object(data_process, 'collect_stats') as collect_stats:
+            self.assertEqual(self.store.ingest(1, ['low', 'high'], 'algo_a', processes=1), stats)
+            collect_stats.assert_not_called()
+
+        # 输出文件变化后重新解析
+        self.write_outputs(1, 'low', STATISTICS.replace('12.50', '30.00'))
+        self.assertEqual(self.store.ingest(1, ['low', 'high'], 'algo_a', processes=1)['low']['delay'], 30.)
+        self.assertEqual(self.store.get(1, 'low', 'algo_a')['delay'], 30.)
+
+    def test_query_across_runs(self):
+        self.store.ingest(1, ['low', 'high'], 'algo_a', processes=1)
+        self.write_outputs(2, 'low', STATISTICS.replace('12.50', '8.00'))
+        self.store.ingest(2, ['low', 'high'], 'algo_b', processes=1)
+
+        self.assertEqual(self.store.query('delay', scene_names=['low']),
+                         [('algo_a', 1, 'low', 12.5), ('algo_b', 2, 'low', 8.)])
+        self.assertEqual(self.store.compare('throughput'), {'algo_a': {'high': 10, 'low': 10},
+                                                            'algo_b': {'high': 10, 'low': 10}})
+        queue = self.store.query('max_queue', algorithms=['algo_b'], scene_names=['high'])
+        self.assertEqual(queue, [('algo_b', 2, 'high', data_process.get_scene_stats(2, 'high')['max_queue'])])
+        with self.assertRaises(ValueError):
+            self.store.query('speed')
+
+    def test_algorithms_in_one_run(self):
+        self.store.ingest(1, ['low'], 'algo_a', processes=1)
+        self.write_outputs(1, 'low', STATISTICS.replace('12.50', '8.00'))
+        self.store.ingest(1, ['low'], 'algo_b', processes=1)
+        self.store.ingest(1, ['low'], processes=1)
+        self.assertEqual(self.store.compare('delay'), {'algo_a': {'low': 12.5}, 'algo_b': {'low': 8.}})
+        self.assertEqual(self.store.query('delay'), [(None, 1, 'low', 8.), ('algo_a', 1, 'low', 12.5),
+                                                     ('algo_b', 1, 'low', 8.)])
+        self.assertEqual(len(self.store.query('max_queue', run_indexes=[1])), 3)
+
+    def test_next_run_index(self):
+        self.assertEqual(next_run_index(self.tmp_dir.name), 3)  # stats.db不计入
+        os.mkdir(os.path.join(self.tmp_dir.name, '5'))
+        os.mkdir(os.path.join(self.tmp_dir.name, 'profile'))
+        self.assertEqual(next_run_index(self.tmp_dir.name), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
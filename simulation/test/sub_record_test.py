@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 19:55
+# @File        : sub_record_test.py
+# @Description : 订阅数据录制与回放测试
+
+import os
+import tempfile
+import unittest
+
+import sumolib
+import traci
+import traci.constants as tc
+
+from simulation.benchmark.hot_path import DEFAULT_NETWORK, DEFAULT_JUNCTION
+from simulation.lib.sim_data import SimInfoStorage
+from simulation.lib.sub_record import SubscriptionRecorder, SubscriptionReplay, read_frames
+from simulation.lib.traci_stand_in import TraciStandIn, SyntheticPopulation, static_trafficlight_results
+
+
+class SubscriptionRecordTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.net = sumolib.net.readNet(DEFAULT_NETWORK, withLatestPrograms=True)
+        cls.storage = SimInfoStorage()
+        cls.storage.initialize_signal_controller(cls.net, junction_list=[DEFAULT_JUNCTION])
+        cls.storage.initialize_participant(cls.net, junction_list=[DEFAULT_JUNCTION])
+        cls.tls_id = cls.storage.signal_controllers[DEFAULT_JUNCTION].tls_id
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.record_fp = os.path.join(self.tmp_dir.name, 'sce_subscription.rec')
+        population = SyntheticPopulation(self.net, DEFAULT_JUNCTION, 20)
+        self.recorded = []
+        with TraciStandIn() as stand_in, SubscriptionRecorder(self.record_fp) as recorder:
+            for step in range(1, 6):
+                sim_time = step * 0.1
+                stand_in.set_step(sim_time, {DEFAULT_JUNCTION: population.step(0.1)},
+                                  {self.tls_id: static_trafficlight_results(self.net, self.tls_id, sim_time)},
+                                  {tc.VAR_DEPARTED_VEHICLES_IDS: ('flow0.0',)} if step == 1 else None)
+                recorder.record_step(sim_time, self.storage)
+                self.recorded.append((sim_time, stand_in.junction_context))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_read_frames(self):
+        frames = list(read_frames(self.record_fp))
+        self.assertEqual([frame[0] for frame in frames], [item[0] for item in self.recorded])
+        self.assertEqual(frames[-1][1], self.recorded[-1][1])
+        for _, _, trafficlight, _ in frames:  # 未变化的配时方案只写入一次，读取时补全
+            self.assertIn(tc.TL_COMPLETE_DEFINITION_RYG, trafficlight[self.tls_id])
+        self.assertEqual([frame[3] for frame in frames[:2]], [{tc.VAR_DEPARTED_VEHICLES_IDS: ('flow0.0',)}, {}])
+
+    def test_incomplete_tail(self):
+        with open(self.record_fp, 'ab') as f:
+            f.write(b'\x00\x00\x01')
+        self.assertEqual(len(list(read_frames(self.record_fp))), 5)
+
+    def test_replay_drives_simulation_step(self):
+        with SubscriptionReplay(self.record_fp):
+            replay_times = []
+            while traci.simulation.getMinExpectedNumber() >= 0:
+                traci.simulationStep(0)
+                replay_times.append(traci.simulation.getTime())
+                self.assertIsNone(traci.trafficlight.setProgram(self.tls_id, '1'))  # 控制命令被忽略
+        self.assertEqual(replay_times, [item[0] for item in self.recorded])
+
+
+if __name__ == '__main__':
+    unittest.main()
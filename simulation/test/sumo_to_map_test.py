@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/21 10:20
+# @File        : sumo_to_map_test.py
+# @Description : SUMO路网转换MAP测试
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from simulation.utils.SumoToMap import SumoToMSG, SumoToMSGFile, SumoToMSGIncremental
+
+NETWORK = '../data/network/yutanglu1207.net.xml'
+EXPECTED_MAP = '../data/network/yutanglu1207.map.json'  # 合并前SumoToMap的转换结果，timeStamp为0
+
+
+class SumoToMSGTest(unittest.TestCase):
+    def test_process_pool(self):
+        msg_map = SumoToMSG(NETWORK, processes=1, progress=False)
+        with open(EXPECTED_MAP) as f:
+            self.assertEqual(msg_map['nodes'], json.load(f)['nodes'])
+
+        # 每个任务一个交叉口，结果顺序与编号平移与单进程一致
+        pooled_map = SumoToMSG(NETWORK, processes=2, chunk_size=1, progress=False)
+        self.assertEqual(pooled_map['nodes'], msg_map['nodes'])
+
+    def test_file_output(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_file = os.path.join(temp_dir, 'map.json')
+            for scheme in ('16', '12'):
+                with self.subTest(scheme=scheme):
+                    msg_map = SumoToMSG(NETWORK, processes=1, scheme=scheme, progress=False)
+                    count = SumoToMSGFile(NETWORK, output_file, processes=1, scheme=scheme, progress=False)
+                    with open(output_file) as f:
+                        written_map = json.load(f)
+                    self.assertEqual(count, len(msg_map['nodes']))
+                    self.assertEqual(written_map['nodes'], msg_map['nodes'])
+                    self.assertIsInstance(written_map['timeStamp'], int)
+
+
+class SumoToMSGIncrementalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.network = os.path.join(self.temp_dir, 'yutanglu1207.net.xml')
+        self.output_file = os.path.join(self.temp_dir, 'map.json')
+        shutil.copy(NETWORK, self.network)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def set_edge_speed(self, edge_id: str, speed: float):
+        """修改路网副本中路段各车道的限速"""
+        with open(self.network) as f:
+            content = f.read()
+        edge_pat = re.compile(r'<edge id="%s".*?</edge>' % re.escape(edge_id), re.S)
+        content, count = edge_pat.subn(lambda m: re.sub(r'speed="[\d.]+"', f'speed="{speed}"', m.group(0)), content)
+        self.assertEqual(count, 1)
+        with open(self.network, 'w') as f:
+            f.write(content)
+
+    def test_rebuild_changed_intersection(self):
+        msg_map, rebuild_ids = SumoToMSGIncremental(self.network, self.output_file, processes=1, progress=False)
+        self.assertEqual(len(rebuild_ids), len(msg_map['nodes']))
+        with open(EXPECTED_MAP) as f:
+            self.assertEqual(msg_map['nodes'], json.load(f)['nodes'])
+
+        # 路网未变化时不重建、不重写文件
+        mtime = os.path.getmtime(self.output_file)
+        msg_map, rebuild_ids = SumoToMSGIncremental(self.network, self.output_file, processes=1, progress=False)
+        self.assertEqual(rebuild_ids, [])
+        self.assertEqual(os.path.getmtime(self.output_file), mtime)
+
+        # 只修改交叉口0KUyAFxYUW.end进口Link第一个路段的限速
+        self.set_edge_speed('-0KUyAFxYUW.0.0000000000', 8.33)
+        msg_map, rebuild_ids = SumoToMSGIncremental(self.network, self.output_file, processes=1, progress=False)
+        self.assertEqual(rebuild_ids, ['0KUyAFxYUW.end'])
+        full_map = SumoToMSG(self.network, processes=1, progress=False)
+        self.assertEqual(msg_map['nodes'], full_map['nodes'])
+        with open(self.output_file) as f:
+            self.assertEqual(json.load(f)['nodes'], full_map['nodes'])
+        with open(EXPECTED_MAP) as f:
+            self.assertNotEqual(msg_map['nodes'], json.load(f)['nodes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 16:40
+# @File        : timing_wheel_test.py
+# @Description : 时间轮测试
+
+import unittest
+
+from simulation.lib.timing_wheel import TimingWheel
+
+
+class TimingWheelTest(unittest.TestCase):
+    def test_to_tick(self):
+        wheel = TimingWheel(0.1)
+        self.assertEqual(wheel.to_tick(0.1 + 0.2), 3)  # 0.30000000000000004
+        self.assertEqual(wheel.to_tick(0.25), 3)
+        self.assertEqual(wheel.to_time(3), 0.3)
+
+    def test_shared_bucket(self):
+        wheel = TimingWheel(0.1, slot_count=8)
+        for ints_id in ('a', 'b', 'c'):
+            wheel.add(2, ints_id)
+        wheel.add(10, 'd')  # 与第2步位于同一个槽
+        self.assertEqual(wheel.advance(1), [])
+        self.assertEqual(wheel.advance(2), [(2, 'a'), (2, 'b'), (2, 'c')])
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.advance(10), [(10, 'd')])
+
+    def test_skipped_ticks(self):
+        wheel = TimingWheel(1, slot_count=4)
+        wheel.add(3, 'a')
+        wheel.add(9, 'b')
+        wheel.add(30, 'c')
+        self.assertEqual(wheel.advance(20), [(3, 'a'), (9, 'b')])
+        self.assertEqual(wheel.add(5, 'e'), 21)  # 已经过去的步数放入下一步
+        self.assertEqual(wheel.advance(30), [(21, 'e'), (30, 'c')])
+
+
+if __name__ == '__main__':
+    unittest.main()
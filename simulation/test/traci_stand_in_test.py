@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/19 19:05
+# @File        : traci_stand_in_test.py
+# @Description : traci替身测试
+
+import unittest
+
+import sumolib
+import traci
+import traci.constants as tc
+
+from simulation.benchmark.hot_path import HotPathBench, DEFAULT_NETWORK, DEFAULT_JUNCTION
+from simulation.lib.traci_stand_in import TraciStandIn, static_trafficlight_results
+
+
+class TraciStandInTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.net = sumolib.net.readNet(DEFAULT_NETWORK, withLatestPrograms=True)
+
+    def test_install_and_restore(self):
+        original = traci.junction.getContextSubscriptionResults
+        with TraciStandIn() as stand_in:
+            stand_in.set_step(1., junction_context={'point920': {'flow0.1': {tc.VAR_SPEED: 1.}}})
+            self.assertEqual(traci.simulation.getTime(), 1.)
+            self.assertEqual(traci.junction.getContextSubscriptionResults('point920'),
+                             {'flow0.1': {tc.VAR_SPEED: 1.}})
+        self.assertEqual(traci.junction.getContextSubscriptionResults, original)
+
+    def test_static_trafficlight(self):
+        tls_id = self.net.getNode(DEFAULT_JUNCTION).getConnections()[0].getTLSID()
+        first_duration = next(iter(self.net.getTLS(tls_id).getPrograms().values())).getPhases()[0].duration
+        res = static_trafficlight_results(self.net, tls_id, first_duration + 0.5)
+        self.assertEqual(res[tc.TL_CURRENT_PHASE], 1)
+        self.assertGreater(res[tc.TL_NEXT_SWITCH], first_duration + 0.5)
+
+    def test_hot_path(self):
+        report = HotPathBench(self.net).run(vehicles=50, steps=5, alloc_steps=0)
+        self.assertEqual(len(report.step_latency), 5)
+        self.assertGreaterEqual(report.published, 5 * 52)  # 每步50条BSM、1条RSM和1条SPAT
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 16:40
+# @File        : trajectory_store_test.py
+# @Description : 关键帧+增量编码的轨迹记录测试
+
+import io
+import json
+import random
+import unittest
+
+from simulation.lib.public_data import create_trajectory, SimStatus
+from simulation.lib.sim_data import SimInfoStorage
+from simulation.lib.trajectory_store import (JunctionTrajectory, TrajectoryTolerance, RecordPolicy, is_encoded,
+                                             load_record_policies)
+
+
+def simulated_frames(seed: int, frame_count: int = 200, vehicle_count: int = 40) -> dict:
+    """车辆驶入、排队停车、驶离，部分车辆离开后重新出现"""
+    rng = random.Random(seed)
+    veh_info = {str(t): {} for t in range(frame_count)}
+    for ptc_id in range(vehicle_count):
+        lat, lon, speed = 31.28 + rng.random() * 1e-3, 121.16 + rng.random() * 1e-3, 10.
+        start = rng.randrange(frame_count // 2)
+        stop_start, stop_end = start + rng.randrange(5, 20), start + rng.randrange(40, 90)
+        gap = rng.randrange(stop_end, stop_end + 30)
+        for t in range(start, min(start + 120, frame_count)):
+            if t == gap:
+                continue
+            moving = not stop_start <= t < stop_end
+            speed = 10. + rng.random() if moving else 0.
+            if moving:
+                lat += speed * 1e-5
+            veh_info[str(t)][str(ptc_id)] = create_trajectory(ptc_id, lat, lon, 'point920', speed,
+                                                              90. + (rng.random() if moving else 0.),
+                                                              rng.random() if moving else 0.,
+                                                              'link_a' if t < stop_end else 'link_b')
+    return veh_info
+
+
+def record(veh_info: dict, tolerance: TrajectoryTolerance = TrajectoryTolerance()) -> JunctionTrajectory:
+    trajectory = JunctionTrajectory(tolerance)
+    for time_key, trajectories in veh_info.items():
+        trajectory.record(time_key, trajectories)
+    return trajectory
+
+
+class TestJunctionTrajectory(unittest.TestCase):
+    def test_lossless(self):
+        veh_info = simulated_frames(0)
+        trajectory = record(veh_info)
+        self.assertEqual(trajectory.expand(), veh_info)
+        self.assertEqual(list(trajectory), list(veh_info))
+        self.assertLess(trajectory.stored_points, trajectory.expanded_points)
+
+        restored = JunctionTrajectory.from_dict(json.loads(json.dumps(trajectory.to_dict())))
+        self.assertEqual(restored.expand(), veh_info)
+
+    def test_within_tolerance(self):
+        veh_info = simulated_frames(1)
+        tolerance = TrajectoryTolerance.from_config({'position': 1., 'speed': 0.5, 'heading': 2., 'acceleration': 1.})
+        trajectory = record(veh_info, tolerance)
+        expanded = trajectory.expand()
+        self.assertEqual(expanded.keys(), veh_info.keys())
+        for time_key, trajectories in veh_info.items():
+            self.assertEqual(expanded[time_key].keys(), trajectories.keys())
+            for ptc_id, original in trajectories.items():
+                restored = expanded[time_key][ptc_id]
+                self.assertLessEqual(abs(restored['pos']['lat'] - original['pos']['lat']), tolerance.position)
+                self.assertLessEqual(abs(restored['speed'] - original['speed']), tolerance.speed)
+                self.assertLessEqual(abs(restored['heading'] - original['heading']), tolerance.heading)
+                self.assertEqual(restored['link'], original['link'])
+        self.assertLess(len(json.dumps(trajectory.to_dict())), len(json.dumps(record(veh_info).to_dict())))
+
+    def test_dump(self):
+        for veh_info in (simulated_frames(2), {}, {'0': {}, '1': {}}):
+            f = io.StringIO()
+            record(veh_info).dump(f)
+            self.assertEqual(json.loads(f.getvalue()), veh_info)
+            self.assertEqual(f.getvalue(), json.dumps(record(veh_info).expand(), indent=2))
+        self.assertTrue(is_encoded(record({}).to_dict()))
+        self.assertFalse(is_encoded(simulated_frames(3)))
+
+
+class TestRecordPolicy(unittest.TestCase):
+    def test_load(self):
+        policies = load_record_policies({'default': {'interval': 2, 'radius': 80},
+                                         'point920': {'enabled': False},
+                                         'point921': {'links': ['link_a', ''], 'excludeLinks': ['']}},
+                                        ['point920', 'point921', 'point922'])
+        self.assertEqual(policies['point922'], RecordPolicy(interval=2., radius=80))
+        self.assertFalse(policies['point920'].enabled)
+        self.assertEqual(policies['point920'].interval, 2.)
+        self.assertEqual(load_record_policies(None, ['point920'])['point920'], RecordPolicy())
+
+        trajectories = simulated_frames(0)['60']
+        filtered = policies['point921'].filter(trajectories)
+        self.assertTrue(filtered)
+        self.assertEqual(set(filtered), {ptc_id for ptc_id, trajectory in trajectories.items()
+                                         if trajectory['link'] == 'link_a'})
+        self.assertIs(policies['point922'].filter(trajectories), trajectories)
+
+
+class _EmptyContainer:
+    @staticmethod
+    def get_trajectories() -> dict:
+        return {}
+
+
+class TestRecordInterval(unittest.TestCase):
+    def recorded_keys(self, interval: float, step: float = 0.1, steps: int = 30) -> list:
+        storage = SimInfoStorage()
+        storage.junction_veh_cons = {'point920': _EmptyContainer()}
+        storage.record_policies = load_record_policies({'default': {'interval': interval}}, ['point920'])
+        record_task = storage.record_trajectories_update_task()
+        sim_time = 0.
+        for _ in range(steps):
+            sim_time += step  # 与仿真中逐步累加的时间一样存在浮点误差
+            SimStatus.sim_time_stamp = sim_time
+            record_task()
+        return storage.trajectory_info['point920'].time_keys
+
+    def test_fractional_interval(self):
+        self.assertEqual(self.recorded_keys(0.2), [repr(round(0.2 * i, 6)) if i % 5 else str(i // 5)
+                                                   for i in range(1, 16)])
+        self.assertEqual(self.recorded_keys(0.3), ['0.3', '0.6', '0.9', '1.2', '1.5', '1.8', '2.1', '2.4', '2.7', '3'])
+        self.assertEqual(self.recorded_keys(1.), ['1', '2', '3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 18:50
+# @File        : veh_registry_test.py
+# @Description : 车辆编号登记测试
+
+import unittest
+
+import traci.constants as tc
+
+from simulation.lib.traci_stand_in import TraciStandIn
+from simulation.lib.veh_registry import VehicleIdRegistry
+
+
+class VehicleIdRegistryTest(unittest.TestCase):
+    def test_assign_and_release(self):
+        registry = VehicleIdRegistry()
+        registry.update(departed=['244', 'flow0.1'])
+        self.assertEqual(registry.get('244'), 0)
+        self.assertEqual(registry.get('flow0.1'), 1)
+        self.assertEqual(registry.get('veh_x'), 2)  # 未经出发订阅的车辆在首次出现时分配
+        self.assertEqual(registry.name(1), 'flow0.1')
+
+        registry.update(arrived=['244'])
+        self.assertNotIn('244', registry)
+        self.assertIsNone(registry.name(0))
+        self.assertEqual(registry.get('245'), 3)  # 编号用完前不重复使用
+        self.assertEqual(len(registry), 3)
+
+    def test_reuse(self):
+        registry = VehicleIdRegistry(max_id=2)
+        registry.update(departed=['a', 'b', 'c'])
+        registry.update(arrived=['b', 'a'])
+        self.assertEqual(registry.get('d'), 1)
+        self.assertEqual(registry.get('e'), 0)
+        with self.assertRaises(ValueError):
+            registry.get('f')
+        registry.reset()
+        self.assertEqual(registry.get('f'), 0)
+
+    def test_subscription(self):
+        registry = VehicleIdRegistry()
+        with TraciStandIn() as stand_in:
+            registry.subscribe_info()
+            stand_in.set_step(1., simulation={tc.VAR_DEPARTED_VEHICLES_IDS: ('1', '2')})
+            registry.update_from_subscription()
+            stand_in.set_step(2., simulation={tc.VAR_ARRIVED_VEHICLES_IDS: ('1',)})
+            registry.update_from_subscription()
+            stand_in.set_step(3.)
+            registry.update_from_subscription()
+        self.assertEqual((registry.name(0), registry.name(1)), (None, '2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2026/10/20 20:10
+# @File        : vehicle_tracking_test.py
+# @Description : 交叉口车辆表增量更新测试
+
+import unittest
+
+import sumolib
+import traci.constants as tc
+
+from simulation.benchmark.hot_path import DEFAULT_NETWORK, DEFAULT_JUNCTION
+from simulation.lib.public_data import SimStatus
+from simulation.lib.sim_data import SimInfoStorage
+from simulation.lib.traci_stand_in import TraciStandIn, SyntheticPopulation
+from simulation.lib.veh_registry import vehicle_ids
+
+
+class VehicleTrackingTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.net = sumolib.net.readNet(DEFAULT_NETWORK, withLatestPrograms=True)
+
+    def setUp(self) -> None:
+        vehicle_ids.reset()
+        self.storage = SimInfoStorage()
+        self.storage.initialize_traffic_flow(self.net, junction_list=[DEFAULT_JUNCTION])
+        self.storage.initialize_participant(self.net, junction_list=[DEFAULT_JUNCTION])
+        self.storage.initialize_update_execute(trajectory_update=True, traffic_flow_update=True)
+        self.veh_container = self.storage.junction_veh_cons[DEFAULT_JUNCTION]
+        self.flow_container = self.storage.flow_cons[DEFAULT_JUNCTION]
+
+    def tearDown(self) -> None:
+        self.storage.reset()
+
+    def test_incremental_update(self):
+        population = SyntheticPopulation(self.net, DEFAULT_JUNCTION, 60, seed=1)
+        last_lanes, expected_counter = {}, {}
+        leaving, last_sub_res = None, {}
+        with TraciStandIn() as stand_in:
+            for step in range(1, 120):
+                sub_res = population.step(0.5)
+                if step % 10 == 0:
+                    leaving = next(iter(sub_res))
+                    del sub_res[leaving]  # 离开范围后重新进入
+                stand_in.set_step(step * 0.5, junction_context={DEFAULT_JUNCTION: sub_res})
+                previous = dict(self.veh_container.vehicles)
+                SimStatus.time_rolling(step * 0.5)
+                self.storage.update_storage()
+
+                vehicles = self.veh_container.vehicles
+                self.assertEqual(set(vehicles), set(sub_res))
+                for veh_id, veh_info in vehicles.items():
+                    sub_veh_info = sub_res[veh_id]
+                    self.assertEqual((veh_info.local_x, veh_info.local_y), sub_veh_info[tc.VAR_POSITION])
+                    self.assertEqual(veh_info.speed, sub_veh_info[tc.VAR_SPEED])
+                    self.assertEqual(veh_info.lane_id, sub_veh_info[tc.VAR_LANE_ID])
+                    if veh_id in previous:
+                        self.assertIs(veh_info, previous[veh_id])  # 范围内的车辆原地更新
+
+                # TrafficFlow每秒统计一次，统计时车辆信息尚未更新，使用上一步的车辆状态
+                counted_sub_res, last_sub_res = last_sub_res, sub_res
+                if step % 2:
+                    continue
+                curr_lanes = {}
+                for veh_id, sub_veh_info in counted_sub_res.items():
+                    on_lane = not sub_veh_info[tc.VAR_ROAD_ID].startswith(':')
+                    last_lane = last_lanes.get(veh_id)
+                    if last_lane and not on_lane:
+                        expected_counter[last_lane] = expected_counter.get(last_lane, 0) + 1
+                    curr_lanes[veh_id] = sub_veh_info[tc.VAR_LANE_ID] if on_lane else ''
+                last_lanes = curr_lanes
+        self.assertIsNotNone(leaving)
+        self.assertTrue(expected_counter)
+        self.assertEqual({lane: count for lane, count in self.flow_container.lane_flow_counter.items() if count},
+                         expected_counter)
+
+
+if __name__ == '__main__':
+    unittest.main()
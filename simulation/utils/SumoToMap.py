@@ -0,0 +1,964 @@
+# -*- coding: utf-8 -*-
+# @Time        : 2022/8/14 15:55
+# @File        : SumoToMap.py
+# @Description : SUMO路网转换为MAP，转向编号方案见MOVEMENT_SCHEMES
+
+import os
+import sumolib
+import datetime
+import hashlib
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+
+node_id_global = 0
+HASH_VERSION = 2    # 交叉口哈希值的计算方式或Node结构变化时递增，使已记录的哈希值失效
+HASH_SUFFIX = '.hashes.json'
+
+
+class MovementScheme:
+    """
+    转向编号方案，决定Movement的ext_id、turnDirection的behavior取值以及信控交叉口进口车道的转向标识
+    """
+
+    def __init__(self, name, movement_ids, behaviors, node_prefix=False):
+        """
+        :param name: 方案名称
+        :param movement_ids: 进口方向(N/E/S/W) -> (左转, 直行, 右转)的转向编号
+        :param behaviors: 转向(s/l/r) -> behavior取值，按直行、左转、右转的顺序排列
+        :param node_prefix: Movement的ext_id是否以交叉口名称为前缀
+        """
+        self.name = name
+        self.movement_ids = movement_ids
+        self.behaviors = behaviors
+        self.node_prefix = node_prefix
+
+    def movement_id(self, approach, direction):
+        """进口方向和转向对应的转向编号，转向不为左转、直行、右转时抛出KeyError"""
+        return self.movement_ids[approach][{'l': 0, 's': 1, 'r': 2}[direction]]
+
+
+MOVEMENT_SCHEMES = {
+    # 从正北方向顺时针编号，一个方向存在四个转向(左,直,右,行人)，behavior采用bit位的方式表示maneuver
+    '16': MovementScheme('16', {'N': ('1', '2', '3'), 'E': ('5', '6', '7'), 'S': ('9', '10', '11'),
+                                'W': ('13', '14', '15')}, {'s': 1, 'l': 1 << 1, 'r': 1 << 2}),
+    # 一个方向存在三个转向(左,直,右)
+    '12': MovementScheme('12', {'S': ('1', '2', '3'), 'E': ('4', '5', '6'), 'N': ('7', '8', '9'),
+                                'W': ('10', '11', '12')}, {'s': 0, 'l': 1, 'r': 2}, node_prefix=True),
+}
+DEFAULT_SCHEME = '16'
+
+
+def _progress(iterable, total, progress=True):
+    """安装了tqdm时显示进度条"""
+    if not progress or tqdm is None:
+        return iterable
+    return tqdm(iterable, total=total)
+
+
+def _map_timestamp():
+    now = datetime.datetime.now()   # 获取当前日期时间
+    first_day_of_year = datetime.datetime(now.year, 1, 1, 0, 0, 0)  # 当前年份第一天0时0分0秒
+    ts = (now - first_day_of_year).total_seconds()      # 生成时刻为当前年份的第几秒
+    return int(ts / 60)
+
+
+def MSG_MAP(nodes):
+    """
+    构建地图MSC_MAP结构体
+    :param nodes: 交叉口（Node）列表
+    :return: MAP字典
+    """
+    msg_map = {"timeStamp": _map_timestamp(), "nodes": nodes}
+
+    return msg_map
+
+
+def write_msg_map(file, nodes, timestamp=None):
+    """
+    逐个交叉口写出MAP，与json.dumps(MSG_MAP(nodes), indent=2)的结果一致，无需在内存中保留所有Node
+    :param file: 可写的文本文件对象
+    :param nodes: 交叉口（Node）迭代器
+    :param timestamp: MAP的timeStamp，默认为当前时刻
+    :return: 写出的交叉口数
+    """
+    if timestamp is None:
+        timestamp = _map_timestamp()
+    file.write('{\n  "timeStamp": ' + json.dumps(timestamp) + ',\n  "nodes": [')
+    count = 0
+    for node in nodes:
+        file.write(',\n    ' if count else '\n    ')
+        file.write(json.dumps(node, indent=2).replace('\n', '\n    '))
+        count += 1
+    file.write('\n  ]\n}' if count else ']\n}')
+    return count
+
+
+def NodenameToId(node_name):
+    """
+    将交叉口名称（字符串）转换为id（整数）
+    :param node_name: 交叉口名称
+    :return: 交叉口id
+    """
+    global node_id_global
+    if node_name != '':
+        node_id_global += 1
+
+    return node_id_global
+
+
+def DF_Node(net_node, links, net):
+    """
+    构建交叉口DF_Node结构体
+    :param net_node: 交叉口对象
+    :param links: 进入该交叉口的所有道路Link列表
+    :param net: 路网对象
+    :return: Node字典
+    """
+    node_name = net_node.getID()    # 获取交叉口id/名称
+    node_id = NodenameToId(node_name)   # 将字符串id转换为整型id
+
+    (x, y) = net_node.getCoord()    # 获取交叉口xy坐标
+    coord = net.convertXY2LonLat(x, y)      # 转换为经纬度坐标
+
+    if net_node.getType() == "traffic_light":
+        if_tl = "true"
+    else:
+        if_tl = "false"
+
+    df_node = {
+        "name": node_name,
+        "id": {
+            "region": 1,
+            "id": node_id
+        },
+        "refPos": {
+            "lat": int(10000000*coord[1]),
+            "lon": int(10000000*coord[0])
+        },
+        "inLinks_ex": links,
+        "trafficLight": if_tl
+    }
+
+    return df_node
+
+
+def Road_Class(link_type):
+    """
+    获取MAP结构中规定的道路种类
+    :param link_type: sumo中对应的道路类型
+    :return: MAP结构中对应的道路类型
+    """
+    private_list = ['highway.residential', 'highway.service', 'highway.path', 'highway.track', 'highway.pedestrian',
+                    'highway.cycleway', 'highway.living_street', 'highway.footway', 'highway.steps']
+    if "tertiary" in link_type:
+        return "BRANCH"
+    elif link_type in private_list:
+        return "PRIVATE"
+    elif "secondary" in link_type:
+        return "FEEDER"
+    elif "primary" in link_type:
+        return "ARTERIAL"
+    elif ("motorway" in link_type) or ("trunk" in link_type):
+        return "EXPRESSWAY"
+    else:
+        return "UNCLASSIFIED"
+
+
+def DF_LinkEx(net_node, movements_ex, sections, net):
+    """
+    构建道路DF_LinkEx结构体
+    :param net_node: Link对应的交叉口对象
+    :param movements_ex: DF_MovementEx结构体列表
+    :param sections: DF_Section结构体列表
+    :param net: 路网对象
+    :return: Link字典
+    """
+    road_point_list = []    # 构成道路参考线的坐标点列表
+    coord_list = [net.getEdge(sections[0]['ext_id']).getShape()[0]]
+    intersection_lon = net.convertXY2LonLat(net_node.getCoord()[0], net_node.getCoord()[1])[0] * 10000000
+    intersection_lat = net.convertXY2LonLat(net_node.getCoord()[0], net_node.getCoord()[1])[1] * 10000000
+    for section in sections:
+        section_obj = net.getEdge(section['ext_id'])
+        xy_coord = section_obj.getShape()[1:]
+        coord_list += xy_coord
+    for xy_coord in coord_list:
+        node_lon = net.convertXY2LonLat(xy_coord[0], xy_coord[1])[0] * 10000000
+        node_lat = net.convertXY2LonLat(xy_coord[0], xy_coord[1])[1] * 10000000
+        road_point_list.append({
+            "posOffset": {
+                "offsetLL": {
+                    "lon": int(node_lon - intersection_lon),
+                    "lat": int(node_lat - intersection_lat)
+                }
+            }
+        })
+
+    direction_dict = lambda s, x, y: {
+        0.414213 < s <= 2.414213 and x > 0: "NE", -0.414213 < s <= 0.4142123 and x > 0: "E", -2.4142123 < s <= -0.414213
+        and x > 0: "SE", 0.414213 < s <= 2.414213 and x < 0: "SW", -0.414213 < s <= 0.414213 and x < 0: "W",
+        -2.414213 < s <= -0.414213 and x < 0: "NW", (s > 2.414213 or s < -2.414213) and y > 0: "N", (s > 2.414213 or
+                                                                                                     s < -2.414213) and y < 0: "S"
+    }   # 根据斜率确定Link方向
+
+    first_section = net.getEdge(sections[0]["ext_id"])  # 获取section列表中的第一个section
+    speed_limit = int(first_section.getSpeed() / 0.02)
+    upstreamNode = first_section.getFromNode()      # 第一个section的起点，作为Link的起点
+    link_name = upstreamNode.getID() + "_To_" + net_node.getID()
+    upstreamNode_id = NodenameToId(upstreamNode.getID())    # 将上游交叉口字符串id转换为对应的整型id
+
+    delta_x = net_node.getCoord()[0]-upstreamNode.getCoord()[0]
+    delta_y = net_node.getCoord()[1]-upstreamNode.getCoord()[1]
+    if delta_x == 0:
+        if delta_y > 0:
+            direction = "N"
+        else:
+            direction = "S"
+    else:
+        slope = delta_y / delta_x
+        direction = direction_dict(slope, delta_x, delta_y)[True]
+
+    link_type = Road_Class(first_section.getType())     # 以第一个section的道路类型作为Link的类型
+    link_length = 0
+
+    # 计算Link长度（将各section的长度相加）
+    for section in sections:
+        section_obj = net.getEdge(section["ext_id"])
+        link_length += section_obj.getLength()
+
+    df_linkex = {
+        "name": link_name,
+        "upstreamNodeId": {
+            "region": 1,
+            "id": upstreamNode_id
+        },
+        "speedLimits": speed_limit,
+        "refLine": road_point_list,
+        "movements_ex": movements_ex,
+        "sections": sections,
+        "ext_id": link_name,
+        "direction": direction,
+        "road_class": link_type,
+        "length": int(link_length)
+    }
+
+    return df_linkex
+
+
+def Edge_Direction(x1, y1, x2, y2, direction, scheme=None):
+    """
+    获取进口道转向对应编号，编号方式由转向编号方案决定
+    :param x1: edge起点横坐标
+    :param y1: edge起点纵坐标
+    :param x2: edge终点横坐标
+    :param y2: edge终点纵坐标
+    :param direction: 转向
+    :param scheme: 转向编号方案，默认为DEFAULT_SCHEME
+    :return: 交叉口转向编号
+    """
+    if scheme is None:
+        scheme = MOVEMENT_SCHEMES[DEFAULT_SCHEME]
+    delta_x = x2 - x1
+    delta_y = y2 - y1
+
+    # 道路方向为正南或正北
+    if delta_x == 0 and delta_y > 0:
+        approach = 'S'
+    elif delta_x == 0 and delta_y < 0:
+        approach = 'N'
+    # 正南正北外的其他方向
+    else:
+        slope = delta_y / delta_x
+        # 南进口
+        if (slope > 1 or slope < -1) and delta_y > 0:
+            approach = 'S'
+        # 北进口
+        elif (slope > 1 or slope < -1) and delta_y < 0:
+            approach = 'N'
+        # 西进口
+        elif -1 < slope < 1 and delta_x > 0:
+            approach = 'W'
+        # 东进口
+        else:
+            approach = 'E'
+    return scheme.movement_id(approach, direction)
+
+
+def DF_MovementEx(net_node, remote_node, incoming_section, direction, phase_id=0, scheme=None):
+    """
+    构建上下游连接器DF_MovementEx
+    :param net_node: 交叉口对象
+    :param remote_node: 下游交叉口对象
+    :param incoming_section: 直接进入交叉口的section
+    :param direction: 转向
+    :param phase_id: 转向对应的phaseId，从1开始，若无信控，则为0
+    :param scheme: 转向编号方案，默认为DEFAULT_SCHEME
+    :return: Movement字典
+    """
+    if scheme is None:
+        scheme = MOVEMENT_SCHEMES[DEFAULT_SCHEME]
+    remote_node_id = NodenameToId(remote_node.getID())  # 下游交叉口字符串id转换为整型id
+
+    coord_list = incoming_section.getShape()
+    (x1, y1) = coord_list[-2]
+    (x2, y2) = coord_list[-1]
+
+    ext_id = Edge_Direction(x1, y1, x2, y2, direction, scheme)     # Movement_Id
+    if scheme.node_prefix:
+        ext_id = net_node.getID() + "_" + ext_id
+
+    movement_ex = {
+        "remoteIntersection": {
+            "region": 1,
+            "id": remote_node_id
+        },
+        "phaseId": phase_id,
+        "turnDirection": {
+            "behavior": scheme.behaviors[direction.lower()]
+        },
+        "ext_id": ext_id
+    }
+
+    return movement_ex
+
+
+def DF_Section(edge_obj, lanes):
+    """
+    构建DF_Section结构体
+    :param edge_obj: section路段对象
+    :param lanes: section包含的车道列表
+    :return: section字典
+    """
+    ext_id = edge_obj.getID()
+
+    section = {
+        "secID": 1,
+        "lanes": lanes,
+        "ext_id": ext_id
+    }
+
+    return section
+
+
+def DF_LaneEx(net, net_node, lane_obj, turnbehavior, connectsTo_ex, intersection=False):
+    """
+    构建DF_LaneEx结构体
+    :param net: 路网对象
+    :param net_node: 对应交叉口对象
+    :param lane_obj: 车道对象
+    :param turnbehavior: 转向行为编号
+    :param connectsTo_ex: DF_ConnectionEx结构体列表
+    :param intersection: intersection标识，表征车道是否与交叉口直接连接
+    :return: lane字典
+    """
+    lane_point_list = []  # 构成道路参考线的坐标点列表
+    coord_list = lane_obj.getShape()
+    intersection_lon = net.convertXY2LonLat(net_node.getCoord()[0], net_node.getCoord()[1])[0] * 10000000
+    intersection_lat = net.convertXY2LonLat(net_node.getCoord()[0], net_node.getCoord()[1])[1] * 10000000
+
+    for xy_coord in coord_list:
+        node_lon = net.convertXY2LonLat(xy_coord[0], xy_coord[1])[0] * 10000000
+        node_lat = net.convertXY2LonLat(xy_coord[0], xy_coord[1])[1] * 10000000
+        lane_point_list.append({
+            "posOffset": {
+                "offsetLL": {
+                    "lon": int(node_lon - intersection_lon),
+                    "lat": int(node_lat - intersection_lat)
+                }
+            }
+        })
+
+    lane_num = len(lane_obj.getEdge().getLanes())
+    lane_index = int(lane_obj.getIndex())
+    if lane_num % 2 == 0:
+        if lane_index < lane_num / 2:
+            lane_ref_id = lane_index - int(lane_num / 2)
+        else:
+            lane_ref_id = lane_index + 1 - int(lane_num / 2)
+    else:
+        lane_ref_id = lane_index - int(lane_num / 2)
+    lane_width = lane_obj.getWidth()    # 车道宽度
+
+    if lane_obj.allows("passenger"):
+        lanetype_type = "DF_LaneAttributesVehicle"
+        lanetype = 0
+        sharewith = 3
+    elif lane_obj.allows("bicycle"):
+        lanetype_type = "DF_LaneAttributesBike"
+        lanetype = 2
+        sharewith = 7
+    elif lane_obj.allows("rail"):
+        lanetype_type = "DF_LaneAttributesTrackedVehicle"
+        lanetype = 6
+        sharewith = 8
+    else:
+        lanetype_type = "DF_LaneAttributesCrosswalk"
+        lanetype = 1
+        sharewith = 9
+
+    ext_id = lane_obj.getID()
+
+    # 交叉口进口车道
+    if intersection:
+        lane = {
+            "laneRefId": lane_ref_id,
+            "refLine": lane_point_list,
+            "laneWidth": lane_width,
+            "laneAttributes": {
+                "shareWith": {
+                    "shareWith": sharewith
+                },
+                "laneType_type": lanetype_type,
+                "laneType": {
+                    "vehicle": lanetype
+                }
+            },
+            "maneuvers": {
+                "behavior": turnbehavior
+            },
+            "connectsTo_ex": connectsTo_ex,
+            "ext_id": ext_id
+        }
+    # 路段中间车道
+    else:
+        lane = {
+            "laneRefId": lane_ref_id,
+            "refLine": lane_point_list,
+            "laneWidth": lane_width,
+            "laneAttributes": {
+                "shareWith": {
+                    "shareWith": sharewith
+                },
+                "laneType_type": lanetype_type,
+                "laneType": {
+                    "vehicle": lanetype
+                }
+            },
+            "connectsTo_ex": connectsTo_ex,
+            "ext_id": ext_id
+        }
+
+    return lane
+
+
+def DF_ConnectionEx(remote_node, connectinglanes, turndirection, intersection=False):
+    """
+    构建DF_ConnectionEx结构体
+    :param remote_node: 下游交叉口对象
+    :param connectinglanes: 下游连接车道列表
+    :param turndirection: 转向
+    :param intersection: intersection标识，表征车道是否与交叉口直接连接
+    :return: connection字典
+    """
+    # 交叉口进口车道
+    if intersection:
+        connection = {
+            "remoteIntersection": {
+                "region": 1,
+                "id": NodenameToId(remote_node.getID())
+            },
+            "connectingLane": connectinglanes,
+            "turnDirection": turndirection,
+            "ext_id": "connect_" + connectinglanes[0]["ext_id"]
+        }
+    # 路段中间车道
+    elif (not intersection) and len(connectinglanes) > 0:
+        connection = {
+            "connectingLane": connectinglanes,
+            "ext_id": "connect_" + connectinglanes[0]["ext_id"]
+        }
+    else:
+        connection = {
+            "connectingLane": connectinglanes,
+            "ext_id": "connect_none"
+        }
+
+    return connection
+
+
+def DF_ConnectingLaneEx(lane_obj):
+    """
+    构建DF_ConnectingLaneEx结构体
+    :param lane_obj: 车道Lane对象
+    :return: connectionlane字典
+    """
+    target_lane = int(lane_obj.getIndex())      # 车道index
+    connectinglanewidth = lane_obj.getWidth()   # 车道宽度
+    ext_id = lane_obj.getID()
+
+    connectinglane = {
+        "target_section": 1,
+        "target_lane": target_lane,
+        "connectingLaneWidth": connectinglanewidth,
+        "ext_id": ext_id
+    }
+
+    return connectinglane
+
+
+class NetIndex:
+    """
+    路网索引，SumoToMSG中反复使用的节点邻接关系、路段链的上下游交叉口和经纬度转换结果只计算一次
+
+    提供DF_*函数使用的convertXY2LonLat和getEdge方法，可代替路网对象传入
+    """
+
+    def __init__(self, net, scheme=DEFAULT_SCHEME):
+        self.net = net
+        self.scheme = MOVEMENT_SCHEMES[scheme]  # 转向编号方案
+        self.incoming = {}  # 节点id -> 进入节点的edge
+        self.outgoing = {}  # 节点id -> 离开节点的edge
+        self.neighbor_count = {}  # 节点id -> 相邻节点数
+        for node in net.getNodes():
+            node_id = node.getID()
+            self.incoming[node_id] = node.getIncoming()
+            self.outgoing[node_id] = node.getOutgoing()
+            self.neighbor_count[node_id] = len(node.getNeighboringNodes())
+        self.tl_states = {}  # 信号灯id -> 含绿灯的相位状态，最后一个方案
+        for tls in net.getTrafficLights():
+            programs = tls.getPrograms()
+            if programs:
+                program = list(programs.values())[-1]
+                self.tl_states[tls.getID()] = [phase.state for phase in program.getPhases()
+                                               if 'G' in phase.state or 'g' in phase.state]
+        self.location = sorted(getattr(net, '_location', {}).items())   # 投影参数
+        self._downstream = {}  # (edge id, 是否限制查找次数) -> 下游交叉口
+        self._lon_lat = {}
+
+    def convertXY2LonLat(self, x, y):
+        lon_lat = self._lon_lat.get((x, y))
+        if lon_lat is None:
+            lon_lat = self._lon_lat[(x, y)] = self.net.convertXY2LonLat(x, y)
+        return lon_lat
+
+    def getEdge(self, edge_id):
+        return self.net.getEdge(edge_id)
+
+    def is_intersection(self, node):
+        """节点对应的上游节点不为2个或相邻节点数大于2时判断为交叉口"""
+        node_id = node.getID()
+        return len(self.incoming[node_id]) != 2 or self.neighbor_count[node_id] > 2
+
+    def _is_chain_node(self, node_id):
+        """上下游路段数和相邻节点数都小于3的节点可能是路段中间的节点"""
+        return len(self.incoming[node_id]) < 3 and len(self.outgoing[node_id]) < 3 and self.neighbor_count[node_id] < 3
+
+    def upstream_sections(self, incoming_section, intersection):
+        """
+        从直接进入交叉口的section向上游查找，直到section起点为交叉口
+        :return: 当前交叉口到上游交叉口之间的sections，按从上游到下游的顺序排列
+        """
+        temp_incoming_section = incoming_section
+        from_node = temp_incoming_section.getFromNode()
+        incoming_section_list = [temp_incoming_section]
+        while self._is_chain_node(from_node.getID()):
+            from_node_id = from_node.getID()
+            if self.neighbor_count[from_node_id] == 1:
+                break
+            from_node_incoming = self.incoming[from_node_id]
+            if len(from_node_incoming) == 1 and from_node_incoming[0].getFromNode() == intersection:
+                break
+            if len(from_node_incoming) == 0:
+                break
+            for direction_section in from_node_incoming:
+                # 保证顺着上游向上查找
+                if direction_section.getFromNode() != temp_incoming_section.getToNode():
+                    temp_incoming_section = direction_section
+                    break
+            from_node = temp_incoming_section.getFromNode()
+            incoming_section_list.append(temp_incoming_section)
+        incoming_section_list.reverse()
+        return incoming_section_list
+
+    def downstream_intersection(self, edge, limited=True):
+        """
+        从edge向下游查找到达的交叉口，同一edge只查找一次
+        :param edge: 转向到达的edge
+        :param limited: 查找超过100次时停止(非信控交叉口)，否则一直查找
+        :return: 下游交叉口节点
+        """
+        key = (edge.getID(), limited)
+        remote_intersection = self._downstream.get(key)
+        if remote_intersection is None:
+            remote_intersection = self._downstream[key] = self._find_downstream(edge, limited)
+        return remote_intersection
+
+    def _find_downstream(self, edge, limited):
+        endpoint = edge.getToNode()
+        counter = 0
+        direction_edge = None
+        while self._is_chain_node(endpoint.getID()):
+            endpoint_id = endpoint.getID()
+            if self.neighbor_count[endpoint_id] == 1:
+                break
+            endpoint_outgoing = self.outgoing[endpoint_id]
+            if len(endpoint_outgoing) == 0:
+                break
+            for direction_edge in endpoint_outgoing:
+                # 保证顺着下游向下寻找
+                if direction_edge.getToNode() != edge.getFromNode():
+                    edge = direction_edge
+                    endpoint = edge.getToNode()
+                    break
+            if limited:
+                if counter > 100:
+                    edge = direction_edge
+                    endpoint = edge.getToNode()
+                    break
+                counter += 1
+        return endpoint
+
+
+def _build_links(index, intersection):
+    """
+    构建交叉口所有进口的Link
+    :param index: 路网索引
+    :param intersection: 交叉口对象
+    :return: Link字典列表
+    """
+    signalized = intersection.getType() == 'traffic_light'
+    scheme = index.scheme
+    state_list = []
+    if signalized:
+        tlsId = intersection.getConnections()[0].getTLSID()
+        state_list = index.tl_states[tlsId]
+
+    link_list = []
+    link_name_list = []
+    for incoming_section in index.incoming[intersection.getID()]:
+        incoming_section_list = index.upstream_sections(incoming_section, intersection)
+
+        # 获取下游转向关系movement
+        remoteintersection_list = []  # 下游交叉口列表
+        movement_ex_list = []  # 转向列表
+        for lane in incoming_section.getLanes():
+            for connection in lane.getOutgoing():
+                direction = connection.getDirection().lower()
+                # 忽略掉头
+                if direction == 't':
+                    continue
+                remoteintersection = index.downstream_intersection(connection.getToLane().getEdge(),
+                                                                   limited=not signalized)
+                if remoteintersection in remoteintersection_list:
+                    continue
+                remoteintersection_list.append(remoteintersection)
+                if signalized:
+                    connection_index = connection.getTLLinkIndex()
+                    phase_id = 0
+                    for i, tl_state in enumerate(state_list):
+                        connection_state = tl_state[connection_index]
+                        if connection_state == 'g' or connection_state == 'G':
+                            phase_id = i + 1
+                    movement_ex = DF_MovementEx(intersection, remoteintersection, incoming_section, direction,
+                                                phase_id, scheme)
+                else:
+                    movement_ex = DF_MovementEx(intersection, remoteintersection, incoming_section, direction,
+                                                scheme=scheme)
+                movement_ex_list.append(movement_ex)
+
+        # 对incoming_section_list进行遍历
+        section_list = []
+        for i, incoming_section_1 in enumerate(incoming_section_list):
+            lanes_list = []
+            # 中间路段
+            if i < len(incoming_section_list) - 1:
+                for lane in incoming_section_1.getLanes():
+                    connectinglane_ex_list = [DF_ConnectingLaneEx(connection.getToLane())
+                                              for connection in lane.getOutgoing()]
+                    connection_ex_list = [DF_ConnectionEx(None, connectinglane_ex_list, None)]
+                    lanes_list.append(DF_LaneEx(index, intersection, lane, None, connection_ex_list))
+            # 直接与交叉口连接的路段
+            else:
+                for lane in incoming_section_1.getLanes():
+                    # 第二层列表存储各转向对应下游车道，第一层列表第二项存储下游交叉口
+                    if signalized:
+                        direction_lane_dict = {behavior: [[]] for behavior in scheme.behaviors.values()}
+                    else:
+                        direction_lane_dict = {'l': [[]], 's': [[]], 'r': [[]]}
+                    for connection in lane.getOutgoing():
+                        direction = connection.getDirection().lower()
+                        if direction == 't':
+                            continue
+                        if signalized:
+                            direction = scheme.behaviors.get(direction, direction)
+                        outgoinglane = connection.getToLane()
+                        remote_intersection = index.downstream_intersection(outgoinglane.getEdge(),
+                                                                            limited=not signalized)
+                        direction_lane_dict[direction][0].append(DF_ConnectingLaneEx(outgoinglane))
+                        direction_lane_dict[direction].append(remote_intersection)
+                    turn_behavior = ''
+                    connection_ex_list = []
+                    for direct, connectinglanes_remoteintersection in direction_lane_dict.items():
+                        if len(connectinglanes_remoteintersection[0]) != 0:
+                            turn_behavior = direct
+                            connection_ex_list.append(DF_ConnectionEx(connectinglanes_remoteintersection[1],
+                                                                      connectinglanes_remoteintersection[0],
+                                                                      direct,
+                                                                      True))
+                    lanes_list.append(DF_LaneEx(index, intersection, lane, turn_behavior, connection_ex_list, True))
+
+            section_list.append(DF_Section(incoming_section_1, lanes_list))
+
+        # 构建link结构体
+        link = DF_LinkEx(intersection, movement_ex_list, section_list, index)
+        if link['name'] in link_name_list:
+            link['name'] = link['name'] + "_1"
+            link['ext_id'] = link['name']
+        link_name_list.append(link['name'])
+        link_list.append(link)
+    return link_list
+
+
+def _build_node(index, intersection):
+    """
+    构建单个交叉口的Node，交叉口编号从1开始
+    :return: (Node字典，构建失败时为None, 使用的编号数)
+    """
+    global node_id_global
+    node_id_global = 0
+    try:
+        node = DF_Node(intersection, _build_links(index, intersection), index)
+    except Exception:
+        node = None
+    return node, node_id_global
+
+
+def _shift_node_ids(node, offset):
+    """将单个交叉口Node中从1开始的编号平移offset"""
+    node['id']['id'] += offset
+    for link in node['inLinks_ex']:
+        link['upstreamNodeId']['id'] += offset
+        for movement_ex in link['movements_ex']:
+            movement_ex['remoteIntersection']['id'] += offset
+        for section in link['sections']:
+            for lane in section['lanes']:
+                for connection in lane['connectsTo_ex']:
+                    if 'remoteIntersection' in connection:
+                        connection['remoteIntersection']['id'] += offset
+
+
+_worker_index = None
+
+
+def _init_worker(file_name, scheme):
+    """进程池初始化，fork启动时沿用主进程的路网索引"""
+    global _worker_index
+    if _worker_index is None or _worker_index.file_name != file_name or _worker_index.scheme.name != scheme:
+        _worker_index = _load_index(file_name, scheme)
+
+
+def _build_nodes_in_worker(intersection_ids):
+    return [_build_node(_worker_index, _worker_index.net.getNode(node_id)) for node_id in intersection_ids]
+
+
+def _load_index(file_name, scheme=DEFAULT_SCHEME):
+    index = NetIndex(sumolib.net.readNet(file_name, withPrograms=True), scheme)  # 信号配时方案随路网一同读取
+    index.file_name = file_name
+    return index
+
+
+def _chunks(items, chunk_size):
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+def intersection_hash(index, intersection):
+    """
+    交叉口Node依赖的路网元素的哈希值，包括投影参数、交叉口、进口路段链上的路段和车道、车道连接关系、下游交叉口及信号配时方案
+    :param index: 路网索引
+    :param intersection: 交叉口对象
+    :return: 哈希值
+    """
+    signalized = intersection.getType() == 'traffic_light'
+    items = [index.scheme.name, index.location, intersection.getID(), intersection.getType(), intersection.getCoord()]
+    connections = intersection.getConnections()
+    if signalized and connections:
+        tlsId = connections[0].getTLSID()
+        items.append((tlsId, index.tl_states.get(tlsId)))
+    for incoming_section in index.incoming[intersection.getID()]:
+        for section in index.upstream_sections(incoming_section, intersection):
+            from_node = section.getFromNode()
+            items.append((section.getID(), from_node.getID(), from_node.getCoord(), section.getSpeed(),
+                          section.getType(), section.getLength(), section.getShape()))
+            for lane in section.getLanes():
+                items.append((lane.getID(), lane.getIndex(), lane.getWidth(), lane.getShape(),
+                              sorted(lane.getPermissions())))
+                for connection in lane.getOutgoing():
+                    to_lane = connection.getToLane()
+                    items.append((to_lane.getID(), to_lane.getIndex(), to_lane.getWidth(),
+                                  connection.getDirection(), connection.getTLLinkIndex()))
+        for lane in incoming_section.getLanes():
+            for connection in lane.getOutgoing():
+                remote_intersection = index.downstream_intersection(connection.getToLane().getEdge(),
+                                                                    limited=not signalized)
+                items.append(remote_intersection.getID())
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+def _build_nodes(index, intersection_ids, processes=None, chunk_size=64, progress=True):
+    """
+    按顺序构建交叉口的Node，交叉口数大于chunk_size且进程数大于1时使用进程池
+    进程池中同时提交的任务不超过进程数的2倍，已构建但未取走的Node数量有上限
+    :return: (Node字典, 使用的编号数)迭代器，Node中的编号从1开始
+    """
+    global _worker_index
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes <= 1 or len(intersection_ids) <= chunk_size:
+        for node_id in _progress(intersection_ids, len(intersection_ids), progress):
+            yield _build_node(index, index.net.getNode(node_id))
+        return
+
+    _worker_index = index  # fork启动的子进程直接使用，无需重新读取路网
+    try:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(index.file_name, index.scheme.name)) as pool:
+            def results():
+                pending = deque()
+                for chunk in _chunks(intersection_ids, chunk_size):
+                    pending.append(pool.submit(_build_nodes_in_worker, chunk))
+                    if len(pending) >= 2 * processes:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+
+            yield from _progress(results(), len(intersection_ids), progress)
+    finally:
+        _worker_index = None
+
+
+def _iter_nodes(index, processes=None, chunk_size=64, progress=True):
+    """
+    按交叉口顺序逐个生成路网中所有交叉口的Node，构建失败的交叉口被忽略
+    交叉口编号按交叉口顺序连续分配，与逐个交叉口转换的结果一致
+    """
+    intersection_ids = [node.getID() for node in index.net.getNodes() if index.is_intersection(node)]
+    id_offset = 0
+    for node, id_count in _build_nodes(index, intersection_ids, processes, chunk_size, progress):
+        if node is not None:
+            _shift_node_ids(node, id_offset)
+            yield node
+        id_offset += id_count
+
+
+def SumoToMSG(file_name, processes=None, chunk_size=64, scheme=DEFAULT_SCHEME, progress=True):
+    """
+    将SUMO路网转换为MAP
+    :param file_name: 路网文件路径
+    :param processes: 进程数，默认为CPU核数，为1时在当前进程中转换
+    :param chunk_size: 每个进程任务包含的交叉口数
+    :param scheme: 转向编号方案，MOVEMENT_SCHEMES中的名称
+    :param progress: 是否显示进度条，需要安装tqdm
+    :return: MAP字典
+    """
+    index = _load_index(file_name, scheme)
+    node_list = list(_iter_nodes(index, processes, chunk_size, progress))
+
+    # 构建map结构体
+    msg_map = MSG_MAP(node_list)
+
+    return msg_map
+
+
+def SumoToMSGFile(file_name, output_file, processes=None, chunk_size=64, scheme=DEFAULT_SCHEME, progress=True):
+    """
+    将SUMO路网转换为MAP并写入文件，每个交叉口的Node构建完成后立即写出，内存中不保留完整的MAP
+    :param file_name: 路网文件路径
+    :param output_file: MAP文件路径
+    :param processes: 进程数，见SumoToMSG
+    :param chunk_size: 每个进程任务包含的交叉口数
+    :param scheme: 转向编号方案，MOVEMENT_SCHEMES中的名称
+    :param progress: 是否显示进度条，需要安装tqdm
+    :return: 写出的交叉口数
+    """
+    index = _load_index(file_name, scheme)
+    with open(output_file, 'w') as file:
+        return write_msg_map(file, _iter_nodes(index, processes, chunk_size, progress))
+
+
+def _load_previous(output_file):
+    """
+    读取已有的MAP文件及其交叉口哈希值记录
+    :return: 交叉口名称 -> (哈希值, 编号从1开始的Node字典或None, 使用的编号数)，记录不存在或与MAP不一致时为空字典
+    """
+    hash_file = output_file + HASH_SUFFIX
+    if not (os.path.exists(output_file) and os.path.exists(hash_file)):
+        return {}
+    try:
+        with open(output_file) as file:
+            nodes = json.load(file)['nodes']
+        with open(hash_file) as file:
+            records = json.load(file)
+    except (OSError, ValueError, KeyError) as e:
+        print(f'ignore previous MAP {output_file}: {e}')
+        return {}
+    if records.get('version') != HASH_VERSION or \
+            sum(record['built'] for record in records['intersections']) != len(nodes):
+        return {}
+
+    previous = {}
+    nodes = iter(nodes)
+    id_offset = 0
+    for record in records['intersections']:
+        node = None
+        if record['built']:
+            node = next(nodes)
+            _shift_node_ids(node, -id_offset)
+        previous[record['name']] = (record['hash'], node, record['idCount'])
+        id_offset += record['idCount']
+    return previous
+
+
+def SumoToMSGIncremental(file_name, output_file, processes=None, chunk_size=64, scheme=DEFAULT_SCHEME,
+                         progress=True):
+    """
+    增量更新MAP文件，只重新构建路网元素哈希值变化的交叉口，其余交叉口沿用已有MAP中的Node
+    各交叉口的哈希值记录在output_file + HASH_SUFFIX中，记录不存在时完整转换
+    :param file_name: 路网文件路径
+    :param output_file: MAP文件路径，更新后写回
+    :param processes: 进程数，见SumoToMSG
+    :param chunk_size: 每个进程任务包含的交叉口数
+    :param scheme: 转向编号方案，MOVEMENT_SCHEMES中的名称
+    :param progress: 是否显示进度条，需要安装tqdm
+    :return: (MAP字典, 重新构建的交叉口名称列表)
+    """
+    index = _load_index(file_name, scheme)
+    intersection_ids = [node.getID() for node in index.net.getNodes() if index.is_intersection(node)]
+    hashes = {node_id: intersection_hash(index, index.net.getNode(node_id)) for node_id in intersection_ids}
+    previous = _load_previous(output_file)
+    rebuild_ids = [node_id for node_id in intersection_ids
+                   if node_id not in previous or previous[node_id][0] != hashes[node_id]]
+    rebuilt = dict(zip(rebuild_ids, _build_nodes(index, rebuild_ids, processes, chunk_size, progress)))
+
+    # 交叉口增删或编号数变化时，后续交叉口的编号随之重新平移
+    node_list = []
+    records = []
+    id_offset = 0
+    for node_id in intersection_ids:
+        node, id_count = rebuilt[node_id] if node_id in rebuilt else previous[node_id][1:]
+        if node is not None:
+            _shift_node_ids(node, id_offset)
+            node_list.append(node)
+        records.append({'name': node_id, 'hash': hashes[node_id], 'idCount': id_count, 'built': node is not None})
+        id_offset += id_count
+
+    msg_map = MSG_MAP(node_list)
+    if rebuild_ids or list(previous) != intersection_ids:     # 路网未变化时不重写文件
+        with open(output_file, 'w') as file:
+            write_msg_map(file, node_list, msg_map['timeStamp'])
+        with open(output_file + HASH_SUFFIX, 'w') as file:
+            file.write(json.dumps({'version': HASH_VERSION, 'intersections': records}))
+
+    return msg_map, rebuild_ids
+
+
+if __name__ == '__main__':
+    SumoToMSGFile('../../data/network/anting.net.xml', 'AT59-12-29.json')
+    # SumoToMSGFile('D:/Desktop/sumo项目/安研路安拓路-新/anting.net.xml', 'AT59-12-29.json', scheme='12')